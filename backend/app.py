@@ -1,433 +1,61 @@
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, g, jsonify, request, send_file, url_for
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import json
 import csv
 import io
 import re
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Iterable, Iterator, Mapping, Set
 from urllib.parse import urlparse
 import hashlib
+import os
+import time
+import zlib
+
+import numpy as np
+
+from background_jobs import BackgroundJobs
+from email_validation import RESOLVER_NAME, RESOLVERS, VALIDATION_ENABLED, EmailValidator
+from http_cache import ConditionalCache
+from import_jobs import ImportJobs
+from json_fragments import FragmentCache, encode_object
+from lead_aggregates import APPROXIMATE_ANALYTICS, LeadAggregates, LeadSketches
+from lead_changes import ChangeLog
+from lead_dedupe import dedupe
+from lead_index import LeadIndex
+from lead_ingest import PARSERS, SERVER_INGEST_WORKERS, detect_format, ingest, start_worker_pool
+from lead_intelligence import (
+    BusinessLeadIntelligence, SalesWorkflowIntegrator, LeadQualityOptimizer,
+    business_intel, workflow_integrator, quality_optimizer,
+    calculate_lead_score, enrich_leads
+)
+from lead_snapshot import open_lead_store
+from lead_store import DEFAULT_DB_PATH, LazyListener
+from pagination import clamp_page_size, decode_cursor, encode_cursor, top_k_page_arrays
+from playbook_batch import stream_playbooks
+from readiness_scheduler import ReadinessScheduler
+from request_metrics import PROMETHEUS_CONTENT_TYPE, request_metrics
+from scoring_rules import rules_registry
+from sketches import TOP_K_CAPACITY
+from sort_index import SORT_FIELDS
+
+class LeadJSONProvider(DefaultJSONProvider):
+    """JSON provider that also serializes the store's read-only lead views"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Mapping):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
 
 app = Flask(__name__)
+app.json = LeadJSONProvider(app)
 CORS(app)
 
-class BusinessLeadIntelligence:
-    """Business-focused lead intelligence system that aligns with sales workflows"""
-    
-    def __init__(self):
-        self.industry_focus = ["SaaS", "FinTech", "HealthTech", "AI/ML", "Cybersecurity", "EdTech", "CleanTech"]
-        self.target_company_sizes = ["51-200", "101-200", "201-500", "501-1000"]  # Growth-stage companies
-        self.priority_roles = ["CTO", "CEO", "VP", "Head of", "Chief", "Director"]
-        self.ideal_tech_stack = ["React", "Node.js", "Python", "AWS", "Azure", "GCP", "PostgreSQL", "MongoDB"]
-        
-    def calculate_business_priority_score(self, lead: Dict[str, Any]) -> float:
-        """
-        Calculate business priority score based on strategic alignment
-        with target market and sales objectives
-        """
-        score = 0.0
-        
-        # Industry alignment (30%)
-        if lead.get('industry') in self.industry_focus:
-            score += 30
-        elif lead.get('industry'):
-            score += 10  # Partial credit for other tech industries
-        
-        # Company size targeting (25%)
-        company_size = lead.get('company_size', '')
-        if company_size in self.target_company_sizes:
-            if company_size in ["201-500", "501-1000"]:
-                score += 25  # Ideal targets
-            else:
-                score += 20  # Good targets
-        elif company_size:
-            score += 5
-        
-        # Role seniority and relevance (25%)
-        role = lead.get('role', '')
-        role_score = 0
-        for priority_role in self.priority_roles:
-            if priority_role.lower() in role.lower():
-                if priority_role in ["CTO", "CEO", "Chief"]:
-                    role_score = 25  # Decision makers
-                else:
-                    role_score = 20  # Influencers
-                break
-        score += role_score
-        
-        # Tech stack compatibility (20%)
-        tech_stack = lead.get('tech_stack', [])
-        compatible_tech = sum(1 for tech in tech_stack if tech in self.ideal_tech_stack)
-        if tech_stack:
-            tech_score = (compatible_tech / len(tech_stack)) * 20
-            score += tech_score
-        
-        return min(score, 100.0)
-    
-    def assess_sales_readiness(self, lead: Dict[str, Any]) -> Dict[str, Any]:
-        """Assess lead readiness for sales outreach"""
-        readiness = {
-            "stage": "cold",
-            "confidence": 0.0,
-            "recommended_approach": "",
-            "timing_priority": "medium"
-        }
-        
-        # Calculate confidence score
-        confidence_factors = []
-        
-        # Engagement level
-        engagement = lead.get('engagement_score', 0)
-        confidence_factors.append(engagement / 100.0)
-        
-        # Data completeness
-        complete_fields = sum(1 for field in ['email', 'role', 'company', 'industry'] if lead.get(field))
-        confidence_factors.append(complete_fields / 4.0)
-        
-        # Contact validity
-        if lead.get('email_valid'):
-            confidence_factors.append(1.0)
-        else:
-            confidence_factors.append(0.3)
-        
-        # Recent activity
-        if self._is_recent_activity(lead.get('last_activity')):
-            confidence_factors.append(0.8)
-        else:
-            confidence_factors.append(0.4)
-        
-        readiness["confidence"] = sum(confidence_factors) / len(confidence_factors)
-        
-        # Determine stage and approach
-        if readiness["confidence"] >= 0.8:
-            readiness["stage"] = "hot"
-            readiness["recommended_approach"] = "Immediate personalized outreach"
-            readiness["timing_priority"] = "high"
-        elif readiness["confidence"] >= 0.6:
-            readiness["stage"] = "warm"
-            readiness["recommended_approach"] = "Nurture sequence with value content"
-            readiness["timing_priority"] = "medium"
-        else:
-            readiness["stage"] = "cold"
-            readiness["recommended_approach"] = "Educational content and brand building"
-            readiness["timing_priority"] = "low"
-        
-        return readiness
-    
-    def _is_recent_activity(self, last_activity: str) -> bool:
-        """Check if lead activity is recent (within 30 days)"""
-        if not last_activity:
-            return False
-        
-        try:
-            activity_date = datetime.fromisoformat(last_activity.replace('Z', '+00:00'))
-            return (datetime.now() - activity_date).days <= 30
-        except:
-            return False
-    
-    def generate_sales_insights(self, lead: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate actionable sales insights for the lead"""
-        insights = {
-            "key_talking_points": [],
-            "potential_pain_points": [],
-            "value_proposition_focus": "",
-            "competitive_angle": ""
-        }
-        
-        industry = lead.get('industry', '')
-        role = lead.get('role', '')
-        tech_stack = lead.get('tech_stack', [])
-        company_size = lead.get('company_size', '')
-        
-        # Industry-specific insights
-        industry_insights = {
-            "SaaS": ["Scalability challenges", "Customer acquisition costs", "Subscription metrics"],
-            "FinTech": ["Regulatory compliance", "Security requirements", "Payment processing"],
-            "HealthTech": ["HIPAA compliance", "Data security", "Patient experience"],
-            "AI/ML": ["Model training costs", "Data infrastructure", "Talent acquisition"],
-            "Cybersecurity": ["Threat landscape", "Compliance requirements", "Incident response"],
-            "EdTech": ["User engagement", "Content delivery", "Platform scalability"],
-            "CleanTech": ["Sustainability goals", "Energy efficiency", "Regulatory incentives"]
-        }
-        
-        if industry in industry_insights:
-            insights["potential_pain_points"].extend(industry_insights[industry])
-        
-        # Role-specific talking points
-        role_talking_points = {
-            "CTO": ["Technical scalability", "Team productivity", "Infrastructure costs"],
-            "CEO": ["Revenue growth", "Market competition", "Operational efficiency"],
-            "VP": ["Team performance", "Budget management", "Strategic execution"],
-            "Head of": ["Department goals", "Resource allocation", "Cross-functional collaboration"],
-            "Director": ["Project delivery", "Team development", "Process improvement"]
-        }
-        
-        for role_key, points in role_talking_points.items():
-            if role_key.lower() in role.lower():
-                insights["key_talking_points"].extend(points)
-                break
-        
-        # Tech stack based value proposition
-        if any(tech in tech_stack for tech in ["AWS", "Azure", "GCP"]):
-            insights["value_proposition_focus"] = "Cloud optimization and cost savings"
-        elif any(tech in tech_stack for tech in ["React", "Vue.js", "Angular"]):
-            insights["value_proposition_focus"] = "Frontend performance and user experience"
-        elif any(tech in tech_stack for tech in ["Python", "Node.js", "Java"]):
-            insights["value_proposition_focus"] = "Backend scalability and development efficiency"
-        else:
-            insights["value_proposition_focus"] = "Overall technical efficiency and productivity"
-        
-        # Company size based competitive angle
-        if company_size in ["11-50", "51-200"]:
-            insights["competitive_angle"] = "Rapid growth and agility focus"
-        elif company_size in ["201-500", "501-1000"]:
-            insights["competitive_angle"] = "Enterprise scalability and reliability"
-        else:
-            insights["competitive_angle"] = "Market leadership and innovation"
-        
-        return insights
-
-class SalesWorkflowIntegrator:
-    """Integrate leads into existing sales workflows and processes"""
-    
-    def __init__(self):
-        self.workflow_stages = {
-            "prospecting": {"duration": "1-2 weeks", "activities": ["Initial outreach", "LinkedIn connection", "Email sequence"]},
-            "qualification": {"duration": "1 week", "activities": ["Discovery call", "Needs assessment", "BANT qualification"]},
-            "demonstration": {"duration": "2 weeks", "activities": ["Product demo", "Technical deep dive", "Use case validation"]},
-            "proposal": {"duration": "1-2 weeks", "activities": ["Solution design", "Proposal creation", "Stakeholder alignment"]},
-            "negotiation": {"duration": "1-3 weeks", "activities": ["Contract review", "Pricing negotiation", "Legal review"]}
-        }
-    
-    def create_sales_playbook(self, lead: Dict[str, Any]) -> Dict[str, Any]:
-        """Create personalized sales playbook for the lead"""
-        business_intel = BusinessLeadIntelligence()
-        readiness = business_intel.assess_sales_readiness(lead)
-        insights = business_intel.generate_sales_insights(lead)
-        
-        playbook = {
-            "lead_profile": {
-                "company": lead.get('company'),
-                "contact": lead.get('contact_name'),
-                "role": lead.get('role'),
-                "industry": lead.get('industry')
-            },
-            "readiness_assessment": readiness,
-            "outreach_strategy": self._define_outreach_strategy(lead, readiness, insights),
-            "timeline_projections": self._project_sales_timeline(readiness),
-            "success_metrics": self._define_success_metrics(lead)
-        }
-        
-        return playbook
-    
-    def _define_outreach_strategy(self, lead: Dict, readiness: Dict, insights: Dict) -> Dict[str, Any]:
-        """Define personalized outreach strategy"""
-        strategy = {
-            "first_touch": "",
-            "follow_up_sequence": [],
-            "channel_mix": [],
-            "personalization_elements": []
-        }
-        
-        # Determine first touch based on readiness
-        if readiness["stage"] == "hot":
-            strategy["first_touch"] = "Personalized video message or phone call"
-            strategy["channel_mix"] = ["Phone", "Email", "LinkedIn"]
-        elif readiness["stage"] == "warm":
-            strategy["first_touch"] = "Value-based email with industry insights"
-            strategy["channel_mix"] = ["Email", "LinkedIn", "Content marketing"]
-        else:
-            strategy["first_touch"] = "Educational content with soft CTA"
-            strategy["channel_mix"] = ["Content marketing", "Email", "Social media"]
-        
-        # Build follow-up sequence
-        follow_up_steps = []
-        if readiness["stage"] in ["hot", "warm"]:
-            follow_up_steps = [
-                "Day 2: Share relevant case study",
-                "Day 5: Industry insight or article",
-                "Day 10: Invitation to webinar or event",
-                "Day 15: Final value proposition"
-            ]
-        else:
-            follow_up_steps = [
-                "Week 1: Industry trends report",
-                "Week 3: Customer success story",
-                "Week 6: Product update or feature highlight",
-                "Week 9: Re-engagement offer"
-            ]
-        
-        strategy["follow_up_sequence"] = follow_up_steps
-        
-        # Personalization elements
-        personalization = []
-        if insights["key_talking_points"]:
-            personalization.append(f"Focus on {insights['key_talking_points'][0]}")
-        if insights["potential_pain_points"]:
-            personalization.append(f"Address {insights['potential_pain_points'][0]}")
-        if lead.get('tech_stack'):
-            personalization.append(f"Reference {lead['tech_stack'][0]} experience")
-        
-        strategy["personalization_elements"] = personalization
-        
-        return strategy
-    
-    def _project_sales_timeline(self, readiness: Dict) -> Dict[str, str]:
-        """Project sales timeline based on lead readiness"""
-        base_timeline = {
-            "prospecting": "1-2 weeks",
-            "qualification": "1-2 weeks", 
-            "demonstration": "2-3 weeks",
-            "proposal": "2-3 weeks",
-            "negotiation": "2-4 weeks"
-        }
-        
-        if readiness["stage"] == "hot":
-            # Accelerated timeline for hot leads
-            return {k: self._shorten_timeline(v) for k, v in base_timeline.items()}
-        elif readiness["stage"] == "cold":
-            # Extended timeline for cold leads
-            return {k: self._extend_timeline(v) for k, v in base_timeline.items()}
-        else:
-            return base_timeline
-    
-    def _shorten_timeline(self, timeline: str) -> str:
-        """Shorten timeline by 25%"""
-        parts = timeline.split('-')
-        if len(parts) == 2:
-            return f"{max(1, int(parts[0])-1)}-{int(parts[1])-1} {timeline.split()[-1]}"
-        return timeline
-    
-    def _extend_timeline(self, timeline: str) -> str:
-        """Extend timeline by 50%"""
-        parts = timeline.split('-')
-        if len(parts) == 2:
-            return f"{int(parts[0])+1}-{int(parts[1])+1} {timeline.split()[-1]}"
-        return timeline
-    
-    def _define_success_metrics(self, lead: Dict) -> Dict[str, Any]:
-        """Define success metrics for this lead"""
-        company_size = lead.get('company_size', '')
-        
-        # Different metrics based on company size
-        if company_size in ["201-500", "501-1000"]:
-            return {
-                "deal_size_target": "$50K - $150K ACV",
-                "sales_cycle_target": "60-90 days",
-                "conversion_probability": "25-40%",
-                "key_metrics": ["Executive sponsorship", "ROI calculation", "Competitive displacement"]
-            }
-        elif company_size in ["51-200", "101-200"]:
-            return {
-                "deal_size_target": "$25K - $75K ACV",
-                "sales_cycle_target": "45-75 days",
-                "conversion_probability": "35-50%",
-                "key_metrics": ["Department adoption", "User engagement", "Feature utilization"]
-            }
-        else:
-            return {
-                "deal_size_target": "$10K - $30K ACV",
-                "sales_cycle_target": "30-60 days",
-                "conversion_probability": "45-60%",
-                "key_metrics": ["Quick time-to-value", "Ease of implementation", "Immediate pain relief"]
-            }
-
-class LeadQualityOptimizer:
-    """Optimize lead quality and minimize irrelevant data"""
-    
-    def __init__(self):
-        self.quality_thresholds = {
-            "min_engagement_score": 50,
-            "min_data_completeness": 0.6,
-            "required_fields": ["company", "contact_name", "email", "role"]
-        }
-    
-    def assess_lead_quality(self, lead: Dict[str, Any]) -> Dict[str, Any]:
-        """Comprehensive lead quality assessment"""
-        quality = {
-            "overall_score": 0.0,
-            "data_completeness": 0.0,
-            "contact_accuracy": 0.0,
-            "strategic_fit": 0.0,
-            "actionability": 0.0,
-            "recommendation": "pursue"  # pursue, nurture, discard
-        }
-        
-        # Data completeness (25%)
-        complete_fields = sum(1 for field in self.quality_thresholds["required_fields"] if lead.get(field))
-        quality["data_completeness"] = complete_fields / len(self.quality_thresholds["required_fields"])
-        
-        # Contact accuracy (25%)
-        accuracy_score = 0.0
-        if lead.get('email_valid'):
-            accuracy_score += 0.5
-        if lead.get('linkedin_url'):
-            accuracy_score += 0.3
-        if self._validate_contact_name(lead.get('contact_name')):
-            accuracy_score += 0.2
-        quality["contact_accuracy"] = accuracy_score
-        
-        # Strategic fit (25%)
-        business_intel = BusinessLeadIntelligence()
-        quality["strategic_fit"] = business_intel.calculate_business_priority_score(lead) / 100.0
-        
-        # Actionability (25%)
-        action_score = 0.0
-        if lead.get('engagement_score', 0) >= self.quality_thresholds["min_engagement_score"]:
-            action_score += 0.4
-        if quality["data_completeness"] >= self.quality_thresholds["min_data_completeness"]:
-            action_score += 0.3
-        if quality["contact_accuracy"] >= 0.7:
-            action_score += 0.3
-        quality["actionability"] = action_score
-        
-        # Overall score
-        quality["overall_score"] = (
-            quality["data_completeness"] * 0.25 +
-            quality["contact_accuracy"] * 0.25 +
-            quality["strategic_fit"] * 0.25 +
-            quality["actionability"] * 0.25
-        )
-        
-        # Recommendation
-        if quality["overall_score"] >= 0.7:
-            quality["recommendation"] = "pursue"
-        elif quality["overall_score"] >= 0.5:
-            quality["recommendation"] = "nurture"
-        else:
-            quality["recommendation"] = "discard"
-        
-        return quality
-    
-    def _validate_contact_name(self, name: str) -> bool:
-        """Validate contact name format"""
-        if not name:
-            return False
-        # Check if name has at least two parts (first and last name)
-        name_parts = name.strip().split()
-        return len(name_parts) >= 2 and all(len(part) > 1 for part in name_parts)
-    
-    def filter_high_quality_leads(self, leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Filter leads to only high-quality, actionable prospects"""
-        high_quality_leads = []
-        
-        for lead in leads:
-            quality = self.assess_lead_quality(lead)
-            if quality["recommendation"] == "pursue":
-                lead['quality_assessment'] = quality
-                high_quality_leads.append(lead)
-        
-        return high_quality_leads
-
-# Initialize business intelligence components
-business_intel = BusinessLeadIntelligence()
-workflow_integrator = SalesWorkflowIntegrator()
-quality_optimizer = LeadQualityOptimizer()
-
 def load_mock_leads() -> List[Dict[str, Any]]:
-    """Load mock lead data with business context"""
-    base_leads = [
+    """Load mock lead data used to seed an empty lead store"""
+    return [
         {
             "id": 1,
             "company": "TechCorp Solutions",
@@ -589,228 +217,365 @@ def load_mock_leads() -> List[Dict[str, Any]]:
             "last_activity": "2025-09-30"
         }
     ]
-    
-    # Enhance leads with business intelligence
-    enhanced_leads = []
-    for lead in base_leads:
-        enhanced_lead = lead.copy()
-        # Add business priority score
-        enhanced_lead['business_priority_score'] = business_intel.calculate_business_priority_score(lead)
-        # Add sales readiness assessment
-        enhanced_lead['sales_readiness'] = business_intel.assess_sales_readiness(lead)
-        # Add quality assessment
-        enhanced_lead['quality_assessment'] = quality_optimizer.assess_lead_quality(lead)
-        
-        enhanced_leads.append(enhanced_lead)
-    
-    return enhanced_leads
 
-def calculate_lead_score(lead: Dict[str, Any]) -> int:
-    """
-    Enhanced lead scoring with business context
-    """
-    base_score = lead.get('engagement_score', 50)
+# Enrichment processes for /api/leads/import, forked before any thread starts or any lead is loaded
+ingest_pool = start_worker_pool()
 
-    role_scores = {
-        'CTO': 25, 'CEO': 25, 'CIO': 25,
-        'VP': 20, 'Head of': 20, 'Chief': 25,
-        'Director': 15, 'Manager': 10
-    }
+# Uploads are imported off the request path; any worker process can report on a job's progress
+import_jobs = ImportJobs()
 
-    for role_keyword, points in role_scores.items():
-        if role_keyword.lower() in lead.get('role', '').lower():
-            base_score += points
-            break
+# Lead repository: enrichment happens on write, endpoints only read
+lead_store = open_lead_store(DEFAULT_DB_PATH, enrich=request_metrics.timed('enrich', enrich_leads))
+if not len(lead_store):
+    lead_store.upsert_many(load_mock_leads())
 
-    size_scores = {
-        '501-1000': 15, '201-500': 12, '101-200': 10,
-        '51-200': 8, '11-50': 5
-    }
-    base_score += size_scores.get(lead.get('company_size', ''), 0)
+# Inverted indexes behind the /api/leads filters, maintained on every write
+lead_index = LeadIndex()
+lead_store.subscribe(lead_index.on_change)
 
-    funding_scores = {
-        'Series C': 15, 'Series B': 12, 'Series A': 10, 'Seed': 5
-    }
-    base_score += funding_scores.get(lead.get('funding_stage', ''), 0)
+# Analytics counters and running sums, built on first use and then maintained on every write
+lead_aggregates = LazyListener(lead_store, lambda: LeadAggregates(group_counts=not APPROXIMATE_ANALYTICS))
+
+# Mergeable fixed-memory sketches behind the `approximate=1` analytics, also built on first use
+lead_sketches = LazyListener(lead_store, lambda: LeadSketches(lead_store))
+
+# Leads enriched before readiness expiry was recorded need one re-enrichment to be scheduled
+lead_store.reenrich([lead['id'] for lead in lead_store.all() if 'recent_activity_until' not in lead])
+
+# Re-assesses sales readiness for the leads whose recent activity has just expired
+readiness_scheduler = ReadinessScheduler(lead_store)
 
-    if lead.get('email_valid'):
-        base_score += 10
+# Sequence-numbered inserts, updates and deletes behind /api/leads/changes
+lead_changes = ChangeLog(lead_store)
+lead_changes.start()
 
-    # Add business priority bonus (up to 20 points)
-    business_priority = lead.get('business_priority_score', 0)
-    business_bonus = int((business_priority / 100) * 20)
-    base_score += business_bonus
+# Validates emails off the request path; verdicts are written back, which re-scores the leads
+email_validator = EmailValidator(lead_store, resolver=RESOLVERS[RESOLVER_NAME])
 
-    return min(base_score, 100)
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response: Response) -> Response:
+    """Count the request and record its latency and payload size (streamed bodies once sent)"""
+    endpoint, method = request.endpoint or 'unmatched', request.method
+    started = g.get('request_started', time.perf_counter())
+    if response.is_streamed:
+        response.response = request_metrics.observe_stream(
+            response.response, endpoint, method, response.status_code, started
+        )
+    else:
+        request_metrics.observe_request(
+            endpoint, method, response.status_code, time.perf_counter() - started, response.content_length
+        )
+    return response
+
+@app.before_request
+def refresh_shared_state():
+    """Follow writes and rules reloads made by other worker processes (see gunicorn.conf.py)"""
+    if lead_store.refresh():
+        rules_registry.refresh()
+
+# Readiness flips and email validation, run by one worker process only
+background_jobs = BackgroundJobs(lead_store, readiness_scheduler, email_validator if VALIDATION_ENABLED else None,
+                                 refresh=refresh_shared_state)
+background_jobs.start()
+
+@app.before_request
+def claim_background_jobs():
+    """Take the background jobs over if the worker running them has exited"""
+    background_jobs.maybe_claim()
+
+# Per-lead JSON encodings reused across list responses, dropped on every write to the lead
+lead_fragments = FragmentCache(lambda obj: app.json.dumps(obj, separators=(',', ':')))
+lead_store.subscribe(lead_fragments.on_change)
+
+def json_bytes_response(obj: Dict[str, Any]) -> Response:
+    """Compact, key-sorted JSON response like jsonify(obj), embedding pre-encoded lead arrays"""
+    body = encode_object(obj, lambda value: app.json.dumps(value, separators=(',', ':')))
+    return Response(body + b'\n', mimetype=app.json.mimetype)
+
+# ETags and cached response bodies for read endpoints, keyed by dataset + rules version
+# (and sketch generation, since a sketch rebuild changes approximate analytics without a write)
+conditional_cache = ConditionalCache(lambda: f'{lead_store.version}:{rules_registry.current.version}:'
+                                             f'{lead_sketches.generation if lead_sketches.built else 0}')
+
+def request_lead_filters() -> Dict[str, Any]:
+    """LeadIndex filters from the /api/leads query parameters"""
+    high_quality_only = request.args.get('high_quality_only', type=bool, default=False)
+    return {
+        'tech_stack': request.args.get('tech_stack'),
+        'location': request.args.get('location'),
+        'company_size': request.args.get('company_size'),
+        'role': request.args.get('role'),
+        'industry': request.args.get('industry'),
+        # NEW: Filter for high-quality leads only if requested (assessed when the lead was stored)
+        'recommendation': 'pursue' if high_quality_only else None
+    }
 
 # Existing endpoints remain exactly the same for frontend compatibility
 @app.route('/api/leads', methods=['GET'])
+@conditional_cache
 def get_leads():
     """Get all leads with optional filtering - ENHANCED with business intelligence"""
-    leads = load_mock_leads()
-
-    tech_stack = request.args.get('tech_stack')
-    location = request.args.get('location')
-    company_size = request.args.get('company_size')
-    role = request.args.get('role')
-    industry = request.args.get('industry')
     min_score = request.args.get('min_score', type=int)
-    high_quality_only = request.args.get('high_quality_only', type=bool, default=False)
-
-    filtered_leads = leads
-
-    if tech_stack:
-        filtered_leads = [
-            lead for lead in filtered_leads
-            if tech_stack.lower() in [tech.lower() for tech in lead.get('tech_stack', [])]
-        ]
-
-    if location:
-        filtered_leads = [
-            lead for lead in filtered_leads
-            if location.lower() in lead.get('location', '').lower()
-        ]
-
-    if company_size:
-        filtered_leads = [
-            lead for lead in filtered_leads
-            if lead.get('company_size') == company_size
-        ]
-
-    if role:
-        filtered_leads = [
-            lead for lead in filtered_leads
-            if role.lower() in lead.get('role', '').lower()
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
+    sort_by = request.args.get('sort_by', 'score')
+    order = request.args.get('order', 'desc')
+    if sort_by not in SORT_FIELDS:
+        return jsonify({'error': f'Unsupported sort_by: {sort_by}'}), 400
+    if order not in ('asc', 'desc'):
+        return jsonify({'error': f'Unsupported order: {order}'}), 400
+
+    paginate = limit is not None or bool(cursor)
+    fragments_since = lead_fragments.changes
+
+    # Bitmap intersection over the inverted indexes instead of rescanning every lead
+    with request_metrics.stage('filter'):
+        matches = lead_index.match(min_score, **request_lead_filters())
+        total = matches.bit_count()
+    request_metrics.observe_result_size(total)
+
+    # Walk the maintained sort index; only the leads on the page are loaded
+    try:
+        with request_metrics.stage('sort'):
+            lead_ids, next_key = lead_index.sorted_page(
+                sort_by, order == 'desc', matches, clamp_page_size(limit) if paginate else None,
+                decode_cursor(cursor) if cursor else None
+            )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    with request_metrics.stage('load'):
+        leads = [lead_store.get(lead_id) for lead_id in lead_ids]
+
+    response = {'leads': lead_fragments.array(leads, fragments_since), 'total': total}
+    if paginate:
+        response['next_cursor'] = encode_cursor(next_key) if next_key else None
+    with request_metrics.stage('serialize'):
+        return json_bytes_response(response)
+
+@app.route('/api/leads/changes', methods=['GET'])
+def get_lead_changes():
+    """Leads inserted, updated or deleted after sequence number `since`
+
+    Clients keep the returned `seq` and pass it as `since` next time. With
+    `resync: true` the delta is unavailable (log compacted, or no `since`):
+    reload all leads via /api/leads and continue from the returned `seq`.
+    """
+    fragments_since = lead_fragments.changes
+    with request_metrics.stage('load'):
+        change_set = lead_changes.changes(request.args.get('since', type=int))
+    request_metrics.observe_result_size(len(change_set.upserts) + len(change_set.deletes))
+    with request_metrics.stage('serialize'):
+        return json_bytes_response({
+            'seq': change_set.seq,
+            'resync': change_set.resync,
+            'upserts': lead_fragments.array(change_set.upserts, fragments_since),
+            'deletes': change_set.deletes
+        })
+
+@app.route('/api/leads/search', methods=['GET'])
+@conditional_cache
+def search_leads():
+    """Typo-tolerant search over company, contact, role, industry and location
+
+    Takes the /api/leads filters, `min_score`, `limit` and `cursor`.
+    `sort=relevance` (default) ranks by relevance, then lead score;
+    `sort=score` uses the /api/leads order.
+    """
+    query = request.args.get('q', '')
+    sort = request.args.get('sort', 'relevance')
+    min_score = request.args.get('min_score', type=int)
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
+    if sort not in ('relevance', 'score'):
+        return jsonify({'error': f'Unsupported sort: {sort}'}), 400
+
+    with request_metrics.stage('search'):
+        lead_ids, relevance, scores = lead_index.search(query, **request_lead_filters())
+        lead_ids = np.array(lead_ids, dtype=np.int64)
+    if min_score:
+        with request_metrics.stage('score'):
+            matching = scores >= min_score
+            lead_ids, relevance, scores = lead_ids[matching], relevance[matching], scores[matching]
+    request_metrics.observe_result_size(len(lead_ids))
+
+    keys = [-relevance, -scores, lead_ids] if sort == 'relevance' else [-scores, lead_ids]
+    try:
+        with request_metrics.stage('sort'):
+            page, next_key = top_k_page_arrays(
+                keys, clamp_page_size(limit), decode_cursor(cursor) if cursor else None
+            )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    with request_metrics.stage('load'):
+        leads = [
+            {**lead_store.get(int(lead_ids[row])), 'search_relevance': float(relevance[row])}
+            for row in page.tolist()
         ]
+    with request_metrics.stage('serialize'):
+        return jsonify({
+            'leads': leads,
+            'total': len(lead_ids),
+            'next_cursor': encode_cursor(next_key) if next_key else None
+        })
+
+@app.route('/api/leads/import', methods=['POST'])
+def import_leads():
+    """Queue a bulk import of a CSV or JSONL upload (multipart `file` field or raw body)
+
+    Returns 202 with the job once the upload is received; GET
+    /api/leads/import/<job_id> reports its progress and outcome.
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        raw_stream, name, content_type = upload.stream, upload.filename or '', upload.mimetype
+    else:
+        raw_stream, name, content_type = request.stream, '', request.mimetype
 
-    if industry:
-        filtered_leads = [
-            lead for lead in filtered_leads
-            if industry.lower() in lead.get('industry', '').lower()
-        ]
+    fmt = request.args.get('format') or detect_format(name, content_type)
+    if fmt not in PARSERS:
+        return jsonify({'error': f'Unsupported format: {fmt}'}), 400
 
-    for lead in filtered_leads:
-        lead['score'] = calculate_lead_score(lead)
+    workers = request.args.get('workers', type=int) or SERVER_INGEST_WORKERS
 
-    if min_score:
-        filtered_leads = [lead for lead in filtered_leads if lead['score'] >= min_score]
+    def run(stream, fmt, progress):
+        with request_metrics.stage('ingest'):
+            return ingest(stream, fmt, lead_store, workers=workers, progress=progress, pool=ingest_pool)
 
-    # NEW: Filter for high-quality leads only if requested
-    if high_quality_only:
-        filtered_leads = quality_optimizer.filter_high_quality_leads(filtered_leads)
+    job = import_jobs.submit(raw_stream, fmt, run)
+    return jsonify(job), 202, {'Location': url_for('get_import_job', job_id=job['id'])}
 
-    filtered_leads.sort(key=lambda x: x['score'], reverse=True)
+@app.route('/api/leads/import/<job_id>', methods=['GET'])
+def get_import_job(job_id: str):
+    """Status and progress counters of an import started by POST /api/leads/import"""
+    job = import_jobs.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Import job not found'}), 404
+    return jsonify(job)
 
-    return jsonify({
-        'leads': filtered_leads,
-        'total': len(filtered_leads)
-    })
+def approximate_requested() -> bool:
+    return request.args.get('approximate', 'false').lower() in ('1', 'true', 'yes')
 
 @app.route('/api/analytics', methods=['GET'])
+@conditional_cache
 def get_analytics():
-    """Get analytics data - ENHANCED with business metrics"""
-    leads = load_mock_leads()
-
-    for lead in leads:
-        lead['score'] = calculate_lead_score(lead)
-
-    tech_stack_count = {}
-    for lead in leads:
-        for tech in lead.get('tech_stack', []):
-            tech_stack_count[tech] = tech_stack_count.get(tech, 0) + 1
-
-    top_technologies = sorted(
-        tech_stack_count.items(),
-        key=lambda x: x[1],
-        reverse=True
-    )[:5]
-
-    location_count = {}
-    for lead in leads:
-        location = lead.get('location', 'Unknown')
-        location_count[location] = location_count.get(location, 0) + 1
-
-    industry_count = {}
-    for lead in leads:
-        industry = lead.get('industry', 'Unknown')
-        industry_count[industry] = industry_count.get(industry, 0) + 1
-
-    valid_emails = sum(1 for lead in leads if lead.get('email_valid'))
-    avg_score = sum(lead['score'] for lead in leads) / len(leads) if leads else 0
-    high_quality_leads = sum(1 for lead in leads if lead['score'] >= 80)
-
-    # NEW: Business intelligence metrics
-    high_priority_leads = sum(1 for lead in leads if lead.get('business_priority_score', 0) >= 70)
-    sales_ready_leads = sum(1 for lead in leads if lead.get('sales_readiness', {}).get('stage') == 'hot')
-    quality_leads = sum(1 for lead in leads if lead.get('quality_assessment', {}).get('recommendation') == 'pursue')
+    """Get analytics data - ENHANCED with business metrics (served from maintained aggregates)
 
-    return jsonify({
-        'total_leads': len(leads),
-        'valid_emails': valid_emails,
-        'avg_score': round(avg_score, 1),
-        'high_quality_leads': high_quality_leads,
-        'high_priority_leads': high_priority_leads,
-        'sales_ready_leads': sales_ready_leads,
-        'quality_leads': quality_leads,
-        'top_technologies': [{'name': tech, 'count': count} for tech, count in top_technologies],
-        'locations': [{'name': loc, 'count': count} for loc, count in location_count.items()],
-        'industries': [{'name': ind, 'count': count} for ind, count in industry_count.items()]
-    })
+    With `approximate=1` (always under APPROXIMATE_ANALYTICS) the group
+    counts come from fixed-memory sketches: top-N locations and industries
+    (`top`, default 10), distinct counts and score percentiles.
+    """
+    with request_metrics.stage('aggregate'):
+        analytics = lead_aggregates.analytics()
+        if APPROXIMATE_ANALYTICS or approximate_requested():
+            # Sketches track at most TOP_K_CAPACITY candidates per group
+            top = max(1, min(request.args.get('top', 10, type=int), TOP_K_CAPACITY))
+            analytics.update(lead_sketches.analytics(top), score_percentiles=lead_sketches.percentiles(),
+                             approximate=True)
+    with request_metrics.stage('serialize'):
+        return jsonify(analytics)
+
+@app.route('/api/analytics/sketches', methods=['GET'])
+def get_analytics_sketches():
+    """This worker's analytics sketches, serialized
+
+    Sketches of shards with separate stores merge with LeadSketches.merge();
+    every worker of one store summarizes all of its leads, so theirs must
+    not be merged.
+    """
+    with request_metrics.stage('serialize'):
+        return jsonify(lead_sketches.to_dict())
+
+EXPORT_COLUMNS = [
+    'Company', 'Contact Name', 'Email', 'Role', 'Company Size',
+    'Location', 'Tech Stack', 'Industry', 'Funding Stage',
+    'Lead Score', 'Business Priority Score', 'Sales Readiness', 
+    'Quality Recommendation', 'LinkedIn URL', 'Last Activity'
+]
+
+# Rows written to the CSV buffer before a chunk is flushed to the client
+EXPORT_CHUNK_ROWS = 1000
+
+def export_row(lead: Dict[str, Any]) -> List[Any]:
+    """CSV row for one lead, in EXPORT_COLUMNS order"""
+    return [
+        lead.get('company', ''),
+        lead.get('contact_name', ''),
+        lead.get('email', ''),
+        lead.get('role', ''),
+        lead.get('company_size', ''),
+        lead.get('location', ''),
+        ', '.join(lead.get('tech_stack', [])),
+        lead.get('industry', ''),
+        lead.get('funding_stage', ''),
+        lead.get('score', 0),
+        lead.get('business_priority_score', 0),
+        lead.get('sales_readiness', {}).get('stage', ''),
+        lead.get('quality_assessment', {}).get('recommendation', ''),
+        lead.get('linkedin_url', ''),
+        lead.get('last_activity', '')
+    ]
+
+def iter_csv_chunks(leads: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Yield the export CSV in chunks of EXPORT_CHUNK_ROWS rows, reusing one small buffer"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(EXPORT_COLUMNS)
+
+    for count, lead in enumerate(leads, 1):
+        writer.writerow(export_row(lead))
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield output.getvalue().encode('utf-8')
+            output.seek(0)
+            output.truncate()
+
+    yield output.getvalue().encode('utf-8')
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Gzip-compress a stream of byte chunks incrementally"""
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
 
 @app.route('/api/export', methods=['POST'])
 def export_leads():
-    """Export filtered leads as CSV - ENHANCED with business fields"""
-    data = request.get_json()
-    lead_ids = data.get('lead_ids', [])
-
-    leads = load_mock_leads()
+    """Export filtered leads as CSV - streamed in chunks, optionally gzip-compressed"""
+    data = request.get_json(silent=True) or {}
+    lead_ids = data.get('lead_ids') or []
+    # "gzip" or true, from the body or the query string
+    compress = data.get('compress') or request.args.get('compress', '')
+    compress = compress is True or str(compress).lower() == 'gzip'
 
     if lead_ids:
-        leads = [lead for lead in leads if lead['id'] in lead_ids]
-
-    for lead in leads:
-        lead['score'] = calculate_lead_score(lead)
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    writer.writerow([
-        'Company', 'Contact Name', 'Email', 'Role', 'Company Size',
-        'Location', 'Tech Stack', 'Industry', 'Funding Stage',
-        'Lead Score', 'Business Priority Score', 'Sales Readiness', 
-        'Quality Recommendation', 'LinkedIn URL', 'Last Activity'
-    ])
-
-    for lead in leads:
-        writer.writerow([
-            lead.get('company', ''),
-            lead.get('contact_name', ''),
-            lead.get('email', ''),
-            lead.get('role', ''),
-            lead.get('company_size', ''),
-            lead.get('location', ''),
-            ', '.join(lead.get('tech_stack', [])),
-            lead.get('industry', ''),
-            lead.get('funding_stage', ''),
-            lead.get('score', 0),
-            lead.get('business_priority_score', 0),
-            lead.get('sales_readiness', {}).get('stage', ''),
-            lead.get('quality_assessment', {}).get('recommendation', ''),
-            lead.get('linkedin_url', ''),
-            lead.get('last_activity', '')
-        ])
-
-    output.seek(0)
-
-    return output.getvalue(), 200, {
-        'Content-Type': 'text/csv',
-        'Content-Disposition': f'attachment; filename=leads_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-    }
+        # Requested leads in request order, looked up by id instead of scanning the store
+        leads = (lead for lead in map(lead_store.get, dict.fromkeys(i for i in lead_ids if isinstance(i, int)))
+                 if lead is not None)
+    else:
+        leads = lead_store.all()
+
+    chunks = iter_csv_chunks(leads)
+    filename = f'leads_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    if compress:
+        chunks = gzip_chunks(chunks)
+        filename += '.gz'
+
+    return Response(chunks, 200, {
+        'Content-Type': 'application/gzip' if compress else 'text/csv',
+        'Content-Disposition': f'attachment; filename={filename}'
+    })
 
 @app.route('/api/filters/options', methods=['GET'])
+@conditional_cache
 def get_filter_options():
     """Get available filter options"""
-    leads = load_mock_leads()
+    leads = lead_store.all()
 
     tech_stacks = set()
     locations = set()
@@ -818,13 +583,14 @@ def get_filter_options():
     roles = set()
     industries = set()
 
-    for lead in leads:
-        for tech in lead.get('tech_stack', []):
-            tech_stacks.add(tech)
-        locations.add(lead.get('location', ''))
-        company_sizes.add(lead.get('company_size', ''))
-        roles.add(lead.get('role', ''))
-        industries.add(lead.get('industry', ''))
+    with request_metrics.stage('aggregate'):
+        for lead in leads:
+            for tech in lead.get('tech_stack', []):
+                tech_stacks.add(tech)
+            locations.add(lead.get('location', ''))
+            company_sizes.add(lead.get('company_size', ''))
+            roles.add(lead.get('role', ''))
+            industries.add(lead.get('industry', ''))
 
     return jsonify({
         'tech_stacks': sorted(list(tech_stacks)),
@@ -834,106 +600,161 @@ def get_filter_options():
         'industries': sorted(list(industries))
     })
 
+# /api/leads/facets fields, named like the /api/filters/options lists
+FACET_FIELDS = {
+    'tech_stack': 'tech_stacks',
+    'location': 'locations',
+    'company_size': 'company_sizes',
+    'role': 'roles',
+    'industry': 'industries',
+    'recommendation': 'recommendations'
+}
+
+@app.route('/api/leads/facets', methods=['GET'])
+@conditional_cache
+def get_lead_facets():
+    """Filter options with live lead counts for the current /api/leads filters
+
+    Each facet's counts apply every other filter (and `min_score`), so
+    they show how many leads selecting that value would return.
+    """
+    with request_metrics.stage('aggregate'):
+        total, facets = lead_index.facets(
+            FACET_FIELDS, min_score=request.args.get('min_score', type=int), **request_lead_filters()
+        )
+    with request_metrics.stage('serialize'):
+        return jsonify({
+            'total': total,
+            'facets': {
+                FACET_FIELDS[field]: [{'value': value, 'count': count} for value, count in counts]
+                for field, counts in facets.items()
+            }
+        })
+
+@app.route('/api/admin/scoring-rules/reload', methods=['POST'])
+def reload_scoring_rules():
+    """Hot-reload scoring_rules.json and re-score every lead with the new rules"""
+    try:
+        rules = rules_registry.reload()
+    except (OSError, ValueError) as e:
+        return jsonify({'error': f'Failed to load scoring rules: {e}'}), 400
+
+    rescored = lead_store.reenrich()
+
+    return jsonify({
+        'version': rules.version,
+        'rescored_leads': rescored
+    })
+
+@app.route('/api/admin/dedupe', methods=['POST'])
+def dedupe_leads():
+    """Merge duplicate leads into their best-scoring record (`dry_run=1` only reports the groups)"""
+    dry_run = request.args.get('dry_run', 'false').lower() in ('1', 'true', 'yes')
+    with request_metrics.stage('dedupe'):
+        report = dedupe(lead_store, dry_run=dry_run)
+    return jsonify(report.to_dict())
+
+@app.route('/api/admin/validate-emails', methods=['POST'])
+def validate_emails():
+    """Queue leads (`lead_ids`, default all) for email validation, e.g. after the domain lists changed"""
+    if not VALIDATION_ENABLED:
+        return jsonify({'error': 'Email validation is disabled (EMAIL_VALIDATION=0)'}), 400
+    lead_ids = (request.get_json(silent=True) or {}).get('lead_ids')
+    if lead_ids is not None and not (isinstance(lead_ids, list) and all(isinstance(i, int) for i in lead_ids)):
+        return jsonify({'error': 'lead_ids must be a list of integers'}), 400
+    queued = email_validator.revalidate(lead_ids)
+    return jsonify({'queued': queued, **email_validator.stats()}), 202
+
 # NEW: Business intelligence endpoints
 @app.route('/api/business/priority-leads', methods=['GET'])
+@conditional_cache
 def get_priority_leads():
     """Get high-priority leads based on business alignment"""
-    leads = load_mock_leads()
+    fragments_since = lead_fragments.changes
+    leads = lead_store.all()
     
     # Filter for high business priority
-    priority_leads = [lead for lead in leads if lead.get('business_priority_score', 0) >= 70]
-    priority_leads.sort(key=lambda x: x['business_priority_score'], reverse=True)
+    with request_metrics.stage('filter'):
+        priority_leads = [lead for lead in leads if lead.get('business_priority_score', 0) >= 70]
+    request_metrics.observe_result_size(len(priority_leads))
+    with request_metrics.stage('sort'):
+        priority_leads.sort(key=lambda x: x['business_priority_score'], reverse=True)
     
-    return jsonify({
-        'priority_leads': priority_leads,
-        'total': len(priority_leads),
-        'avg_business_score': round(sum(lead.get('business_priority_score', 0) for lead in priority_leads) / len(priority_leads), 1) if priority_leads else 0
-    })
+    with request_metrics.stage('serialize'):
+        return json_bytes_response({
+            'priority_leads': lead_fragments.array(priority_leads, fragments_since),
+            'total': len(priority_leads),
+            'avg_business_score': round(sum(lead.get('business_priority_score', 0) for lead in priority_leads) / len(priority_leads), 1) if priority_leads else 0
+        })
 
 @app.route('/api/business/sales-playbook/<int:lead_id>', methods=['GET'])
 def get_sales_playbook(lead_id):
     """Get sales playbook for a specific lead"""
-    leads = load_mock_leads()
-    lead = next((l for l in leads if l['id'] == lead_id), None)
+    lead = lead_store.get(lead_id)
     
     if not lead:
         return jsonify({'error': 'Lead not found'}), 404
     
-    playbook = workflow_integrator.create_sales_playbook(lead)
+    with request_metrics.stage('playbook'):
+        playbook = workflow_integrator.create_sales_playbook(lead)
     
     return jsonify({
         'lead_id': lead_id,
         'playbook': playbook
     })
 
+@app.route('/api/business/sales-playbooks', methods=['POST'])
+def batch_sales_playbooks():
+    """Stream sales playbooks for many leads as NDJSON, one {"lead_id", "playbook"} record per line
+
+    Takes `lead_ids` in the JSON body, or else the /api/leads filters and
+    `min_score` as query parameters (no filters: every lead). Records
+    arrive as the import pool's processes finish them, not in request
+    order; unknown ids get a {"lead_id", "error"} record.
+    """
+    data = request.get_json(silent=True) or {}
+    lead_ids = data.get('lead_ids')
+
+    if lead_ids is None:
+        min_score = request.args.get('min_score', type=int)
+        with request_metrics.stage('filter'):
+            lead_ids = lead_index.filter(**request_lead_filters())
+            if min_score:
+                lead_ids = [lead_id for lead_id in lead_ids if lead_store.get(lead_id)['score'] >= min_score]
+    elif not isinstance(lead_ids, list) or not all(isinstance(lead_id, int) for lead_id in lead_ids):
+        return jsonify({'error': 'lead_ids must be a list of integers'}), 400
+    else:
+        lead_ids = list(dict.fromkeys(lead_ids))
+    request_metrics.observe_result_size(len(lead_ids))
+
+    workers = min(request.args.get('workers', type=int) or SERVER_INGEST_WORKERS, SERVER_INGEST_WORKERS)
+    records = stream_playbooks(lead_store, lead_ids, pool=ingest_pool, workers=workers)
+    return Response(records, mimetype='application/x-ndjson')
+
 @app.route('/api/business/quality-report', methods=['GET'])
+@conditional_cache
 def get_quality_report():
-    """Get comprehensive lead quality report"""
-    leads = load_mock_leads()
-    
-    quality_distribution = {
-        'pursue': 0,
-        'nurture': 0,
-        'discard': 0
-    }
-    
-    quality_scores = []
-    business_scores = []
-    
-    for lead in leads:
-        recommendation = lead.get('quality_assessment', {}).get('recommendation', 'discard')
-        quality_distribution[recommendation] += 1
-        quality_scores.append(lead.get('quality_assessment', {}).get('overall_score', 0))
-        business_scores.append(lead.get('business_priority_score', 0))
-    
-    return jsonify({
-        'quality_distribution': quality_distribution,
-        'avg_quality_score': round(sum(quality_scores) / len(quality_scores), 2) if quality_scores else 0,
-        'avg_business_score': round(sum(business_scores) / len(business_scores), 1) if business_scores else 0,
-        'actionable_leads_count': quality_distribution['pursue'],
-        'actionable_percentage': round((quality_distribution['pursue'] / len(leads)) * 100, 1) if leads else 0
-    })
+    """Get comprehensive lead quality report (`approximate=1` adds score percentiles)"""
+    with request_metrics.stage('aggregate'):
+        report = lead_aggregates.quality_report()
+        if approximate_requested():
+            report.update(score_percentiles=lead_sketches.percentiles(), approximate=True)
+    with request_metrics.stage('serialize'):
+        return jsonify(report)
 
 @app.route('/api/business/industry-insights', methods=['GET'])
+@conditional_cache
 def get_industry_insights():
     """Get insights by industry"""
-    leads = load_mock_leads()
-    
-    industry_metrics = {}
-    
-    for lead in leads:
-        industry = lead.get('industry', 'Unknown')
-        if industry not in industry_metrics:
-            industry_metrics[industry] = {
-                'count': 0,
-                'avg_score': 0,
-                'avg_business_priority': 0,
-                'high_quality_count': 0
-            }
-        
-        metrics = industry_metrics[industry]
-        metrics['count'] += 1
-        metrics['avg_score'] += lead.get('score', 0)
-        metrics['avg_business_priority'] += lead.get('business_priority_score', 0)
-        
-        if lead.get('quality_assessment', {}).get('recommendation') == 'pursue':
-            metrics['high_quality_count'] += 1
-    
-    # Calculate averages
-    for industry, metrics in industry_metrics.items():
-        if metrics['count'] > 0:
-            metrics['avg_score'] = round(metrics['avg_score'] / metrics['count'], 1)
-            metrics['avg_business_priority'] = round(metrics['avg_business_priority'] / metrics['count'], 1)
-            metrics['high_quality_percentage'] = round((metrics['high_quality_count'] / metrics['count']) * 100, 1)
-    
-    return jsonify({
-        'industry_insights': industry_metrics,
-        'top_industries': sorted(
-            industry_metrics.items(),
-            key=lambda x: x[1]['high_quality_count'],
-            reverse=True
-        )[:5]
-    })
+    with request_metrics.stage('aggregate'):
+        insights = lead_aggregates.industry_insights()
+    with request_metrics.stage('serialize'):
+        return jsonify(insights)
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Request, payload, result-set and per-stage metrics in the Prometheus text format"""
+    return Response(request_metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,66 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# How often the owning process follows other processes' writes and runs due readiness flips
+JOB_INTERVAL = 1.0
+
+# How often the other processes try to take the jobs over, e.g. after the owner exited
+CLAIM_INTERVAL = 5.0
+
+
+class BackgroundJobs:
+    """Runs the store's background jobs (readiness flips, email validation) in one process
+
+    `start()` only starts the jobs if this process claims them
+    (LeadStore.claim_background_jobs), so worker processes sharing a
+    snapshot do not each subscribe, validate and re-enrich the same leads.
+    The others call `maybe_claim()` on the request path and take over once
+    the owner is gone. The owner's thread calls `refresh` every `interval`
+    seconds, so it follows writes made by other processes even when it
+    serves no requests, and runs the readiness flips that fell due.
+    """
+
+    def __init__(self, store, scheduler, validator=None, refresh: Optional[Callable[[], object]] = None,
+                 interval: float = JOB_INTERVAL, claim_interval: float = CLAIM_INTERVAL):
+        self.store = store
+        self.scheduler = scheduler
+        self.validator = validator
+        self.refresh = refresh or store.refresh
+        self.interval = interval
+        self.claim_interval = claim_interval
+        self.running = False
+        self._lock = threading.Lock()
+        self._next_claim = 0.0
+
+    def start(self) -> bool:
+        """Start the jobs if this process can claim them; returns whether it runs them"""
+        with self._lock:
+            if self.running or not self.store.claim_background_jobs():
+                return self.running
+            self.store.subscribe(self.scheduler.on_change)
+            if self.validator is not None:
+                self.validator.start()
+            threading.Thread(target=self._run, name='background-jobs', daemon=True).start()
+            self.running = True
+        return True
+
+    def maybe_claim(self):
+        """start() at most once per claim_interval; cheap enough to call on every request"""
+        now = time.monotonic()
+        if self.running or now < self._next_claim:
+            return
+        self._next_claim = now + self.claim_interval
+        self.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+                self.scheduler.run_due()
+            except Exception:
+                logger.exception('Background jobs failed')
+            time.sleep(self.interval)
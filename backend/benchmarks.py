@@ -0,0 +1,282 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from synthetic_leads import generate_leads
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_REPEAT = 5
+DEFAULT_SEED = 42
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# Allowed slowdown against the baseline before a benchmark counts as a regression
+DEFAULT_TOLERANCE = 0.20
+
+# Leads written per upsert_many() call while loading, as lead_ingest does
+LOAD_BATCH_SIZE = 5000
+
+# Leads sent per POST /api/leads/import request
+IMPORT_BATCH_SIZE = 1000
+
+
+class RouteBench(NamedTuple):
+    """One request pattern; `body` builds the test client kwargs for the n-th call"""
+    name: str
+    method: str
+    path: str
+    body: Optional[Callable[[int, int], Dict[str, Any]]] = None
+    # Requests that rework the whole dataset run once, without warm calls
+    once: bool = False
+
+
+def _lead_ids_body(size: int, call: int) -> Dict[str, Any]:
+    return {'json': {'lead_ids': list(range(1, min(size, 1000) + 1))}}
+
+
+def _import_body(size: int, call: int) -> Dict[str, Any]:
+    # New ids on every call, so each request really imports and enriches its leads
+    leads = generate_leads(IMPORT_BATCH_SIZE, seed=call, start_id=size + 1 + call * IMPORT_BATCH_SIZE)
+    return {
+        'data': ''.join(json.dumps(lead) + '\n' for lead in leads).encode(),
+        'content_type': 'application/x-ndjson'
+    }
+
+
+def _changes_query(size: int, call: int) -> Dict[str, Any]:
+    # The changes since the write before last: one imported batch
+    from app import lead_store
+    return {'query_string': {'since': lead_store.version - 1}}
+
+
+# Read endpoints first: the writes at the end change the dataset and invalidate response caches
+ROUTE_BENCHES = (
+    RouteBench('GET /api/leads?limit=50', 'get', '/api/leads?limit=50'),
+    RouteBench('GET /api/leads (filtered)', 'get', '/api/leads?tech_stack=React&industry=SaaS&min_score=70'),
+    RouteBench('GET /api/leads/search', 'get', '/api/leads/search?q=sarah%20jonson'),
+    RouteBench('GET /api/leads/facets', 'get', '/api/leads/facets?tech_stack=React&min_score=70'),
+    RouteBench('GET /api/analytics', 'get', '/api/analytics'),
+    RouteBench('GET /api/analytics?approximate=1', 'get', '/api/analytics?approximate=1'),
+    RouteBench('GET /api/analytics/sketches', 'get', '/api/analytics/sketches'),
+    RouteBench('POST /api/export', 'post', '/api/export', _lead_ids_body),
+    RouteBench('GET /api/filters/options', 'get', '/api/filters/options'),
+    RouteBench('GET /api/business/priority-leads', 'get', '/api/business/priority-leads'),
+    RouteBench('GET /api/business/sales-playbook/<id>', 'get', '/api/business/sales-playbook/1'),
+    RouteBench('POST /api/business/sales-playbooks', 'post', '/api/business/sales-playbooks', _lead_ids_body),
+    RouteBench('GET /api/business/quality-report', 'get', '/api/business/quality-report'),
+    RouteBench('GET /api/business/industry-insights', 'get', '/api/business/industry-insights'),
+    # The unpaginated list encodes every lead, beyond what the fragment cache holds at 1M leads
+    RouteBench('GET /api/leads (all)', 'get', '/api/leads', once=True),
+    RouteBench('GET /metrics', 'get', '/metrics'),
+    RouteBench('POST /api/leads/import', 'post', '/api/leads/import?format=jsonl', _import_body),
+    RouteBench('GET /api/leads/changes', 'get', '/api/leads/changes', _changes_query),
+    RouteBench('POST /api/admin/dedupe', 'post', '/api/admin/dedupe?dry_run=1', once=True),
+    RouteBench('POST /api/admin/scoring-rules/reload', 'post', '/api/admin/scoring-rules/reload', once=True),
+)
+
+
+def _batches(items: Iterable[Any], size: int) -> Iterable[List[Any]]:
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+def _per_lead_stats(seconds: List[float], count: int) -> Dict[str, float]:
+    best = min(seconds)
+    return {
+        'us_per_lead': round(best / count * 1e6, 3),
+        'leads_per_sec': round(count / best, 1),
+        'median_s': round(statistics.median(seconds), 4)
+    }
+
+
+def _latency_stats(cold: float, warm: List[float]) -> Dict[str, float]:
+    stats = {'cold_ms': round(cold * 1000, 3)}
+    if warm:
+        ordered = sorted(warm)
+        stats['p50_ms'] = round(statistics.median(ordered) * 1000, 3)
+        stats['p95_ms'] = round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3)
+    return stats
+
+
+def run_size(size: int, repeat: int, seed: int) -> Dict[str, Dict[str, float]]:
+    """Benchmark scoring functions and every route against a fresh store of `size` synthetic leads
+
+    Runs in its own process: the app binds its lead store at import time, so
+    the temporary database must be configured before app is imported.
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['LEADS_DB_PATH'] = os.path.join(tmp, 'leads.db')
+        os.environ.pop('LEADS_SNAPSHOT_PATH', None)
+        # Background validation would rewrite every synthetic lead while the routes are timed
+        os.environ['EMAIL_VALIDATION'] = '0'
+
+        from lead_intelligence import (
+            business_intel, calculate_lead_score, enrich_leads, quality_optimizer, workflow_integrator
+        )
+        from lead_store import LeadStore
+
+        store = LeadStore(os.environ['LEADS_DB_PATH'], enrich=enrich_leads)
+        started = time.perf_counter()
+        for batch in _batches(generate_leads(size, seed=seed), LOAD_BATCH_SIZE):
+            store.upsert_many(batch)
+        results['LeadStore.upsert_many'] = _per_lead_stats([time.perf_counter() - started], size)
+        del store
+
+        started = time.perf_counter()
+        from app import app, import_jobs, ingest_pool, lead_store
+        results['app startup'] = {'load_s': round(time.perf_counter() - started, 3)}
+
+        # The leads as endpoints see them: enriched rows straight from the store
+        leads = list(lead_store.all())
+        functions = {
+            'calculate_business_priority_score': business_intel.calculate_business_priority_score,
+            'calculate_lead_score': calculate_lead_score,
+            'assess_lead_quality': quality_optimizer.assess_lead_quality,
+            'create_sales_playbook': workflow_integrator.create_sales_playbook
+        }
+        for name, function in functions.items():
+            seconds = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                for lead in leads:
+                    function(lead)
+                seconds.append(time.perf_counter() - started)
+            results[name] = _per_lead_stats(seconds, len(leads))
+        del leads
+
+        client = app.test_client()
+        for bench in ROUTE_BENCHES:
+            timings = []
+            for call in range(1 if bench.once else repeat + 1):
+                kwargs = bench.body(size, call) if bench.body else {}
+                started = time.perf_counter()
+                response = getattr(client, bench.method)(bench.path, **kwargs)
+                response.get_data()
+                if response.status_code == 202:
+                    # Background jobs (imports) are timed until they finish
+                    job = import_jobs.wait(response.get_json()['id'])
+                    if job['status'] != 'done':
+                        raise RuntimeError(f'{bench.name} job ended {job["status"]}: {job.get("error")}')
+                timings.append(time.perf_counter() - started)
+                if response.status_code not in (200, 202):
+                    raise RuntimeError(f'{bench.name} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+            results[bench.name] = _latency_stats(timings[0], timings[1:])
+        # The process cannot exit while the app's import pool is running
+        ingest_pool.shutdown()
+    return results
+
+
+def run(sizes: Iterable[int], repeat: int, seed: int) -> Dict[str, Any]:
+    """Benchmark every size, each in a fresh process so sizes do not share caches or memory"""
+    context = multiprocessing.get_context('spawn')
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': f'{platform.system()} {platform.machine()}',
+            'cpus': os.cpu_count(),
+            'seed': seed,
+            'repeat': repeat
+        },
+        'results': {}
+    }
+    for size in sizes:
+        print(f'Benchmarking {size} leads...', file=sys.stderr)
+        # An executor process, unlike a Pool worker, is not daemonic, so the app can start its import pool
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            report['results'][str(size)] = executor.submit(run_size, size, repeat, seed).result()
+    return report
+
+
+# Lower is better for these metrics; leads_per_sec and median_s are informational
+COMPARED_METRICS = ('us_per_lead', 'load_s', 'cold_ms', 'p50_ms', 'p95_ms')
+
+# Latency differences below this are timer and GC noise, never regressions
+MIN_REGRESSION_MS = 2.0
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Rows comparing every metric present in both reports, flagging slowdowns beyond tolerance"""
+    rows = []
+    for size, benches in current['results'].items():
+        for bench, metrics in benches.items():
+            baseline_metrics = baseline['results'].get(size, {}).get(bench, {})
+            for metric in COMPARED_METRICS:
+                if metric not in metrics or not baseline_metrics.get(metric):
+                    continue
+                change = metrics[metric] / baseline_metrics[metric] - 1
+                noise = metric.endswith('_ms') and metrics[metric] - baseline_metrics[metric] < MIN_REGRESSION_MS
+                rows.append({
+                    'size': size, 'bench': bench, 'metric': metric,
+                    'baseline': baseline_metrics[metric], 'current': metrics[metric],
+                    'change': change, 'regression': change > tolerance and not noise
+                })
+    return rows
+
+
+def print_report(report: Dict[str, Any]):
+    for size, benches in report['results'].items():
+        print(f'\n{size} leads')
+        for bench, metrics in benches.items():
+            print(f'  {bench:<44} ' + '  '.join(f'{metric}={value}' for metric, value in metrics.items()))
+
+
+def print_comparison(rows: List[Dict[str, Any]]):
+    print(f"\n{'size':>8}  {'benchmark':<44} {'metric':<12} {'baseline':>12} {'current':>12} {'change':>8}")
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['size']:>8}  {row['bench']:<44} {row['metric']:<12} {row['baseline']:>12} "
+              f"{row['current']:>12} {row['change']:>+8.1%}{flag}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark lead scoring and API routes on synthetic leads')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma-separated lead counts (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='timed runs per benchmark')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='synthetic data seed')
+    parser.add_argument('--save', nargs='?', const=DEFAULT_BASELINE_PATH, default=None, metavar='PATH',
+                        help='save the results as the baseline')
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE_PATH, default=None, metavar='PATH',
+                        help='compare against a saved baseline; exits 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed slowdown before a regression is reported (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    report = run(sizes, max(args.repeat, 1), args.seed)
+    print_report(report)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'\nSaved baseline to {args.save}', file=sys.stderr)
+
+    if baseline is not None:
+        rows = compare(baseline, report, args.tolerance)
+        print_comparison(rows)
+        regressions = sum(row['regression'] for row in rows)
+        if regressions:
+            print(f'\n{regressions} regression(s) beyond {args.tolerance:.0%}', file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
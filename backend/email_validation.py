@@ -0,0 +1,290 @@
+import logging
+import os
+import queue
+import re
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from caching import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Set EMAIL_VALIDATION=0 to keep the imported email_valid flags as the only signal
+VALIDATION_ENABLED = os.environ.get('EMAIL_VALIDATION', '1') == '1'
+
+# Domain lookups: 'dns' (system resolver) or 'none' (syntax and bundled lists only, nothing leaves the machine)
+RESOLVER_NAME = os.environ.get('EMAIL_RESOLVER', 'dns')
+
+# Leads validated and written back per batch
+VALIDATION_BATCH_SIZE = 1000
+
+# Per-domain verdicts are cached; domains that did not resolve are retried sooner
+DOMAIN_CACHE_SIZE = 500_000
+DOMAIN_CACHE_TTL = 24 * 3600
+NEGATIVE_DOMAIN_CACHE_TTL = 3600
+
+# Concurrent resolver calls; lookups wait on the network, not the CPU
+LOOKUP_WORKERS = 16
+
+VALID = 'valid'
+MISSING = 'missing'
+INVALID_SYNTAX = 'invalid_syntax'
+DISPOSABLE = 'disposable'
+ROLE_ADDRESS = 'role_address'
+UNRESOLVABLE = 'unresolvable'
+
+# Throwaway mailbox providers; subdomains are matched too
+DISPOSABLE_DOMAINS = frozenset({
+    '10minutemail.com', '20minutemail.com', 'discard.email', 'dispostable.com', 'emailondeck.com',
+    'fakeinbox.com', 'getairmail.com', 'getnada.com', 'guerrillamail.biz', 'guerrillamail.com',
+    'guerrillamail.de', 'guerrillamail.net', 'guerrillamail.org', 'guerrillamailblock.com', 'harakirimail.com',
+    'inboxbear.com', 'incognitomail.org', 'jetable.org', 'mailcatch.com', 'maildrop.cc', 'mailinator.com',
+    'mailinator.net', 'mailnesia.com', 'mintemail.com', 'mohmal.com', 'moakt.com', 'mytemp.email',
+    'sharklasers.com', 'spam4.me', 'spamgourmet.com', 'temp-mail.org', 'tempail.com', 'tempmail.com',
+    'tempmail.net', 'tempmailo.com', 'tempr.email', 'throwawaymail.com', 'trashmail.com', 'trashmail.de',
+    'yopmail.com', 'yopmail.fr', 'yopmail.net'
+})
+
+# Shared team mailboxes: deliverable, but not a contact person to sell to
+ROLE_LOCAL_PARTS = frozenset({
+    'admin', 'administrator', 'billing', 'careers', 'contact', 'enquiries', 'feedback', 'hello', 'help',
+    'hostmaster', 'hr', 'info', 'inquiries', 'jobs', 'legal', 'mail', 'marketing', 'media', 'no-reply',
+    'noreply', 'office', 'postmaster', 'press', 'privacy', 'sales', 'security', 'support', 'team', 'webmaster'
+})
+
+_LOCAL_RE = re.compile(r"[a-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[a-z0-9!#$%&'*+/=?^_`{|}~-]+)*")
+_DOMAIN_RE = re.compile(r'(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+(?:[a-z]{2,63}|xn--[a-z0-9-]{1,59})')
+
+# A resolver returns whether a domain can receive mail, and raises OSError when it cannot tell
+Resolver = Callable[[str], bool]
+
+
+def normalize_address(email: Any) -> str:
+    """Trimmed, lowercased address with an ASCII (IDNA) domain; '' when there is none"""
+    email = str(email or '').strip().lower()
+    if email.startswith('mailto:'):
+        email = email[len('mailto:'):]
+    local, at, domain = email.rpartition('@')
+    if not at:
+        return email
+    domain = domain.rstrip('.')
+    if not domain.isascii():
+        try:
+            domain = domain.encode('idna').decode('ascii')
+        except UnicodeError:
+            pass
+    return f'{local}@{domain}'
+
+
+def is_valid_syntax(address: str) -> bool:
+    """Dot-atom local part and hostname domain, within the RFC 5321 length limits"""
+    local, at, domain = address.rpartition('@')
+    return (bool(at) and len(address) <= 254 and len(local) <= 64
+            and _LOCAL_RE.fullmatch(local) is not None and _DOMAIN_RE.fullmatch(domain) is not None)
+
+
+def is_disposable(domain: str) -> bool:
+    labels = domain.split('.')
+    return any('.'.join(labels[start:]) in DISPOSABLE_DOMAINS for start in range(len(labels) - 1))
+
+
+def local_status(address: str) -> Optional[str]:
+    """Status decided without a domain lookup, or None when the domain still has to be resolved"""
+    if not address:
+        return MISSING
+    if not is_valid_syntax(address):
+        return INVALID_SYNTAX
+    local, _, domain = address.rpartition('@')
+    if is_disposable(domain):
+        return DISPOSABLE
+    if local.partition('+')[0] in ROLE_LOCAL_PARTS:
+        return ROLE_ADDRESS
+    return None
+
+
+def dns_resolver(domain: str) -> bool:
+    """Whether the system resolver has address records for the domain
+
+    The standard library cannot query MX records, so this checks A/AAAA
+    records, which mail delivery falls back to when there is no MX.
+    """
+    try:
+        socket.getaddrinfo(domain, None)
+    except socket.gaierror as e:
+        if e.errno in (socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)):
+            return False
+        raise
+    return True
+
+
+class StaticResolver:
+    """Resolver answering from a fixed set of domains, for tests and offline runs"""
+
+    def __init__(self, domains: Iterable[str]):
+        self.domains = frozenset(domain.lower() for domain in domains)
+        self.calls = 0
+
+    def __call__(self, domain: str) -> bool:
+        self.calls += 1
+        return domain in self.domains
+
+
+RESOLVERS: Dict[str, Optional[Resolver]] = {'none': None, 'dns': dns_resolver}
+
+
+def needs_validation(lead: Mapping[str, Any]) -> bool:
+    """Whether the lead's current email has not been validated yet"""
+    validation = lead.get('email_validation')
+    return not validation or validation.get('address') != normalize_address(lead.get('email'))
+
+
+def email_is_valid(lead: Mapping[str, Any]) -> bool:
+    """The validation verdict for the lead's current email, or the imported `email_valid` flag without one"""
+    validation = lead.get('email_validation')
+    if validation and validation.get('address') == normalize_address(lead.get('email')):
+        return validation.get('status') == VALID
+    return bool(lead.get('email_valid'))
+
+
+class EmailValidator:
+    """Validates lead emails in the background and writes the verdicts back
+
+    Subscribe to a LeadStore with `start()`: every lead whose email has not
+    been validated is queued, and a worker thread takes batches off the
+    queue. Syntax, the bundled disposable-domain and role-address lists
+    are checked first; only the remaining domains go to the resolver, once
+    per domain while its cached verdict is fresh. Leads whose verdict
+    changed get it as their `email_validation` annotation (see
+    LeadStore.annotate_many), which re-scores them; the raw record and the
+    imported `email_valid` flag are left alone, so re-imports still match.
+
+    A lookup that fails (the resolver raised) leaves the lead untouched;
+    `revalidate()` queues it again, and works without `start()`: with
+    several worker processes only one subscribes (see BackgroundJobs), but
+    any of them can revalidate. Writing an unchanged verdict is a no-op.
+    """
+
+    def __init__(self, store, resolver: Optional[Resolver] = None, batch_size: int = VALIDATION_BATCH_SIZE):
+        self.store = store
+        self.resolver = resolver
+        self.batch_size = batch_size
+        self.domains = TTLCache(DOMAIN_CACHE_SIZE, DOMAIN_CACHE_TTL)
+        self.validated = 0
+        self.lookups = 0
+        self.lookup_errors = 0
+        self._queue: 'queue.Queue[int]' = queue.Queue()
+        self._lookup_pool = ThreadPoolExecutor(LOOKUP_WORKERS) if resolver is not None else None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def on_change(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """LeadStore listener: queue leads whose email changed"""
+        if new is not None and needs_validation(new):
+            self._queue.put(new['id'])
+
+    def start(self):
+        """Subscribe to the store and start the worker thread"""
+        self.store.subscribe(self.on_change)
+        self._start_thread()
+
+    def _start_thread(self):
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='email-validation', daemon=True)
+                self._thread.start()
+
+    def revalidate(self, lead_ids: Optional[Iterable[int]] = None) -> int:
+        """Queue leads (all when omitted) for validation even if they were validated before"""
+        lead_ids = [lead['id'] for lead in self.store.all()] if lead_ids is None else list(lead_ids)
+        for lead_id in lead_ids:
+            self._queue.put(lead_id)
+        self._start_thread()
+        return len(lead_ids)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def join(self):
+        """Block until every queued lead has been validated"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.validate_batch(batch)
+            except Exception:
+                logger.exception('Email validation failed for %d leads', len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def validate_batch(self, lead_ids: List[int]) -> int:
+        """Validate the leads and write back changed verdicts; returns how many leads were written"""
+        checks: List[Tuple[Mapping[str, Any], str, Optional[str]]] = []
+        for lead_id in dict.fromkeys(lead_ids):
+            lead = self.store.get(lead_id)
+            if lead is not None:
+                address = normalize_address(lead.get('email'))
+                checks.append((lead, address, local_status(address)))
+
+        domains = self.resolve_domains({address.rpartition('@')[2] for _, address, status in checks if status is None})
+
+        updates: Dict[int, Dict[str, Any]] = {}
+        for lead, address, status in checks:
+            if status is None:
+                resolved = domains[address.rpartition('@')[2]]
+                if resolved is None:
+                    continue
+                status = VALID if resolved else UNRESOLVABLE
+            validation = lead.get('email_validation')
+            if validation and validation.get('address') == address and validation.get('status') == status:
+                continue
+            updates[lead['id']] = {'email_validation': {'address': address, 'status': status}}
+
+        self.validated += len(checks)
+        return self.store.annotate_many(updates) if updates else 0
+
+    def resolve_domains(self, domains: Iterable[str]) -> Dict[str, Optional[bool]]:
+        """Verdict per domain from the cache or the resolver; None when the lookup failed"""
+        if self.resolver is None:
+            return dict.fromkeys(domains, True)
+        verdicts, missing = {}, []
+        for domain in domains:
+            verdict = self.domains.get(domain)
+            if verdict is None:
+                missing.append(domain)
+            else:
+                verdicts[domain] = verdict
+        self.lookups += len(missing)
+        for domain, verdict in zip(missing, self._lookup_pool.map(self._lookup, missing)):
+            verdicts[domain] = verdict
+            if verdict is None:
+                self.lookup_errors += 1
+            else:
+                self.domains.put(domain, verdict, None if verdict else NEGATIVE_DOMAIN_CACHE_TTL)
+        return verdicts
+
+    def _lookup(self, domain: str) -> Optional[bool]:
+        try:
+            return bool(self.resolver(domain))
+        except OSError:
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pending': self.pending,
+            'validated': self.validated,
+            'domain_lookups': self.lookups,
+            'lookup_errors': self.lookup_errors,
+            'cached_domains': len(self.domains),
+            'cache_hits': self.domains.hits
+        }
@@ -0,0 +1,35 @@
+"""Production settings: gunicorn -c gunicorn.conf.py app:app
+
+Worker processes share the enriched leads through one memory-mapped
+snapshot (see lead_snapshot.py) instead of each loading its own copy.
+"""
+import os
+
+from lead_store import DEFAULT_DB_PATH
+
+bind = os.environ.get('BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('THREADS', 4))
+# Large imports and batch playbook streams outlive the default 30 s
+timeout = 300
+
+# The app opens its database and starts its import pool and threads on import,
+# none of which survives a fork: every worker loads it for itself
+preload_app = False
+
+os.environ.setdefault('LEADS_SNAPSHOT_PATH', f'{DEFAULT_DB_PATH}.snapshot')
+
+# /metrics sums the metrics every worker writes here, whichever worker answers the scrape
+os.environ.setdefault('METRICS_DIR', f'{DEFAULT_DB_PATH}.metrics')
+
+
+def on_starting(server):
+    # Counts of a previous run's workers must not be added to this one's
+    from request_metrics import reset_shared_metrics
+    reset_shared_metrics(os.environ['METRICS_DIR'])
+
+
+def post_fork(server, worker):
+    # Each worker starts its own import enrichment pool; together they get about one process per CPU
+    os.environ.setdefault('INGEST_WORKERS', str(max(1, (os.cpu_count() or 1) // max(server.cfg.workers, 1))))
@@ -0,0 +1,56 @@
+import hashlib
+from functools import wraps
+from typing import Callable
+from urllib.parse import urlencode
+
+from flask import Response, current_app, request
+
+from caching import LRUCache
+
+# Bodies larger than this are revalidated with ETags but not kept in memory
+MAX_CACHED_BODY_BYTES = 8 * 1024 * 1024
+
+
+def normalized_query() -> str:
+    """Query string with parameters sorted, so equivalent requests share a cache key"""
+    return urlencode(sorted(request.args.items(multi=True)))
+
+
+class ConditionalCache:
+    """ETag / If-None-Match handling plus a server-side response cache for read endpoints
+
+    The ETag is derived from (dataset version, path, normalized query). A
+    request whose If-None-Match matches gets a 304 without running the
+    view. Otherwise a cached body with the same ETag is served as-is, and
+    only a version change or a new query runs the view (and serializes).
+    """
+
+    def __init__(self, version: Callable[[], str], maxsize: int = 1024):
+        self.version = version
+        self.responses = LRUCache(maxsize)
+
+    def __call__(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = f'{request.path}?{normalized_query()}'
+            etag = hashlib.sha1(f'{self.version()}|{key}'.encode()).hexdigest()
+
+            if etag in request.if_none_match:
+                response = Response(status=304)
+            else:
+                cached = self.responses.get(key)
+                if cached is not None and cached[0] == etag:
+                    response = Response(cached[1], mimetype=cached[2])
+                else:
+                    response = current_app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    body = response.get_data()
+                    if len(body) <= MAX_CACHED_BODY_BYTES:
+                        self.responses.put(key, (etag, body, response.mimetype))
+
+            response.set_etag(etag)
+            # Let clients keep the body but revalidate with If-None-Match on every use
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
@@ -0,0 +1,144 @@
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, Any, Callable, Dict, Optional
+
+from lead_ingest import IngestReport
+from lead_store import DEFAULT_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# Status files and spooled uploads; shared by the worker processes, so any of them can report on a job
+IMPORT_JOBS_DIR = os.environ.get('IMPORT_JOBS_DIR', f'{DEFAULT_DB_PATH}.imports')
+
+# Finished jobs are reported for this long, then their status files are removed
+JOB_RETENTION = 24 * 3600
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+# The process running the job exited before it finished
+INTERRUPTED = 'interrupted'
+
+_JOB_ID_RE = re.compile(r'[0-9a-f]{32}')
+
+# run(stream, fmt, progress) imports one upload and returns its report; progress(report) is called per batch
+ImportRunner = Callable[[IO[str], str, Callable[[IngestReport], None]], IngestReport]
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class ImportJobs:
+    """Runs uploaded imports in the background and records their progress
+
+    `submit()` spools the upload to a file, so the request can return
+    before anything is parsed, and queues the import on a single thread:
+    imports from one process run one at a time and share its enrichment
+    pool. The job's status and IngestReport counters are rewritten after
+    every batch to a JSON file in `directory`, which `status()` reads from
+    any process. A job whose process exited before it finished is reported
+    as interrupted.
+    """
+
+    def __init__(self, directory: str = IMPORT_JOBS_DIR, retention: float = JOB_RETENTION):
+        self.directory = directory
+        self.retention = retention
+        os.makedirs(directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix='lead-import')
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, upload: IO[bytes], fmt: str, run: ImportRunner) -> Dict[str, Any]:
+        """Spool the upload, queue `run` on it and return the job's initial status"""
+        self._expire()
+        job_id = uuid.uuid4().hex
+        upload_path = self._path(job_id, '.upload')
+        with open(upload_path, 'wb') as spool:
+            shutil.copyfileobj(upload, spool)
+        state = {'id': job_id, 'status': QUEUED, 'format': fmt, 'pid': os.getpid(), 'submitted': time.time()}
+        self._write(job_id, {**state, **IngestReport().to_dict()})
+        with self._lock:
+            self._futures[job_id] = self._executor.submit(self._run, state, upload_path, run)
+        return self.status(job_id)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job's status and counters, or None for an unknown (or expired) job"""
+        if not _JOB_ID_RE.fullmatch(job_id):
+            return None
+        try:
+            with open(self._path(job_id, '.json')) as f:
+                status = json.load(f)
+        except FileNotFoundError:
+            return None
+        if status['status'] in (QUEUED, RUNNING) and not _process_alive(status['pid']):
+            status['status'] = INTERRUPTED
+        return status
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until a job submitted by this process has finished, and return its status"""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout)
+        return self.status(job_id)
+
+    def _run(self, state: Dict[str, Any], upload_path: str, run: ImportRunner):
+        job_id = state['id']
+        state = {**state, 'status': RUNNING, 'started': time.time()}
+        report = IngestReport()
+        self._write(job_id, {**state, **report.to_dict()})
+
+        def progress(current: IngestReport):
+            nonlocal report
+            report = current
+            self._write(job_id, {**state, **current.to_dict()})
+
+        try:
+            with open(upload_path, encoding='utf-8', newline='') as stream:
+                report = run(stream, state['format'], progress)
+            state['status'] = DONE
+        except Exception as e:
+            logger.exception('Import %s failed', job_id)
+            state.update(status=FAILED, error=str(e))
+        finally:
+            os.remove(upload_path)
+            self._write(job_id, {**state, 'finished': time.time(), **report.to_dict()})
+            with self._lock:
+                self._futures.pop(job_id, None)
+
+    def _path(self, job_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, job_id + suffix)
+
+    def _write(self, job_id: str, status: Dict[str, Any]):
+        # Written aside and renamed, so readers in other processes never see a partial file
+        path = self._path(job_id, '.json')
+        with open(f'{path}.{os.getpid()}.tmp', 'w') as f:
+            json.dump(status, f)
+        os.replace(f'{path}.{os.getpid()}.tmp', path)
+
+    def _expire(self):
+        # Running jobs rewrite their file every batch, so only finished or interrupted ones (and uploads
+        # spooled by a process that exited) get this old
+        cutoff = time.time() - self.retention
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name.endswith(('.json', '.upload')) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,65 @@
+import json
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from caching import LRUCache
+
+# Bound on cached lead encodings; the hot working set of large list responses
+FRAGMENT_CACHE_SIZE = 200_000
+
+
+class RawJSON(bytes):
+    """Already-encoded JSON, embedded verbatim by encode_object()"""
+
+
+def encode_object(obj: Dict[str, Any], dumps: Callable[[Any], str]) -> bytes:
+    """Encode a dict like dumps(obj) with sorted keys, embedding RawJSON values as-is"""
+    return b'{' + b','.join(
+        json.dumps(key).encode() + b':' + (value if isinstance(value, RawJSON) else dumps(value).encode())
+        for key, value in sorted(obj.items())
+    ) + b'}'
+
+
+class FragmentCache:
+    """Per-lead JSON encodings cached as bytes, dropped when the lead changes
+
+    Subscribe to a LeadStore. `array()` joins cached fragments into a JSON
+    array, so a large list response only encodes leads that changed since
+    they were last served.
+
+    Leads that carry their own encoding (LeadRecord.encoded, as read from
+    a shared snapshot) are served from it and not cached.
+
+    Every notification bumps `changes`. An encoding is only cached if no
+    change was notified since `since` (taken before the leads were read),
+    so a write racing a response can never leave a stale fragment behind.
+    """
+
+    def __init__(self, dumps: Callable[[Any], str], maxsize: int = FRAGMENT_CACHE_SIZE):
+        self.dumps = dumps
+        self.changes = 0
+        self._lock = threading.Lock()
+        self._fragments = LRUCache(maxsize)
+
+    def on_change(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """LeadStore listener: forget the lead's encoding"""
+        with self._lock:
+            self.changes += 1
+            self._fragments.pop((old or new)['id'])
+
+    def fragment(self, lead: Dict[str, Any], since: Optional[int] = None) -> bytes:
+        encoded = getattr(lead, 'encoded', None)
+        if encoded is not None:
+            return encoded
+        lead_id = lead['id']
+        encoded = self._fragments.get(lead_id)
+        if encoded is None:
+            encoded = self.dumps(lead).encode()
+            with self._lock:
+                if since is None or since == self.changes:
+                    self._fragments.put(lead_id, encoded)
+        return encoded
+
+    def array(self, leads: Iterable[Dict[str, Any]], since: Optional[int] = None) -> RawJSON:
+        """JSON array of the leads, assembled from cached fragments"""
+        return RawJSON(b'[' + b','.join(self.fragment(lead, since) for lead in leads) + b']')
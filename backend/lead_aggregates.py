@@ -0,0 +1,345 @@
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from email_validation import email_is_valid
+from sketches import HyperLogLog, TDigest, TopK
+
+# Serve technology, location and industry counts from the sketches only (LeadSketches) and
+# keep no exact per-value counters, so analytics memory stays fixed however many values exist
+APPROXIMATE_ANALYTICS = os.environ.get('APPROXIMATE_ANALYTICS', '0') == '1'
+
+
+class IndustryMetrics:
+    """Running sums behind one industry's insights"""
+
+    __slots__ = ('count', 'score_sum', 'business_priority_sum', 'high_quality_count')
+
+    def __init__(self):
+        self.count = 0
+        self.score_sum = 0
+        self.business_priority_sum = 0.0
+        self.high_quality_count = 0
+
+
+class LeadAggregates:
+    """Materialized counters and running sums for the analytics endpoints
+
+    Subscribe to a LeadStore: every insert, update and delete adjusts the
+    counters, so analytics, quality-report and industry-insights are built
+    in O(number of groups) instead of a pass over every lead.
+
+    With `group_counts=False` the per-technology, location and industry
+    counts are not kept and `analytics()` leaves them out; LeadSketches
+    provides them in bounded memory instead.
+    """
+
+    def __init__(self, group_counts: bool = True):
+        self.group_counts = group_counts
+        self._lock = threading.RLock()
+        self.total = 0
+        self.valid_emails = 0
+        self.score_sum = 0
+        self.high_quality_leads = 0
+        self.high_priority_leads = 0
+        self.sales_ready_leads = 0
+        self.business_score_sum = 0.0
+        self.quality_score_sum = 0.0
+        self.tech_counts: Dict[str, int] = {}
+        self.location_counts: Dict[str, int] = {}
+        self.industry_counts: Dict[str, int] = {}
+        self.recommendation_counts: Dict[str, int] = {'pursue': 0, 'nurture': 0, 'discard': 0}
+        self.industries: Dict[str, IndustryMetrics] = {}
+
+    @staticmethod
+    def _bump(counts: Dict[Any, int], key: Any, delta: int):
+        count = counts.get(key, 0) + delta
+        if count:
+            counts[key] = count
+        else:
+            del counts[key]
+
+    def _apply(self, lead: Dict[str, Any], sign: int):
+        score = lead.get('score', 0)
+        business_priority = lead.get('business_priority_score', 0)
+        quality = lead.get('quality_assessment', {})
+        recommendation = quality.get('recommendation', 'discard')
+
+        self.total += sign
+        self.valid_emails += sign * email_is_valid(lead)
+        self.score_sum += sign * score
+        self.high_quality_leads += sign * (score >= 80)
+        self.high_priority_leads += sign * (business_priority >= 70)
+        self.sales_ready_leads += sign * (lead.get('sales_readiness', {}).get('stage') == 'hot')
+        self.business_score_sum += sign * business_priority
+        self.quality_score_sum += sign * quality.get('overall_score', 0)
+        self.recommendation_counts[recommendation] = self.recommendation_counts.get(recommendation, 0) + sign
+
+        industry = lead.get('industry', 'Unknown')
+        if self.group_counts:
+            for tech in lead.get('tech_stack', []):
+                self._bump(self.tech_counts, tech, sign)
+            self._bump(self.location_counts, lead.get('location', 'Unknown'), sign)
+            self._bump(self.industry_counts, industry, sign)
+
+        metrics = self.industries.get(industry)
+        if metrics is None:
+            metrics = self.industries[industry] = IndustryMetrics()
+        metrics.count += sign
+        metrics.score_sum += sign * score
+        metrics.business_priority_sum += sign * business_priority
+        metrics.high_quality_count += sign * (recommendation == 'pursue')
+        if not metrics.count:
+            del self.industries[industry]
+
+    def on_change(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """LeadStore listener: retract the old version and add the new one"""
+        with self._lock:
+            if old is not None:
+                self._apply(old, -1)
+            if new is not None:
+                self._apply(new, 1)
+
+    def analytics(self) -> Dict[str, Any]:
+        """Payload for /api/analytics (without the group counts unless group_counts is set)"""
+        with self._lock:
+            analytics = {
+                'total_leads': self.total,
+                'valid_emails': self.valid_emails,
+                'avg_score': round(self.score_sum / self.total, 1) if self.total else 0,
+                'high_quality_leads': self.high_quality_leads,
+                'high_priority_leads': self.high_priority_leads,
+                'sales_ready_leads': self.sales_ready_leads,
+                'quality_leads': self.recommendation_counts.get('pursue', 0),
+            }
+            if self.group_counts:
+                top_technologies = sorted(
+                    self.tech_counts.items(),
+                    key=lambda x: x[1],
+                    reverse=True
+                )[:5]
+                analytics.update({
+                    'top_technologies': [{'name': tech, 'count': count} for tech, count in top_technologies],
+                    'locations': [{'name': loc, 'count': count} for loc, count in self.location_counts.items()],
+                    'industries': [{'name': ind, 'count': count} for ind, count in self.industry_counts.items()]
+                })
+            return analytics
+
+    def quality_report(self) -> Dict[str, Any]:
+        """Payload for /api/business/quality-report"""
+        with self._lock:
+            quality_distribution = dict(self.recommendation_counts)
+            total = self.total
+            return {
+                'quality_distribution': quality_distribution,
+                'avg_quality_score': round(self.quality_score_sum / total, 2) if total else 0,
+                'avg_business_score': round(self.business_score_sum / total, 1) if total else 0,
+                'actionable_leads_count': quality_distribution['pursue'],
+                'actionable_percentage': round((quality_distribution['pursue'] / total) * 100, 1) if total else 0
+            }
+
+    def industry_insights(self) -> Dict[str, Any]:
+        """Payload for /api/business/industry-insights"""
+        with self._lock:
+            industry_metrics = {
+                industry: {
+                    'count': metrics.count,
+                    'avg_score': round(metrics.score_sum / metrics.count, 1),
+                    'avg_business_priority': round(metrics.business_priority_sum / metrics.count, 1),
+                    'high_quality_count': metrics.high_quality_count,
+                    'high_quality_percentage': round((metrics.high_quality_count / metrics.count) * 100, 1)
+                }
+                for industry, metrics in self.industries.items()
+            }
+
+        return {
+            'industry_insights': industry_metrics,
+            'top_industries': sorted(
+                industry_metrics.items(),
+                key=lambda x: x[1]['high_quality_count'],
+                reverse=True
+            )[:5]
+        }
+
+
+# Insert-only sketches are rebuilt once updates and deletes have retracted this share of the leads
+SKETCH_REBUILD_FRACTION = 0.1
+
+# Score distributions kept as t-digests, with the lead field each one reads
+SCORE_DIGESTS = {
+    'score': lambda lead: lead.get('score'),
+    'quality_score': lambda lead: (lead.get('quality_assessment') or {}).get('overall_score'),
+    'business_score': lambda lead: lead.get('business_priority_score'),
+}
+
+PERCENTILES = (50, 90, 99)
+
+
+def _email_domain(lead: Dict[str, Any]) -> Optional[str]:
+    local, at, domain = str(lead.get('email') or '').strip().lower().rpartition('@')
+    return domain if at and local and domain else None
+
+
+class LeadSketches:
+    """Bounded-memory, mergeable sketches behind the approximate analytics
+
+    Subscribe to a LeadStore. Technology, location and industry counts are
+    count-min heavy hitters (top-N in fixed memory, and decrementable, so
+    updates and deletes are exact retractions). Distinct companies, email
+    domains and locations are HyperLogLogs, and score distributions are
+    t-digests.
+
+    HyperLogLog and t-digest cannot forget a value: a retracted lead stays
+    counted until the sketches are rebuilt from the store. Once
+    retractions exceed SKETCH_REBUILD_FRACTION of the leads, a background
+    thread rebuilds them in one pass over the store while reads keep using
+    the current ones; writes during the pass are collected as a delta and
+    folded in when it is installed.
+
+    `merge()` combines sketches of disjoint sets of leads, e.g. shards
+    with their own stores (see `to_dict()`). Worker processes of one
+    store each summarize every lead, so merging theirs would count each
+    lead once per worker.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._lock = threading.RLock()
+        self.total = 0
+        self.top = {'tech_stack': TopK(), 'location': TopK(), 'industry': TopK()}
+        self._reset_insert_only()
+        # Insert-only sketches of the writes notified while a rebuild reads the store
+        self._delta: Optional['LeadSketches'] = None
+        self._rebuild_thread: Optional[threading.Thread] = None
+        # Bumped when a rebuild is installed, which changes results without a store write
+        self.generation = 0
+
+    def _reset_insert_only(self):
+        self.distinct = {'companies': HyperLogLog(), 'email_domains': HyperLogLog(), 'locations': HyperLogLog()}
+        self.digests = {name: TDigest() for name in SCORE_DIGESTS}
+        self.retracted = 0
+
+    def _add_insert_only(self, lead: Dict[str, Any]):
+        company = str(lead.get('company') or '').strip().lower()
+        if company:
+            self.distinct['companies'].add(company)
+        domain = _email_domain(lead)
+        if domain:
+            self.distinct['email_domains'].add(domain)
+        if lead.get('location'):
+            self.distinct['locations'].add(lead['location'])
+        for name, value in SCORE_DIGESTS.items():
+            score = value(lead)
+            if score is not None:
+                self.digests[name].add(float(score))
+
+    def _count(self, lead: Dict[str, Any], sign: int):
+        for tech in lead.get('tech_stack', []):
+            self.top['tech_stack'].add(tech, sign)
+        self.top['location'].add(lead.get('location', 'Unknown'), sign)
+        self.top['industry'].add(lead.get('industry', 'Unknown'), sign)
+        self.total += sign
+
+    def on_change(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """LeadStore listener: retract the old version from the counts and add the new one"""
+        with self._lock:
+            if self._delta is not None:
+                self._delta.retracted += 1
+                if new is not None:
+                    self._delta._add_insert_only(new)
+            if old is not None:
+                self._count(old, -1)
+                self.retracted += 1
+            if new is not None:
+                self._count(new, 1)
+                self._add_insert_only(new)
+            self._maybe_start_rebuild()
+
+    def _maybe_start_rebuild(self):
+        if (self.store is not None and self._rebuild_thread is None
+                and self.retracted > self.total * SKETCH_REBUILD_FRACTION):
+            self._rebuild_thread = threading.Thread(target=self._rebuild, name='sketch-rebuild', daemon=True)
+            self._rebuild_thread.start()
+
+    def _rebuild(self):
+        """Rebuild the insert-only sketches from the store, off the request path"""
+        try:
+            with self._lock:
+                self._delta = LeadSketches()
+            rebuilt = LeadSketches()
+            for lead in self.store.all():
+                rebuilt._add_insert_only(lead)
+            with self._lock:
+                # The pass may have read a lead written during it before or after the write: add the
+                # new versions from the delta, and count each of those writes as a possibly stale entry
+                delta = self._delta
+                for group in ('distinct', 'digests'):
+                    for name, sketch in getattr(rebuilt, group).items():
+                        sketch.merge(getattr(delta, group)[name])
+                self.distinct, self.digests, self.retracted = rebuilt.distinct, rebuilt.digests, delta.retracted
+                self.generation += 1
+        finally:
+            with self._lock:
+                self._delta = None
+                self._rebuild_thread = None
+                # Writes during this pass may already call for the next one
+                self._maybe_start_rebuild()
+
+    def join(self):
+        """Block until running rebuilds, and the ones they started, have finished"""
+        while (thread := self._rebuild_thread) is not None:
+            thread.join()
+
+    def merge(self, other: 'LeadSketches'):
+        """Fold in the sketches of a disjoint set of leads (another shard)"""
+        with self._lock:
+            self.total += other.total
+            self.retracted += other.retracted
+            for group in ('top', 'distinct', 'digests'):
+                for name, sketch in getattr(self, group).items():
+                    sketch.merge(getattr(other, group)[name])
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'total': self.total,
+                'retracted': self.retracted,
+                'top': {name: sketch.to_dict() for name, sketch in self.top.items()},
+                'distinct': {name: sketch.to_dict() for name, sketch in self.distinct.items()},
+                'digests': {name: sketch.to_dict() for name, sketch in self.digests.items()}
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LeadSketches':
+        """Sketches exported by to_dict(), detached from any store"""
+        sketches = cls()
+        sketches.total = data['total']
+        sketches.retracted = data['retracted']
+        sketches.top = {name: TopK.from_dict(sketch) for name, sketch in data['top'].items()}
+        sketches.distinct = {name: HyperLogLog.from_dict(sketch) for name, sketch in data['distinct'].items()}
+        sketches.digests = {name: TDigest.from_dict(sketch) for name, sketch in data['digests'].items()}
+        return sketches
+
+    def percentiles(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """p50/p90/p99 of every score distribution"""
+        with self._lock:
+            return {
+                name: {
+                    f'p{percentile}': (round(value, 2) if value is not None else None)
+                    for percentile, value in ((p, digest.quantile(p / 100)) for p in PERCENTILES)
+                }
+                for name, digest in self.digests.items()
+            }
+
+    def analytics(self, top: int = 10) -> Dict[str, Any]:
+        """Approximate counterparts of the /api/analytics group counts, plus distinct counts"""
+        with self._lock:
+            def ranked(field: str, n: int) -> List[Dict[str, Any]]:
+                return [{'name': key, 'count': count} for key, count in self.top[field].top(n)]
+
+            return {
+                'top_technologies': ranked('tech_stack', 5),
+                'locations': ranked('location', top),
+                'industries': ranked('industry', top),
+                'distinct': {name: sketch.count() for name, sketch in self.distinct.items()}
+            }
@@ -0,0 +1,103 @@
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+# Bound on logged changes; older ones are compacted away and their readers must resync
+CHANGE_LOG_SIZE = 100_000
+
+
+class ChangeSet(NamedTuple):
+    """Leads changed after a sequence number, as of `seq`
+
+    `resync` means the changes since the requested sequence number are no
+    longer (or never were) in the log; the client must reload every lead
+    and continue from `seq`.
+    """
+    seq: int
+    resync: bool
+    upserts: List[Dict[str, Any]]
+    deletes: List[int]
+
+
+class ChangeLog:
+    """Sequence-numbered log of lead inserts, updates and deletes
+
+    Subscribe to a LeadStore. Sequence numbers are the store's dataset
+    version, which is persisted and shared by every process on the same
+    database, so a sequence number from one worker is valid on all of them.
+    Rescoring and readiness flips are store writes, so they are logged like
+    any other update.
+
+    Listeners run before the store publishes its new version, so a change
+    is logged as pending and only gets its sequence number once the
+    version has moved past the one current when it was notified. A
+    pending change is never served; readers see it under a later `seq`.
+
+    Only lead ids are logged; `changes()` returns each changed lead's
+    current state, so a lead changed many times appears once.
+    """
+
+    def __init__(self, store, maxsize: int = CHANGE_LOG_SIZE):
+        self.store = store
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: Deque[Tuple[int, int]] = deque()
+        self._pending: List[Tuple[int, int]] = []
+        # Changes up to this sequence number are not in the log
+        self.compacted_through: Optional[int] = None
+
+    def on_change(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """LeadStore listener: log the lead as changed in the version being written"""
+        if self.compacted_through is None:
+            # Replay of the existing leads on subscribe: the log starts after them
+            return
+        version = self.store.version
+        with self._lock:
+            self._assign(version)
+            self._pending.append((version, (old or new)['id']))
+
+    def start(self):
+        """Subscribe to the store; the log covers every write from its current version on"""
+        self.store.subscribe(self.on_change)
+        self.compacted_through = self.store.version
+
+    def _assign(self, version: int):
+        """Give pending changes notified before `version` was published that sequence number"""
+        # Versions read by racing threads can arrive out of order; a later sequence number is always safe
+        seq = max(version, self._entries[-1][0]) if self._entries else version
+        done = 0
+        for notified, lead_id in self._pending:
+            if notified >= version:
+                break
+            self._entries.append((seq, lead_id))
+            done += 1
+        if done:
+            del self._pending[:done]
+        while len(self._entries) > self.maxsize:
+            self.compacted_through = max(self.compacted_through, self._entries.popleft()[0])
+
+    def changes(self, since: Optional[int]) -> ChangeSet:
+        """Current state of the leads changed after sequence number `since`
+
+        Without `since`, or when `since` is older than the log or newer than
+        the store (e.g. a reset database), the result is a resync.
+        """
+        seq = self.store.version
+        with self._lock:
+            self._assign(seq)
+            if since is None or since < self.compacted_through or since > seq:
+                return ChangeSet(seq, True, [], [])
+            changed = set()
+            for entry_seq, lead_id in reversed(self._entries):
+                if entry_seq <= since:
+                    break
+                changed.add(lead_id)
+
+        upserts, deletes = [], []
+        for lead_id in sorted(changed):
+            lead = self.store.get(lead_id)
+            if lead is None:
+                deletes.append(lead_id)
+            else:
+                upserts.append(lead)
+        return ChangeSet(seq, False, upserts, deletes)
@@ -0,0 +1,371 @@
+import argparse
+import re
+import sys
+import unicodedata
+import zlib
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lead_ingest import raw_lead
+from lead_intelligence import enrich_leads, parse_activity_epoch
+from lead_snapshot import open_lead_store
+from lead_store import DEFAULT_DB_PATH
+
+# MinHash signature length and its LSH banding (16 bands of 4 rows: pairs at 70% similarity
+# share a bucket with ~99% probability)
+NUM_HASHES = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_HASHES // LSH_BANDS
+
+# Estimated name similarity (Jaccard of character trigrams) at which blocked leads are candidates;
+# candidates are duplicates only when their names are also compatible word by word
+NAME_SIMILARITY_THRESHOLD = 0.7
+
+# Similarity (difflib ratio) at which two name words count as one spelled differently ("Jon", "John")
+NAME_WORD_SIMILARITY = 0.75
+
+# A bucket this large holds a placeholder name shared across a company, not one person
+MAX_BUCKET_SIZE = 1000
+
+# Leads hashed per MinHash chunk, bounding the (shingles x hashes) working array
+MINHASH_CHUNK_SIZE = 10_000
+
+MAX_REPORTED_GROUPS = 1000
+
+# Shared mailbox providers: a common domain says nothing about a common employer
+FREE_EMAIL_DOMAINS = frozenset({
+    'gmail.com', 'googlemail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'live.com',
+    'aol.com', 'icloud.com', 'me.com', 'protonmail.com', 'proton.me', 'gmx.com', 'mail.com'
+})
+
+COMPANY_SUFFIXES = frozenset({
+    'inc', 'incorporated', 'llc', 'ltd', 'limited', 'corp', 'corporation', 'co', 'company',
+    'gmbh', 'plc', 'sa', 'ag', 'bv', 'pty', 'the'
+})
+
+# Multiply-shift hash family: h(x) = ((a * x + b) mod 2^64) >> 32 with odd a
+_rng = np.random.default_rng(20240601)
+_HASH_A = _rng.integers(0, 1 << 63, NUM_HASHES, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_HASH_B = _rng.integers(0, 1 << 63, NUM_HASHES, dtype=np.uint64)
+_BAND_MULTIPLIERS = _rng.integers(0, 1 << 63, LSH_ROWS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def _ascii_words(text: Any) -> List[str]:
+    text = str(text or '')
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+    return _WORD_RE.findall(text.lower())
+
+
+def normalize_email(email: Any) -> str:
+    """Canonical mailbox: lowercase, without +tags, and without dots for Gmail"""
+    email = str(email or '').strip().lower()
+    local, at, domain = email.rpartition('@')
+    if not at or not local or not domain:
+        return ''
+    local = local.split('+', 1)[0]
+    if domain in ('gmail.com', 'googlemail.com'):
+        local, domain = local.replace('.', ''), 'gmail.com'
+    return f'{local}@{domain}'
+
+
+def normalize_company(company: Any) -> str:
+    """Company name without case, punctuation or legal suffixes ("Acme, Inc." -> "acme")"""
+    return ' '.join(word for word in _ascii_words(company) if word not in COMPANY_SUFFIXES)
+
+
+def name_shingles(name: Any) -> List[int]:
+    """CRC32 hashes of the character trigrams of a name, with word order ignored (may repeat)"""
+    words = _ascii_words(name)
+    if not words:
+        return []
+    padded = f" {' '.join(sorted(words))} "
+    encoded = padded.encode()
+    return [zlib.crc32(encoded[i:i + 3]) for i in range(len(encoded) - 2)]
+
+
+def name_words(name: Any) -> List[str]:
+    """Lowercase ASCII words of a contact name"""
+    return _ascii_words(name)
+
+
+def _words_compatible(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    short, long = sorted((a, b), key=len)
+    if len(short) == 1:
+        # An initial
+        return long.startswith(short)
+    if a[0] != b[0]:
+        return False
+    # A shortened name ("Chris", "Christopher") or a typo
+    return (len(short) >= 3 and long.startswith(short)) or SequenceMatcher(None, a, b).ratio() >= NAME_WORD_SIMILARITY
+
+
+def names_compatible(a: Sequence[str], b: Sequence[str]) -> bool:
+    """Whether two names (as name_words) can be the same person
+
+    Every word of the shorter name must match its own word of the other
+    name: equal, an initial of it, a shortened form or a close typo. Word
+    order is ignored. Names of a single word carry no first name and never
+    match, so "Lisa Anderson" and "David Anderson" or two "Unknown"
+    contacts stay apart.
+    """
+    if len(a) < 2 or len(b) < 2:
+        return False
+    short, long = sorted((a, b), key=len)
+    unused = list(long)
+    for word in short:
+        match = next((i for i, other in enumerate(unused) if _words_compatible(word, other)), None)
+        if match is None:
+            return False
+        del unused[match]
+    return True
+
+
+def blocking_keys(lead: Mapping[str, Any]) -> List[str]:
+    """Keys of the blocks a lead is compared within: its email's company domain and its company"""
+    keys = []
+    domain = normalize_email(lead.get('email')).partition('@')[2]
+    if domain and domain not in FREE_EMAIL_DOMAINS:
+        keys.append(f'domain:{domain}')
+    company = normalize_company(lead.get('company'))
+    if company:
+        keys.append(f'company:{company}')
+    return keys
+
+
+def minhash_signatures(shingle_sets: Sequence[List[int]]) -> np.ndarray:
+    """MinHash signature (NUM_HASHES uint32 values) per non-empty shingle set"""
+    signatures = np.empty((len(shingle_sets), NUM_HASHES), dtype=np.uint32)
+    for start in range(0, len(shingle_sets), MINHASH_CHUNK_SIZE):
+        chunk = shingle_sets[start:start + MINHASH_CHUNK_SIZE]
+        lengths = np.fromiter((len(shingles) for shingles in chunk), dtype=np.int64, count=len(chunk))
+        shingles = np.fromiter((s for shingles in chunk for s in shingles), dtype=np.uint64, count=int(lengths.sum()))
+        # uint64 arithmetic wraps, which is the "mod 2^64" of the hash family
+        hashed = ((shingles[:, None] * _HASH_A + _HASH_B) >> np.uint64(32)).astype(np.uint32)
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        signatures[start:start + len(chunk)] = np.minimum.reduceat(hashed, offsets, axis=0)
+    return signatures
+
+
+class UnionFind:
+    """Disjoint sets over 0..n-1 with path halving and union by size"""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+
+def _similar_pairs(block_codes: np.ndarray, members: np.ndarray, signatures: np.ndarray) -> Iterable[Tuple[int, int]]:
+    """Pairs (a, b), a < b, that share a block and an LSH bucket and have similar name signatures
+
+    Every pair within a bucket is verified on its own, never through a
+    third member, and each pair is yielded once across bands.
+    """
+    seen = set()
+    for band in range(LSH_BANDS):
+        rows = signatures[members, band * LSH_ROWS:(band + 1) * LSH_ROWS].astype(np.uint64)
+        # Combine the band's rows into one 64-bit bucket hash (wrapping arithmetic)
+        bucket = (rows * _BAND_MULTIPLIERS).sum(axis=1, dtype=np.uint64)
+        order = np.lexsort((bucket, block_codes))
+        sorted_blocks, sorted_buckets = block_codes[order], bucket[order]
+        starts = np.ones(len(order), dtype=bool)
+        starts[1:] = (sorted_blocks[1:] != sorted_blocks[:-1]) | (sorted_buckets[1:] != sorted_buckets[:-1])
+        bucket_starts = np.flatnonzero(starts)
+        sizes = np.diff(np.append(bucket_starts, len(order)))
+        shared = (sizes > 1) & (sizes <= MAX_BUCKET_SIZE)
+        if not shared.any():
+            continue
+        left, right = [], []
+        for start, size in zip(bucket_starts[shared].tolist(), sizes[shared].tolist()):
+            i, j = np.triu_indices(size, 1)
+            left.append(order[start + i])
+            right.append(order[start + j])
+        a, b = members[np.concatenate(left)], members[np.concatenate(right)]
+        agreement = (signatures[a] == signatures[b]).mean(axis=1)
+        similar = agreement >= NAME_SIMILARITY_THRESHOLD
+        for pair in zip(np.minimum(a, b)[similar].tolist(), np.maximum(a, b)[similar].tolist()):
+            if pair not in seen:
+                seen.add(pair)
+                yield pair
+
+
+def find_duplicates(leads: Sequence[Mapping[str, Any]]) -> List[List[int]]:
+    """Groups of duplicate leads, as lists of positions into leads
+
+    Leads are duplicates when their normalized emails are equal, or when
+    they share a blocking key (company email domain or normalized company),
+    their names are near-duplicates by MinHash and the names are compatible
+    (see names_compatible). Candidates come from hashing, never from
+    comparing all pairs, so this runs in near-linear time.
+
+    Name matches only join two groups when every name in one is compatible
+    with every name in the other, so "Chloe Park" never reaches "Grace
+    Patel" through "Chloe Patel".
+    """
+    groups = UnionFind(len(leads))
+
+    first_by_email: Dict[str, int] = {}
+    for position, lead in enumerate(leads):
+        email = normalize_email(lead.get('email'))
+        if email:
+            groups.union(first_by_email.setdefault(email, position), position)
+
+    words = [name_words(lead.get('contact_name')) for lead in leads]
+    shingle_sets = [name_shingles(lead.get('contact_name')) if len(name) > 1 else [] for name, lead in zip(words, leads)]
+    named = [position for position, shingles in enumerate(shingle_sets) if shingles]
+    signatures = np.zeros((len(leads), NUM_HASHES), dtype=np.uint32)
+    signatures[named] = minhash_signatures([shingle_sets[position] for position in named])
+
+    block_ids: Dict[str, int] = {}
+    entry_blocks, entry_members = [], []
+    for position in named:
+        for key in blocking_keys(leads[position]):
+            entry_blocks.append(block_ids.setdefault(key, len(block_ids)))
+            entry_members.append(position)
+    if entry_members:
+        people = UnionFind(len(leads))
+        names: Dict[int, List[int]] = {}
+        pairs = _similar_pairs(np.array(entry_blocks, dtype=np.int64), np.array(entry_members, dtype=np.int64), signatures)
+        for a, b in sorted(pairs):
+            a, b = people.find(a), people.find(b)
+            if a == b:
+                continue
+            a_names, b_names = names.get(a, [a]), names.get(b, [b])
+            if all(names_compatible(words[x], words[y]) for x in a_names for y in b_names):
+                people.union(a, b)
+                names[people.find(a)] = names.pop(a, [a]) + names.pop(b, [b])
+        for group in names.values():
+            for position in group[1:]:
+                groups.union(group[0], position)
+
+    members: Dict[int, List[int]] = {}
+    for position in range(len(leads)):
+        members.setdefault(groups.find(position), []).append(position)
+    return [group for group in members.values() if len(group) > 1]
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == '' or value == []
+
+
+def merge_leads(leads: Sequence[Mapping[str, Any]]) -> Dict[str, Any]:
+    """Merge duplicate leads into one raw lead, keeping the best-scoring record's fields
+
+    The highest-scoring lead survives (keeping its id). Fields it lacks are
+    filled from the next best records; tech stacks are combined, the best
+    engagement and most recent activity are kept, and a verified email wins
+    over an unverified one.
+    """
+    ranked = sorted(leads, key=lambda lead: (-lead.get('score', 0), lead['id']))
+    # Plain copies: stored leads are read-only views, and nested views (e.g. email_validation) are not JSON
+    merged = raw_lead(ranked[0])
+    for lead in ranked[1:]:
+        for key, value in raw_lead(lead).items():
+            if _is_empty(merged.get(key)) and not _is_empty(value):
+                merged[key] = value
+
+    tech_stack = list(dict.fromkeys(tech for lead in ranked for tech in lead.get('tech_stack') or []))
+    if tech_stack:
+        merged['tech_stack'] = tech_stack
+
+    engagement = [lead['engagement_score'] for lead in ranked if isinstance(lead.get('engagement_score'), (int, float))]
+    if engagement:
+        merged['engagement_score'] = max(engagement)
+
+    dated = [(parse_activity_epoch(lead.get('last_activity')), lead['last_activity'])
+             for lead in ranked if lead.get('last_activity')]
+    dated = [(epoch, value) for epoch, value in dated if epoch is not None]
+    if dated:
+        merged['last_activity'] = max(dated, key=lambda item: item[0])[1]
+
+    if not merged.get('email_valid'):
+        verified = next((lead for lead in ranked if lead.get('email_valid') and lead.get('email')), None)
+        if verified is not None:
+            merged['email'], merged['email_valid'] = verified['email'], True
+
+    return merged
+
+
+class DedupeReport:
+    """Outcome of a dedupe run"""
+
+    def __init__(self):
+        self.duplicate_groups = 0
+        self.merged = 0
+        self.removed = 0
+        self.groups: List[List[int]] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'duplicate_groups': self.duplicate_groups,
+            'merged': self.merged,
+            'removed': self.removed,
+            'groups': self.groups
+        }
+
+
+def dedupe(store, dry_run: bool = False) -> DedupeReport:
+    """Find duplicate leads in the store and merge each group into its best-scoring lead
+
+    Only the surviving leads whose merged data changed are re-enriched; the
+    other members of each group are deleted. With dry_run, groups are
+    reported (surviving id first) without writing anything.
+    """
+    report = DedupeReport()
+    # Only the matched fields of every lead are held; group members are loaded by id
+    leads = [{key: lead.get(key) for key in ('id', 'email', 'company', 'contact_name')} for lead in store.all()]
+    merged_leads, removed_ids = [], []
+    for group in find_duplicates(leads):
+        members = [store.get(leads[position]['id']) for position in group]
+        merged = merge_leads(members)
+        duplicates = [lead['id'] for lead in members if lead['id'] != merged['id']]
+        report.duplicate_groups += 1
+        if len(report.groups) < MAX_REPORTED_GROUPS:
+            report.groups.append([merged['id'], *sorted(duplicates)])
+        merged_leads.append(merged)
+        removed_ids.extend(duplicates)
+
+    if not dry_run and merged_leads:
+        report.merged = store.upsert_many(merged_leads)
+        report.removed = store.delete_many(removed_ids)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Merge duplicate leads')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='lead database path')
+    parser.add_argument('--dry-run', action='store_true', help='report duplicate groups without merging')
+    args = parser.parse_args(argv)
+
+    report = dedupe(open_lead_store(args.db, enrich=enrich_leads), dry_run=args.dry_run)
+    print(f'groups={report.duplicate_groups} merged={report.merged} removed={report.removed}', file=sys.stderr)
+    for group in report.groups:
+        print(' '.join(map(str, group)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,597 @@
+import bisect
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from caching import LRUCache
+from sort_index import SORT_FIELDS, SortedKeys
+
+# Searchable text fields and their relevance weights
+SEARCH_FIELDS = {'company': 3.0, 'contact_name': 3.0, 'role': 2.0, 'industry': 1.5, 'location': 1.0}
+
+# Bound on vocabulary tokens a single query token expands to (typos and prefixes)
+MAX_TOKEN_EXPANSIONS = 256
+
+EXPANSION_CACHE_SIZE = 4096
+
+# Out-of-order posting writes held back before a merge into the slot array (at least; see Bitmap)
+PENDING_SLOTS = 32
+
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def bitmap_from_slots(slots: Iterable[int]) -> int:
+    """Pack slot numbers into an int bitmap (bit i set for slot i)"""
+    slots = slots if isinstance(slots, np.ndarray) else np.fromiter(slots, dtype=np.int64)
+    if not len(slots):
+        return 0
+    bits = np.zeros(int(slots.max()) + 1, dtype=bool)
+    bits[slots] = True
+    return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+
+def bitmap_from_mask(mask: np.ndarray) -> int:
+    """Pack a boolean array into an int bitmap (bit i set where mask[i])"""
+    return int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little')
+
+
+def slots_from_bitmap(bitmap: int) -> np.ndarray:
+    """Unpack an int bitmap into its ascending slot numbers"""
+    if not bitmap:
+        return np.empty(0, dtype=np.int64)
+    raw = np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder='little'))
+
+
+def mask_from_bitmap(bitmap: int, length: int) -> np.ndarray:
+    """Unpack an int bitmap into a boolean array of `length` slots"""
+    raw = np.frombuffer(bitmap.to_bytes((length + 7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(raw, count=length, bitorder='little').astype(bool)
+
+
+class Bitmap:
+    """Set of slots kept as a sorted int32 array, with a cached int bitmap for fast intersection
+
+    Slots are mostly added in increasing order (new leads take new slots),
+    which appends to the array. Other writes wait in small pending sets
+    that are merged into the array on the next read, or once they grow
+    past a sixty-fourth of it. The int bitmap spans every slot up to the
+    highest one, so it is only cached for dense sets (at least one slot
+    in 64); sparse ones, like most postings of a high-cardinality field,
+    build it per call or are counted from their slot array instead.
+    """
+
+    __slots__ = ('_slots', '_high', '_added', '_removed', '_bitmap', '_array')
+
+    def __init__(self):
+        self._slots = array('i')
+        self._high = -1
+        self._added: Optional[Set[int]] = None
+        self._removed: Optional[Set[int]] = None
+        self._bitmap: Optional[int] = None
+        self._array: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._slots) + len(self._added or ()) - len(self._removed or ())
+
+    def add(self, slot: int):
+        self._bitmap = self._array = None
+        if self._removed and slot in self._removed:
+            self._removed.discard(slot)
+        elif slot > self._high:
+            self._slots.append(slot)
+            self._high = slot
+        else:
+            if self._added is None:
+                self._added = set()
+            self._added.add(slot)
+            self._maybe_merge()
+
+    def discard(self, slot: int):
+        """Remove a slot that is in the set"""
+        self._bitmap = self._array = None
+        if self._added and slot in self._added:
+            self._added.discard(slot)
+        else:
+            if self._removed is None:
+                self._removed = set()
+            self._removed.add(slot)
+            self._maybe_merge()
+
+    def _maybe_merge(self):
+        if len(self._added or ()) + len(self._removed or ()) > max(PENDING_SLOTS, len(self._slots) >> 6):
+            self._merge()
+
+    def _merge(self):
+        slots = np.frombuffer(self._slots, dtype=np.int32) if self._slots else np.empty(0, dtype=np.int32)
+        if self._removed:
+            slots = slots[~np.isin(slots, np.fromiter(self._removed, dtype=np.int32, count=len(self._removed)))]
+        if self._added:
+            slots = np.union1d(slots, np.fromiter(self._added, dtype=np.int32, count=len(self._added)))
+        self._slots = array('i', slots.astype(np.int32).tobytes())
+        self._high = int(slots[-1]) if len(slots) else -1
+        self._added = self._removed = None
+
+    @property
+    def dense(self) -> bool:
+        return len(self) * 64 > self._high
+
+    def to_int(self) -> int:
+        if self._bitmap is not None:
+            return self._bitmap
+        bitmap = bitmap_from_slots(self.to_array())
+        if self.dense:
+            self._bitmap = bitmap
+        return bitmap
+
+    def count_within(self, bitmap: int, mask: np.ndarray) -> int:
+        """Number of slots also set in `bitmap`, which `mask` holds unpacked"""
+        if self.dense:
+            return (self.to_int() & bitmap).bit_count()
+        return int(np.count_nonzero(mask[self.to_array()]))
+
+    def to_array(self) -> np.ndarray:
+        """Ascending slot numbers (cheaper than the int bitmap for sparse postings)
+
+        A copy, cached until the next write: a view would pin the slot
+        array, which then could not grow.
+        """
+        if self._array is None:
+            if self._added or self._removed:
+                self._merge()
+            self._array = np.array(self._slots, dtype=np.int32)
+        return self._array
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def tokenize(text: Any) -> List[str]:
+    """Lowercase word tokens of a text, in order, without duplicates"""
+    return list(dict.fromkeys(_TOKEN_RE.findall(str(text or '').lower())))
+
+
+def _padded_trigrams(token: str) -> Set[str]:
+    # Padding gives short tokens trigrams and weights the start of the word
+    return _trigrams(f'  {token} ')
+
+
+def max_typos(token: str) -> int:
+    """Edits tolerated when matching a query token: none below 4 chars, 1 up to 7, then 2"""
+    return 0 if len(token) < 4 else 1 if len(token) < 8 else 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Edit distance (insertions, deletions, substitutions and adjacent transpositions)
+    between a and b, or limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if before is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                distance = min(distance, before[j - 2] + 1)
+            current.append(distance)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class ValueIndex:
+    """Inverted index from an exact (normalized) value to a bitmap of slots"""
+
+    def __init__(self, normalize: Optional[Callable[[Any], Any]] = None):
+        self.normalize = normalize or (lambda value: value)
+        self.postings: Dict[Any, Bitmap] = {}
+        # First-seen spelling of each normalized value, for display (only needed when normalizing)
+        self.labels: Optional[Dict[Any, Any]] = {} if normalize else None
+
+    def add(self, value: Any, slot: int):
+        key = self.normalize(value)
+        bitmap = self.postings.get(key)
+        if bitmap is None:
+            bitmap = self.postings[key] = Bitmap()
+            if self.labels is not None:
+                self.labels[key] = value
+        bitmap.add(slot)
+
+    def discard(self, value: Any, slot: int):
+        key = self.normalize(value)
+        bitmap = self.postings.get(key)
+        if bitmap is not None:
+            bitmap.discard(slot)
+            if not len(bitmap):
+                self._drop(key)
+
+    def _drop(self, key: Any):
+        del self.postings[key]
+        if self.labels is not None:
+            del self.labels[key]
+
+    def label(self, key: Any) -> Any:
+        return self.labels[key] if self.labels is not None else key
+
+    def match(self, value: Any) -> int:
+        bitmap = self.postings.get(self.normalize(value))
+        return bitmap.to_int() if bitmap is not None else 0
+
+
+class SubstringIndex(ValueIndex):
+    """Case-insensitive substring index: distinct values found through a trigram index"""
+
+    def __init__(self):
+        super().__init__(normalize=lambda value: (value or '').lower())
+        self.trigrams: Dict[str, Set[str]] = {}
+
+    def add(self, value: Any, slot: int):
+        key = self.normalize(value)
+        if key not in self.postings:
+            for gram in _trigrams(key):
+                self.trigrams.setdefault(gram, set()).add(key)
+        super().add(value, slot)
+
+    def _drop(self, key: str):
+        super()._drop(key)
+        for gram in _trigrams(key):
+            values = self.trigrams[gram]
+            values.discard(key)
+            if not values:
+                del self.trigrams[gram]
+
+    def match(self, value: Any) -> int:
+        needle = self.normalize(value)
+        if len(needle) < 3:
+            candidates = self.postings
+        else:
+            gram_sets = sorted((self.trigrams.get(gram, set()) for gram in _trigrams(needle)), key=len)
+            candidates = set.intersection(*gram_sets)
+        # Dense postings are OR-ed as int bitmaps, sparse ones packed together from their slots
+        bitmap, sparse = 0, []
+        for key in candidates:
+            if needle in key:
+                posting = self.postings[key]
+                if posting.dense:
+                    bitmap |= posting.to_int()
+                else:
+                    sparse.append(posting.to_array())
+        if sparse:
+            bitmap |= bitmap_from_slots(np.concatenate(sparse))
+        return bitmap
+
+
+class TokenIndex(ValueIndex):
+    """Inverted index from (field, token) to slots, with a vocabulary for typo and prefix lookup
+
+    Distinct tokens are indexed by padded trigram (for typo candidates,
+    verified by edit distance) and kept in a sorted list (for prefixes).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.fields_by_token: Dict[str, Set[str]] = {}
+        self.trigrams: Dict[str, Set[str]] = {}
+        self.vocabulary: List[str] = []
+        self.expansions = LRUCache(EXPANSION_CACHE_SIZE)
+
+    def add(self, value: Tuple[str, str], slot: int):
+        if value not in self.postings:
+            field, token = value
+            fields = self.fields_by_token.get(token)
+            if fields is None:
+                fields = self.fields_by_token[token] = set()
+                for gram in _padded_trigrams(token):
+                    self.trigrams.setdefault(gram, set()).add(token)
+                bisect.insort(self.vocabulary, token)
+                self.expansions.clear()
+            fields.add(field)
+        super().add(value, slot)
+
+    def _drop(self, key: Tuple[str, str]):
+        super()._drop(key)
+        field, token = key
+        fields = self.fields_by_token[token]
+        fields.discard(field)
+        if fields:
+            return
+        del self.fields_by_token[token]
+        for gram in _padded_trigrams(token):
+            tokens = self.trigrams[gram]
+            tokens.discard(token)
+            if not tokens:
+                del self.trigrams[gram]
+        del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+        self.expansions.clear()
+
+    def expand(self, token: str, prefix: bool = False) -> List[Tuple[str, float]]:
+        """Vocabulary tokens matching a query token, with a similarity in (0, 1]
+
+        Exact matches score 1, matches within max_typos() edits score
+        1 - edits / length, and (with prefix=True) tokens starting with the
+        query token score by how much of the token was typed.
+        """
+        key = (token, prefix)
+        cached = self.expansions.get(key)
+        if cached is not None:
+            return cached
+
+        matches: Dict[str, float] = {}
+        if token in self.fields_by_token:
+            matches[token] = 1.0
+
+        typos = max_typos(token)
+        if typos:
+            # q-gram lemma: an edit changes at most 4 (a transposition) of the len + 1 padded trigrams
+            min_shared = len(token) + 1 - 4 * typos
+            shared = Counter()
+            for gram in _padded_trigrams(token):
+                shared.update(self.trigrams.get(gram, ()))
+            for candidate, count in shared.items():
+                if count >= min_shared and candidate != token:
+                    distance = edit_distance(token, candidate, typos)
+                    if distance <= typos:
+                        matches[candidate] = max(matches.get(candidate, 0.0),
+                                                 1 - distance / max(len(token), len(candidate)))
+
+        if prefix:
+            start = bisect.bisect_left(self.vocabulary, token)
+            for candidate in self.vocabulary[start:start + MAX_TOKEN_EXPANSIONS]:
+                if not candidate.startswith(token):
+                    break
+                matches[candidate] = max(matches.get(candidate, 0.0), 0.5 + 0.5 * len(token) / len(candidate))
+
+        expanded = sorted(matches.items(), key=lambda item: (-item[1], item[0]))[:MAX_TOKEN_EXPANSIONS]
+        self.expansions.put(key, expanded)
+        return expanded
+
+
+class LeadIndex:
+    """Bitmap inverted indexes over the /api/leads filter fields
+
+    Each lead gets a slot (a bit position) in insertion order, so decoding
+    a bitmap yields leads in the same order as the store. Slots of deleted
+    leads are not reused. Subscribe the index to a LeadStore to keep it
+    in sync with writes.
+
+    A TokenIndex over SEARCH_FIELDS and a per-slot score array back
+    `search()`; a SortedKeys index per SORT_FIELDS order backs
+    `sorted_page()`.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._slot_by_id: Dict[int, int] = {}
+        self._ids: List[Optional[int]] = []
+        self._scores = np.zeros(1024, dtype=np.float64)
+        self._live = Bitmap()
+        self.search_index = TokenIndex()
+        self.fields = {
+            'tech_stack': ValueIndex(normalize=lambda value: value.lower()),
+            'location': SubstringIndex(),
+            'company_size': ValueIndex(),
+            'role': SubstringIndex(),
+            'industry': SubstringIndex(),
+            'recommendation': ValueIndex(),
+        }
+        self.sort_keys = {name: SortedKeys() for name in SORT_FIELDS}
+
+    @staticmethod
+    def _values(field: str, lead: Dict[str, Any]) -> Iterable[Any]:
+        if field == 'tech_stack':
+            return set(lead.get('tech_stack', []))
+        if field == 'recommendation':
+            return [lead.get('quality_assessment', {}).get('recommendation')]
+        return [lead.get(field)]
+
+    @staticmethod
+    def _search_terms(lead: Dict[str, Any]) -> Set[Tuple[str, str]]:
+        return {(field, token) for field in SEARCH_FIELDS for token in tokenize(lead.get(field))}
+
+    def on_change(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """LeadStore listener: move the lead's slot between postings"""
+        with self._lock:
+            lead_id = (old or new)['id']
+            slot = self._slot_by_id.get(lead_id)
+            if old is not None and slot is not None:
+                for field, index in self.fields.items():
+                    for value in self._values(field, old):
+                        index.discard(value, slot)
+                for term in self._search_terms(old):
+                    self.search_index.discard(term, slot)
+            if new is None:
+                if slot is not None:
+                    for name, sort_value in SORT_FIELDS.items():
+                        self.sort_keys[name].discard(sort_value(old), lead_id)
+                    del self._slot_by_id[lead_id]
+                    self._ids[slot] = None
+                    self._live.discard(slot)
+                return
+            indexed = old is not None and slot is not None
+            if slot is None:
+                slot = self._slot_by_id[lead_id] = len(self._ids)
+                self._ids.append(lead_id)
+                self._live.add(slot)
+                if slot == len(self._scores):
+                    self._scores = np.concatenate([self._scores, np.zeros(len(self._scores))])
+            for field, index in self.fields.items():
+                for value in self._values(field, new):
+                    index.add(value, slot)
+            for term in self._search_terms(new):
+                self.search_index.add(term, slot)
+            self._scores[slot] = new.get('score', 0)
+            for name, sort_value in SORT_FIELDS.items():
+                value = sort_value(new)
+                if indexed:
+                    old_value = sort_value(old)
+                    if old_value == value:
+                        continue
+                    self.sort_keys[name].discard(old_value, lead_id)
+                self.sort_keys[name].add(value, lead_id, slot)
+
+    def filter(self, **filters: Any) -> List[int]:
+        """Ids of leads matching every non-empty filter, in store order
+
+        tech_stack, company_size and recommendation (the quality assessment's)
+        match exactly, tech_stack ignoring case; location, role and industry
+        match case-insensitive substrings.
+        """
+        with self._lock:
+            bitmap = self._filter_bitmap(**filters)
+            ids = self._ids
+            return [ids[slot] for slot in slots_from_bitmap(bitmap).tolist()]
+
+    def match(self, min_score: Optional[float] = None, **filters: Any) -> int:
+        """Slot bitmap of the leads matching every non-empty filter and min_score, for sorted_page()"""
+        with self._lock:
+            bitmap = self._filter_bitmap(**filters)
+            if min_score:
+                bitmap &= bitmap_from_mask(self._scores[:len(self._ids)] >= min_score)
+            return bitmap
+
+    def sorted_page(self, sort_by: str, descending: bool, bitmap: int, limit: Optional[int] = None,
+                    after: Optional[Tuple] = None) -> Tuple[List[int], Optional[Tuple[float, int]]]:
+        """Ids of the leads in `bitmap` ordered by SORT_FIELDS[sort_by], equal values by id
+
+        Walks the maintained sort index and keeps the matching leads until
+        `limit` (default: no limit) are found, so nothing is sorted per
+        request. Returns the page and the (value, id) key to resume after,
+        or None on the last page. Raises ValueError for a malformed `after`.
+        """
+        if after is not None and not (
+            len(after) == 2 and isinstance(after[0], (int, float)) and not isinstance(after[0], bool)
+            and isinstance(after[1], int) and not isinstance(after[1], bool)
+        ):
+            raise ValueError('Invalid cursor')
+        with self._lock:
+            # Without a cursor the walk can stop as soon as every match was seen
+            remaining = bitmap.bit_count() if after is None else None
+            mask = None if bitmap == self._live.to_int() else mask_from_bitmap(bitmap, len(self._ids))
+            wanted = None if limit is None else limit + 1
+            value_parts, id_parts, found = [], [], 0
+            for values, ids, slots in self.sort_keys[sort_by].walk(descending, after):
+                if mask is not None:
+                    keep = mask[slots]
+                    values, ids = values[keep], ids[keep]
+                if wanted is not None:
+                    values, ids = values[:wanted - found], ids[:wanted - found]
+                value_parts.append(values)
+                id_parts.append(ids)
+                found += len(ids)
+                if found == wanted or found == remaining:
+                    break
+        if not id_parts:
+            return [], None
+        values, ids = np.concatenate(value_parts), np.concatenate(id_parts)
+        if limit is not None and len(ids) > limit:
+            return ids[:limit].tolist(), (values[limit - 1].item(), ids[limit - 1].item())
+        return ids.tolist(), None
+
+    def _filter_bitmap(self, **filters: Any) -> int:
+        bitmap = self._live.to_int()
+        for field, value in filters.items():
+            if value:
+                bitmap &= self.fields[field].match(value)
+                if not bitmap:
+                    break
+        return bitmap
+
+    def facets(self, fields: Iterable[str], min_score: Optional[float] = None,
+               **filters: Any) -> Tuple[int, Dict[str, List[Tuple[Any, int]]]]:
+        """Lead count matching the filters, and per facet field each value's matching-lead count
+
+        A field's counts apply every filter except the field's own, so they
+        show what selecting a different value would return. Dense postings
+        are counted by popcount of their bitmap intersected with the other
+        filters, sparse ones by looking their slots up in the unpacked
+        filters; a field with no other filters applied uses its posting
+        sizes.
+        Values are ordered by count, then value.
+        """
+        with self._lock:
+            live = self._live.to_int()
+            masks = {field: self.fields[field].match(value) for field, value in filters.items() if value}
+            if min_score:
+                masks[None] = bitmap_from_mask(self._scores[:len(self._ids)] >= min_score)
+
+            total = live
+            for mask in masks.values():
+                total &= mask
+
+            facets = {}
+            for field in fields:
+                index = self.fields[field]
+                base = live
+                for name, mask in masks.items():
+                    if name != field:
+                        base &= mask
+                if base == live:
+                    counts = [(key, len(posting)) for key, posting in index.postings.items()]
+                else:
+                    mask = mask_from_bitmap(base, len(self._ids))
+                    counts = [(key, posting.count_within(base, mask)) for key, posting in index.postings.items()]
+                facets[field] = sorted(
+                    ((index.label(key), count) for key, count in counts if key),
+                    key=lambda item: (-item[1], str(item[0]))
+                )
+            return total.bit_count(), facets
+
+    def search(self, query: str, **filters: Any) -> Tuple[List[int], np.ndarray, np.ndarray]:
+        """Leads matching every token of query and every filter: (ids, relevance, scores)
+
+        Query tokens match field tokens exactly, within max_typos() edits
+        or, for the last token (still being typed), as a prefix. A lead's
+        relevance sums, per query token, its best SEARCH_FIELDS weight times
+        match similarity. Results are in store order; scores are the
+        leads' stored lead scores.
+        """
+        empty = ([], np.empty(0), np.empty(0))
+        tokens = tokenize(query)
+        if not tokens:
+            return empty
+
+        with self._lock:
+            slots = relevance = None
+            for position, token in enumerate(tokens):
+                token_slots, token_relevance = self._match_token(token, prefix=position == len(tokens) - 1)
+                if slots is None:
+                    slots, relevance = token_slots, token_relevance
+                else:
+                    slots, mine, theirs = np.intersect1d(slots, token_slots, assume_unique=True, return_indices=True)
+                    relevance = relevance[mine] + token_relevance[theirs]
+                if not len(slots):
+                    return empty
+
+            if any(filters.values()):
+                allowed = np.isin(slots, slots_from_bitmap(self._filter_bitmap(**filters)), assume_unique=True)
+                slots, relevance = slots[allowed], relevance[allowed]
+
+            ids = self._ids
+            return [ids[slot] for slot in slots.tolist()], np.round(relevance, 6), self._scores[slots]
+
+    def _match_token(self, token: str, prefix: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """Ascending slots matching one query token, with each slot's best weighted similarity"""
+        index = self.search_index
+        slot_parts, relevance_parts = [], []
+        for candidate, similarity in index.expand(token, prefix):
+            for field in index.fields_by_token[candidate]:
+                slots = index.postings[(field, candidate)].to_array()
+                slot_parts.append(slots)
+                relevance_parts.append(np.full(len(slots), SEARCH_FIELDS[field] * similarity))
+        if not slot_parts:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        slots = np.concatenate(slot_parts)
+        relevance = np.concatenate(relevance_parts)
+        # Best match per slot: sort by slot, highest relevance first, keep the first of each run
+        order = np.lexsort((-relevance, slots))
+        slots, relevance = slots[order], relevance[order]
+        first = np.ones(len(slots), dtype=bool)
+        first[1:] = slots[1:] != slots[:-1]
+        return slots[first], relevance[first]
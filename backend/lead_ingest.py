@@ -0,0 +1,270 @@
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, IO, Iterator, List, Mapping, Optional, Tuple
+
+from lead_intelligence import enrich_leads
+from lead_snapshot import open_lead_store
+from lead_store import ANNOTATION_FIELDS, DEFAULT_DB_PATH
+from scoring_rules import rules_registry
+
+# Fields added by enrichment or annotation; ignored on input so re-importing an export works
+ENRICHED_FIELDS = (
+    'last_activity_epoch', 'recent_activity_until', 'business_priority_score', 'sales_readiness',
+    'quality_assessment', 'score'
+) + ANNOTATION_FIELDS
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Enrichment processes the API server starts for /api/leads/import (see start_worker_pool)
+SERVER_INGEST_WORKERS = max(1, int(os.environ.get('INGEST_WORKERS', 0)) or os.cpu_count() or 1)
+
+# Per-row errors kept in the report; the error count is always exact
+MAX_REPORTED_ERRORS = 1000
+
+
+def raw_lead(lead: Mapping[str, Any]) -> Dict[str, Any]:
+    """A stored lead as a plain source record: enriched fields dropped, nested views detached"""
+    lead = lead.to_dict() if hasattr(lead, 'to_dict') else dict(lead)
+    return {key: value for key, value in lead.items() if key not in ENRICHED_FIELDS}
+
+
+class RowError(Exception):
+    """A single input row that could not be turned into a lead"""
+
+
+def coerce_lead(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a parsed record (CSV strings or JSON values) into a lead dict"""
+    lead = {key: value for key, value in record.items() if key and key not in ENRICHED_FIELDS}
+
+    try:
+        lead['id'] = int(lead['id'])
+    except (KeyError, TypeError, ValueError):
+        raise RowError('Missing or invalid id')
+
+    if isinstance(lead.get('tech_stack'), str):
+        lead['tech_stack'] = [tech.strip() for tech in lead['tech_stack'].split(',') if tech.strip()]
+
+    if isinstance(lead.get('engagement_score'), str):
+        try:
+            lead['engagement_score'] = int(lead['engagement_score'])
+        except ValueError:
+            raise RowError(f"Invalid engagement_score: {lead['engagement_score']!r}")
+
+    if isinstance(lead.get('email_valid'), str):
+        lead['email_valid'] = lead['email_valid'].strip().lower() in ('1', 'true', 'yes', 'y')
+
+    return lead
+
+
+def parse_csv(stream: IO[str]) -> Iterator[Tuple[int, Any]]:
+    """Incrementally parse CSV rows; yields (line number, lead or RowError)"""
+    reader = csv.DictReader(stream)
+    for record in reader:
+        try:
+            yield reader.line_num, coerce_lead(record)
+        except RowError as e:
+            yield reader.line_num, e
+
+
+def parse_jsonl(stream: IO[str]) -> Iterator[Tuple[int, Any]]:
+    """Incrementally parse JSON Lines; yields (line number, lead or RowError)"""
+    for line_num, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise RowError('Expected a JSON object')
+            yield line_num, coerce_lead(record)
+        except json.JSONDecodeError as e:
+            yield line_num, RowError(f'Invalid JSON: {e.msg}')
+        except RowError as e:
+            yield line_num, e
+
+
+PARSERS = {'csv': parse_csv, 'jsonl': parse_jsonl}
+
+
+def enrich_batch(batch: List[Tuple[int, Dict[str, Any]]]) -> Tuple[List, List, List]:
+    """Worker entry point: enrich a batch, falling back to per-row enrichment on failure
+
+    Returns (leads, enriched leads, [(line number, error message)]).
+    """
+    # Long-lived workers pick up rules reloaded since they started
+    rules_registry.refresh()
+    leads = [lead for _, lead in batch]
+    try:
+        return leads, enrich_leads(leads), []
+    except Exception:
+        ok_leads, enriched, errors = [], [], []
+        for line_num, lead in batch:
+            try:
+                enriched.extend(enrich_leads([lead]))
+                ok_leads.append(lead)
+            except Exception as e:
+                errors.append((line_num, f'Enrichment failed: {e}'))
+        return ok_leads, enriched, errors
+
+
+class IngestReport:
+    """Progress and outcome of an ingestion run"""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.unchanged = 0
+        self.error_count = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def add_error(self, line_num: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_num, 'error': message})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'unchanged': self.unchanged,
+            'error_count': self.error_count,
+            'errors': self.errors
+        }
+
+
+def _context():
+    # Fork where available so workers don't re-import the Flask app and reload the store
+    return multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+
+
+def start_worker_pool(workers: int = SERVER_INGEST_WORKERS) -> ProcessPoolExecutor:
+    """Enrichment pool shared by every ingest() call of a long-running, threaded server
+
+    Forking a process that runs other threads can copy a lock one of them
+    holds into the child, which then deadlocks. Call this at startup,
+    before any thread starts and before leads are loaded: every worker is
+    forked right away, small, and reused for each import.
+    """
+    pool = ProcessPoolExecutor(workers, mp_context=_context())
+    # With fork, the first task starts all workers
+    pool.submit(int).result()
+    return pool
+
+
+def ingest(stream: IO[str], fmt: str, store, workers: Optional[int] = None,
+           batch_size: int = DEFAULT_BATCH_SIZE,
+           progress: Optional[Callable[[IngestReport], None]] = None,
+           pool: Optional[ProcessPoolExecutor] = None) -> IngestReport:
+    """Parse a lead stream and write it to the store, enriching batches in a process pool
+
+    Unchanged leads are skipped before enrichment. Inputs that fit in a
+    single batch are enriched inline without starting worker processes.
+    Without `pool`, a pool is started for the run and shut down after it;
+    only do that from a single-threaded program like the CLI, and pass a
+    start_worker_pool() pool from a server. `workers` also bounds the
+    batches in flight (two per worker).
+    """
+    report = IngestReport()
+    parse = PARSERS[fmt]
+    max_workers = workers or os.cpu_count() or 1
+    owns_pool = pool is None
+    in_flight = []
+
+    def changed(batch):
+        leads = store.changed_leads([lead for _, lead in batch])
+        report.unchanged += len(batch) - len(leads)
+        # Changed leads keep their annotations (e.g. email verdicts) through re-enrichment
+        annotated = {lead['id']: lead for lead in store.with_annotations(leads)}
+        return [(line_num, annotated[lead['id']]) for line_num, lead in batch if lead['id'] in annotated]
+
+    def write(result):
+        leads, enriched, errors = result
+        store.upsert_enriched(leads, enriched)
+        report.imported += len(leads)
+        for line_num, message in errors:
+            report.add_error(line_num, message)
+        if progress:
+            progress(report)
+
+    def submit(batch):
+        nonlocal pool
+        batch = changed(batch)
+        if not batch:
+            return
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers, mp_context=_context())
+        in_flight.append(pool.submit(enrich_batch, batch))
+        # Bound memory: never hold more than two batches per worker in flight
+        while len(in_flight) > 2 * max_workers:
+            write(in_flight.pop(0).result())
+
+    try:
+        batch = []
+        for line_num, item in parse(stream):
+            report.rows += 1
+            if isinstance(item, RowError):
+                report.add_error(line_num, str(item))
+                continue
+            batch.append((line_num, item))
+            if len(batch) >= batch_size:
+                submit(batch)
+                batch = []
+
+        if not in_flight:
+            # Small input: enrich inline
+            write(enrich_batch(changed(batch)))
+        else:
+            if batch:
+                submit(batch)
+            for future in in_flight:
+                write(future.result())
+    finally:
+        if owns_pool and pool is not None:
+            pool.shutdown()
+
+    return report
+
+
+def detect_format(name: str, content_type: str = '') -> str:
+    """Guess the input format from a file name or content type (defaults to CSV)"""
+    if name.endswith(('.jsonl', '.ndjson')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'jsonl'
+    return 'csv'
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Bulk-import leads from CSV or JSONL')
+    parser.add_argument('path', help='input file, or - for stdin')
+    parser.add_argument('--format', choices=sorted(PARSERS), help='input format (default: from extension)')
+    parser.add_argument('--workers', type=int, default=None, help='enrichment processes (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='lead database path')
+    args = parser.parse_args(argv)
+
+    store = open_lead_store(args.db, enrich=enrich_leads)
+    fmt = args.format or detect_format(args.path)
+
+    def print_progress(report: IngestReport):
+        print(f'\rrows={report.rows} imported={report.imported} '
+              f'unchanged={report.unchanged} errors={report.error_count}', end='', file=sys.stderr)
+
+    if args.path == '-':
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+        report = ingest(stream, fmt, store, args.workers, args.batch_size, print_progress)
+    else:
+        with open(args.path, encoding='utf-8', newline='') as stream:
+            report = ingest(stream, fmt, store, args.workers, args.batch_size, print_progress)
+
+    print(file=sys.stderr)
+    for error in report.errors:
+        print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+    return 1 if report.error_count else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,589 @@
+import hashlib
+import json
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Union
+
+import numpy as np
+
+from batch_scoring import BatchScorer, LeadBlock
+from caching import LRUCache
+from email_validation import email_is_valid
+from scoring_rules import RulesRegistry, ScoringRules, rules_registry
+
+# Role-specific talking points, checked in order against the role title
+ROLE_TALKING_POINTS = {
+    "CTO": ["Technical scalability", "Team productivity", "Infrastructure costs"],
+    "CEO": ["Revenue growth", "Market competition", "Operational efficiency"],
+    "VP": ["Team performance", "Budget management", "Strategic execution"],
+    "Head of": ["Department goals", "Resource allocation", "Cross-functional collaboration"],
+    "Director": ["Project delivery", "Team development", "Process improvement"]
+}
+
+# Activity within this many whole days counts as recent for sales readiness
+RECENT_ACTIVITY_DAYS = 30
+
+def parse_activity_epoch(last_activity: Union[str, float, None]) -> Optional[float]:
+    """Parse an ISO-8601 last_activity into a Unix epoch (naive values are local time)"""
+    if not last_activity:
+        return None
+    if isinstance(last_activity, (int, float)):
+        return float(last_activity)
+    try:
+        return datetime.fromisoformat(last_activity.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+def recent_activity_until(activity_epoch: float) -> float:
+    """Unix time at which activity at activity_epoch stops counting as recent"""
+    return activity_epoch + (RECENT_ACTIVITY_DAYS + 1) * 86400
+
+# Bound on distinct (industry, role bucket, size, stage, ...) playbook variants kept in memory
+PLAYBOOK_CACHE_SIZE = 4096
+
+class BusinessLeadIntelligence:
+    """Business-focused lead intelligence system that aligns with sales workflows"""
+    
+    def __init__(self, registry: RulesRegistry = rules_registry):
+        self.registry = registry
+    
+    @property
+    def rules(self) -> ScoringRules:
+        """Active targeting rules, loaded from scoring_rules.json and hot-reloadable"""
+        return self.registry.current
+        
+    def calculate_business_priority_score(self, lead: Dict[str, Any]) -> float:
+        """
+        Calculate business priority score based on strategic alignment
+        with target market and sales objectives
+        """
+        rules = self.rules
+        score = 0.0
+        
+        # Industry alignment (30%)
+        score += rules.industry_points(lead.get('industry'))
+        
+        # Company size targeting (25%)
+        score += rules.company_size_points(lead.get('company_size', ''))
+        
+        # Role seniority and relevance (25%)
+        score += rules.role_points(lead.get('role', ''))
+        
+        # Tech stack compatibility (20%)
+        tech_stack = lead.get('tech_stack', [])
+        compatible_tech = sum(1 for tech in tech_stack if tech in rules.ideal_tech_stack)
+        if tech_stack:
+            tech_score = (compatible_tech / len(tech_stack)) * 20
+            score += tech_score
+        
+        return min(score, 100.0)
+    
+    def assess_sales_readiness(self, lead: Dict[str, Any], now: Optional[float] = None,
+                               activity_epoch: Optional[float] = None) -> Dict[str, Any]:
+        """Assess lead readiness for sales outreach (as of `now`, a Unix time, default current time)
+
+        Pass `activity_epoch` when last_activity has already been parsed.
+        """
+        readiness = {
+            "stage": "cold",
+            "confidence": 0.0,
+            "recommended_approach": "",
+            "timing_priority": "medium"
+        }
+        
+        # Calculate confidence score
+        confidence_factors = []
+        
+        # Engagement level
+        engagement = lead.get('engagement_score', 0)
+        confidence_factors.append(engagement / 100.0)
+        
+        # Data completeness
+        complete_fields = sum(1 for field in ['email', 'role', 'company', 'industry'] if lead.get(field))
+        confidence_factors.append(complete_fields / 4.0)
+        
+        # Contact validity
+        if email_is_valid(lead):
+            confidence_factors.append(1.0)
+        else:
+            confidence_factors.append(0.3)
+        
+        # Recent activity (enriched leads carry the pre-parsed epoch)
+        if activity_epoch is None:
+            activity_epoch = parse_activity_epoch(lead.get('last_activity_epoch', lead.get('last_activity')))
+        if self._is_recent_activity(activity_epoch, now):
+            confidence_factors.append(0.8)
+        else:
+            confidence_factors.append(0.4)
+        
+        readiness["confidence"] = sum(confidence_factors) / len(confidence_factors)
+        
+        # Determine stage and approach
+        if readiness["confidence"] >= 0.8:
+            readiness["stage"] = "hot"
+            readiness["recommended_approach"] = "Immediate personalized outreach"
+            readiness["timing_priority"] = "high"
+        elif readiness["confidence"] >= 0.6:
+            readiness["stage"] = "warm"
+            readiness["recommended_approach"] = "Nurture sequence with value content"
+            readiness["timing_priority"] = "medium"
+        else:
+            readiness["stage"] = "cold"
+            readiness["recommended_approach"] = "Educational content and brand building"
+            readiness["timing_priority"] = "low"
+        
+        return readiness
+    
+    def _is_recent_activity(self, last_activity: Union[str, float, None], now: Optional[float] = None) -> bool:
+        """Check if lead activity is recent (within 30 days); accepts an ISO date or an epoch"""
+        activity_epoch = parse_activity_epoch(last_activity)
+        if activity_epoch is None:
+            return False
+        
+        return (time.time() if now is None else now) < recent_activity_until(activity_epoch)
+    
+    def role_bucket(self, role: str) -> Optional[str]:
+        """Role group used for talking points (first ROLE_TALKING_POINTS key found in the title)"""
+        for role_key in ROLE_TALKING_POINTS:
+            if role_key.lower() in role.lower():
+                return role_key
+        return None
+    
+    def generate_sales_insights(self, lead: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate actionable sales insights for the lead"""
+        insights = {
+            "key_talking_points": [],
+            "potential_pain_points": [],
+            "value_proposition_focus": "",
+            "competitive_angle": ""
+        }
+        
+        industry = lead.get('industry', '')
+        role = lead.get('role', '')
+        tech_stack = lead.get('tech_stack', [])
+        company_size = lead.get('company_size', '')
+        
+        # Industry-specific insights
+        industry_insights = {
+            "SaaS": ["Scalability challenges", "Customer acquisition costs", "Subscription metrics"],
+            "FinTech": ["Regulatory compliance", "Security requirements", "Payment processing"],
+            "HealthTech": ["HIPAA compliance", "Data security", "Patient experience"],
+            "AI/ML": ["Model training costs", "Data infrastructure", "Talent acquisition"],
+            "Cybersecurity": ["Threat landscape", "Compliance requirements", "Incident response"],
+            "EdTech": ["User engagement", "Content delivery", "Platform scalability"],
+            "CleanTech": ["Sustainability goals", "Energy efficiency", "Regulatory incentives"]
+        }
+        
+        if industry in industry_insights:
+            insights["potential_pain_points"].extend(industry_insights[industry])
+        
+        # Role-specific talking points
+        role_key = self.role_bucket(role)
+        if role_key:
+            insights["key_talking_points"].extend(ROLE_TALKING_POINTS[role_key])
+        
+        # Tech stack based value proposition
+        if any(tech in tech_stack for tech in ["AWS", "Azure", "GCP"]):
+            insights["value_proposition_focus"] = "Cloud optimization and cost savings"
+        elif any(tech in tech_stack for tech in ["React", "Vue.js", "Angular"]):
+            insights["value_proposition_focus"] = "Frontend performance and user experience"
+        elif any(tech in tech_stack for tech in ["Python", "Node.js", "Java"]):
+            insights["value_proposition_focus"] = "Backend scalability and development efficiency"
+        else:
+            insights["value_proposition_focus"] = "Overall technical efficiency and productivity"
+        
+        # Company size based competitive angle
+        if company_size in ["11-50", "51-200"]:
+            insights["competitive_angle"] = "Rapid growth and agility focus"
+        elif company_size in ["201-500", "501-1000"]:
+            insights["competitive_angle"] = "Enterprise scalability and reliability"
+        else:
+            insights["competitive_angle"] = "Market leadership and innovation"
+        
+        return insights
+
+class SalesWorkflowIntegrator:
+    """Integrate leads into existing sales workflows and processes"""
+    
+    def __init__(self, business_intel: Optional[BusinessLeadIntelligence] = None):
+        self.business_intel = business_intel or BusinessLeadIntelligence()
+        self.playbook_cache = LRUCache(PLAYBOOK_CACHE_SIZE)
+        self.workflow_stages = {
+            "prospecting": {"duration": "1-2 weeks", "activities": ["Initial outreach", "LinkedIn connection", "Email sequence"]},
+            "qualification": {"duration": "1 week", "activities": ["Discovery call", "Needs assessment", "BANT qualification"]},
+            "demonstration": {"duration": "2 weeks", "activities": ["Product demo", "Technical deep dive", "Use case validation"]},
+            "proposal": {"duration": "1-2 weeks", "activities": ["Solution design", "Proposal creation", "Stakeholder alignment"]},
+            "negotiation": {"duration": "1-3 weeks", "activities": ["Contract review", "Pricing negotiation", "Legal review"]}
+        }
+    
+    def create_sales_playbook(self, lead: Dict[str, Any]) -> Dict[str, Any]:
+        """Create personalized sales playbook for the lead
+        
+        The strategy, timeline and success metrics only depend on a few lead
+        fields, so they are cached by a hash of those fields (plus the rules
+        version) and shared between leads; treat them as read-only.
+        """
+        business_intel = self.business_intel
+        readiness = lead.get('sales_readiness') or business_intel.assess_sales_readiness(lead)
+        
+        shared = self.playbook_cache.get_or_create(
+            self._playbook_key(lead, readiness),
+            lambda: self._build_shared_playbook(lead, readiness)
+        )
+        
+        playbook = {
+            "lead_profile": {
+                "company": lead.get('company'),
+                "contact": lead.get('contact_name'),
+                "role": lead.get('role'),
+                "industry": lead.get('industry')
+            },
+            "readiness_assessment": readiness,
+            **shared
+        }
+        
+        return playbook
+    
+    def _playbook_key(self, lead: Dict[str, Any], readiness: Dict[str, Any]) -> str:
+        """Content hash of everything the shared playbook sections depend on"""
+        tech_stack = lead.get('tech_stack') or []
+        key_fields = [
+            self.business_intel.rules.version,
+            readiness["stage"],
+            lead.get('industry', ''),
+            self.business_intel.role_bucket(lead.get('role', '')),
+            lead.get('company_size', ''),
+            tech_stack[0] if tech_stack else None
+        ]
+        return hashlib.sha1(json.dumps(key_fields).encode()).hexdigest()
+    
+    def _build_shared_playbook(self, lead: Dict[str, Any], readiness: Dict[str, Any]) -> Dict[str, Any]:
+        insights = self.business_intel.generate_sales_insights(lead)
+        return {
+            "outreach_strategy": self._define_outreach_strategy(lead, readiness, insights),
+            "timeline_projections": self._project_sales_timeline(readiness),
+            "success_metrics": self._define_success_metrics(lead)
+        }
+    
+    def _define_outreach_strategy(self, lead: Dict, readiness: Dict, insights: Dict) -> Dict[str, Any]:
+        """Define personalized outreach strategy"""
+        strategy = {
+            "first_touch": "",
+            "follow_up_sequence": [],
+            "channel_mix": [],
+            "personalization_elements": []
+        }
+        
+        # Determine first touch based on readiness
+        if readiness["stage"] == "hot":
+            strategy["first_touch"] = "Personalized video message or phone call"
+            strategy["channel_mix"] = ["Phone", "Email", "LinkedIn"]
+        elif readiness["stage"] == "warm":
+            strategy["first_touch"] = "Value-based email with industry insights"
+            strategy["channel_mix"] = ["Email", "LinkedIn", "Content marketing"]
+        else:
+            strategy["first_touch"] = "Educational content with soft CTA"
+            strategy["channel_mix"] = ["Content marketing", "Email", "Social media"]
+        
+        # Build follow-up sequence
+        follow_up_steps = []
+        if readiness["stage"] in ["hot", "warm"]:
+            follow_up_steps = [
+                "Day 2: Share relevant case study",
+                "Day 5: Industry insight or article",
+                "Day 10: Invitation to webinar or event",
+                "Day 15: Final value proposition"
+            ]
+        else:
+            follow_up_steps = [
+                "Week 1: Industry trends report",
+                "Week 3: Customer success story",
+                "Week 6: Product update or feature highlight",
+                "Week 9: Re-engagement offer"
+            ]
+        
+        strategy["follow_up_sequence"] = follow_up_steps
+        
+        # Personalization elements
+        personalization = []
+        if insights["key_talking_points"]:
+            personalization.append(f"Focus on {insights['key_talking_points'][0]}")
+        if insights["potential_pain_points"]:
+            personalization.append(f"Address {insights['potential_pain_points'][0]}")
+        if lead.get('tech_stack'):
+            personalization.append(f"Reference {lead['tech_stack'][0]} experience")
+        
+        strategy["personalization_elements"] = personalization
+        
+        return strategy
+    
+    def _project_sales_timeline(self, readiness: Dict) -> Dict[str, str]:
+        """Project sales timeline based on lead readiness"""
+        base_timeline = {
+            "prospecting": "1-2 weeks",
+            "qualification": "1-2 weeks", 
+            "demonstration": "2-3 weeks",
+            "proposal": "2-3 weeks",
+            "negotiation": "2-4 weeks"
+        }
+        
+        if readiness["stage"] == "hot":
+            # Accelerated timeline for hot leads
+            return {k: self._shorten_timeline(v) for k, v in base_timeline.items()}
+        elif readiness["stage"] == "cold":
+            # Extended timeline for cold leads
+            return {k: self._extend_timeline(v) for k, v in base_timeline.items()}
+        else:
+            return base_timeline
+    
+    def _shorten_timeline(self, timeline: str) -> str:
+        """Shorten timeline by 25%"""
+        span, _, unit = timeline.partition(' ')
+        parts = span.split('-')
+        if len(parts) == 2:
+            return f"{max(1, int(parts[0])-1)}-{max(1, int(parts[1])-1)} {unit}"
+        return timeline
+    
+    def _extend_timeline(self, timeline: str) -> str:
+        """Extend timeline by 50%"""
+        span, _, unit = timeline.partition(' ')
+        parts = span.split('-')
+        if len(parts) == 2:
+            return f"{int(parts[0])+1}-{int(parts[1])+1} {unit}"
+        return timeline
+    
+    def _define_success_metrics(self, lead: Dict) -> Dict[str, Any]:
+        """Define success metrics for this lead"""
+        company_size = lead.get('company_size', '')
+        
+        # Different metrics based on company size
+        if company_size in ["201-500", "501-1000"]:
+            return {
+                "deal_size_target": "$50K - $150K ACV",
+                "sales_cycle_target": "60-90 days",
+                "conversion_probability": "25-40%",
+                "key_metrics": ["Executive sponsorship", "ROI calculation", "Competitive displacement"]
+            }
+        elif company_size in ["51-200", "101-200"]:
+            return {
+                "deal_size_target": "$25K - $75K ACV",
+                "sales_cycle_target": "45-75 days",
+                "conversion_probability": "35-50%",
+                "key_metrics": ["Department adoption", "User engagement", "Feature utilization"]
+            }
+        else:
+            return {
+                "deal_size_target": "$10K - $30K ACV",
+                "sales_cycle_target": "30-60 days",
+                "conversion_probability": "45-60%",
+                "key_metrics": ["Quick time-to-value", "Ease of implementation", "Immediate pain relief"]
+            }
+
+class LeadQualityOptimizer:
+    """Optimize lead quality and minimize irrelevant data"""
+    
+    def __init__(self, business_intel: Optional[BusinessLeadIntelligence] = None):
+        self.business_intel = business_intel or BusinessLeadIntelligence()
+        self.quality_thresholds = {
+            "min_engagement_score": 50,
+            "min_data_completeness": 0.6,
+            "required_fields": ["company", "contact_name", "email", "role"]
+        }
+    
+    def assess_lead_quality(self, lead: Dict[str, Any]) -> Dict[str, Any]:
+        """Comprehensive lead quality assessment"""
+        quality = {
+            "overall_score": 0.0,
+            "data_completeness": 0.0,
+            "contact_accuracy": 0.0,
+            "strategic_fit": 0.0,
+            "actionability": 0.0,
+            "recommendation": "pursue"  # pursue, nurture, discard
+        }
+        
+        # Data completeness (25%)
+        complete_fields = sum(1 for field in self.quality_thresholds["required_fields"] if lead.get(field))
+        quality["data_completeness"] = complete_fields / len(self.quality_thresholds["required_fields"])
+        
+        # Contact accuracy (25%)
+        accuracy_score = 0.0
+        if email_is_valid(lead):
+            accuracy_score += 0.5
+        if lead.get('linkedin_url'):
+            accuracy_score += 0.3
+        if self._validate_contact_name(lead.get('contact_name')):
+            accuracy_score += 0.2
+        quality["contact_accuracy"] = accuracy_score
+        
+        # Strategic fit (25%)
+        quality["strategic_fit"] = self.business_intel.calculate_business_priority_score(lead) / 100.0
+        
+        # Actionability (25%)
+        action_score = 0.0
+        if lead.get('engagement_score', 0) >= self.quality_thresholds["min_engagement_score"]:
+            action_score += 0.4
+        if quality["data_completeness"] >= self.quality_thresholds["min_data_completeness"]:
+            action_score += 0.3
+        if quality["contact_accuracy"] >= 0.7:
+            action_score += 0.3
+        quality["actionability"] = action_score
+        
+        # Overall score
+        quality["overall_score"] = (
+            quality["data_completeness"] * 0.25 +
+            quality["contact_accuracy"] * 0.25 +
+            quality["strategic_fit"] * 0.25 +
+            quality["actionability"] * 0.25
+        )
+        
+        # Recommendation
+        if quality["overall_score"] >= 0.7:
+            quality["recommendation"] = "pursue"
+        elif quality["overall_score"] >= 0.5:
+            quality["recommendation"] = "nurture"
+        else:
+            quality["recommendation"] = "discard"
+        
+        return quality
+    
+    def _validate_contact_name(self, name: str) -> bool:
+        """Validate contact name format"""
+        if not name:
+            return False
+        # Check if name has at least two parts (first and last name)
+        name_parts = name.strip().split()
+        return len(name_parts) >= 2 and all(len(part) > 1 for part in name_parts)
+    
+    def assess_many(self, leads: List[Dict[str, Any]],
+                    business_priority: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Batch version of assess_lead_quality with identical results
+        
+        Each quality component is computed as a column operation over the
+        whole batch. Pass precomputed business priority scores to skip
+        re-scoring; the input dicts are never modified.
+        """
+        n = len(leads)
+        thresholds = self.quality_thresholds
+        required_fields = thresholds["required_fields"]
+        
+        def column(values, dtype=bool):
+            return np.fromiter(values, dtype=dtype, count=n)
+        
+        # Data completeness (25%)
+        complete_fields = sum(column(bool(lead.get(field)) for lead in leads).astype(np.int64) for field in required_fields)
+        data_completeness = complete_fields / len(required_fields)
+        
+        # Contact accuracy (25%)
+        contact_accuracy = np.zeros(n)
+        contact_accuracy += np.where(column(email_is_valid(lead) for lead in leads), 0.5, 0.0)
+        contact_accuracy += np.where(column(bool(lead.get('linkedin_url')) for lead in leads), 0.3, 0.0)
+        contact_accuracy += np.where(column(self._validate_contact_name(lead.get('contact_name')) for lead in leads), 0.2, 0.0)
+        
+        # Strategic fit (25%)
+        if business_priority is None:
+            business_priority = BatchScorer(self.business_intel.registry).business_priority_scores(LeadBlock.from_leads(leads))
+        strategic_fit = business_priority / 100.0
+        
+        # Actionability (25%)
+        engagement = column((lead.get('engagement_score', 0) for lead in leads), dtype=np.float64)
+        actionability = np.zeros(n)
+        actionability += np.where(engagement >= thresholds["min_engagement_score"], 0.4, 0.0)
+        actionability += np.where(data_completeness >= thresholds["min_data_completeness"], 0.3, 0.0)
+        actionability += np.where(contact_accuracy >= 0.7, 0.3, 0.0)
+        
+        # Overall score
+        overall_score = (
+            data_completeness * 0.25 +
+            contact_accuracy * 0.25 +
+            strategic_fit * 0.25 +
+            actionability * 0.25
+        )
+        
+        # Recommendation
+        recommendation = np.where(overall_score >= 0.7, "pursue", np.where(overall_score >= 0.5, "nurture", "discard"))
+        
+        return [
+            {
+                "overall_score": values[0],
+                "data_completeness": values[1],
+                "contact_accuracy": values[2],
+                "strategic_fit": values[3],
+                "actionability": values[4],
+                "recommendation": values[5]
+            }
+            for values in zip(
+                overall_score.tolist(), data_completeness.tolist(), contact_accuracy.tolist(),
+                strategic_fit.tolist(), actionability.tolist(), recommendation.tolist()
+            )
+        ]
+    
+    def filter_high_quality_leads(self, leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Filter leads to only high-quality, actionable prospects
+        
+        Returns copies of the pursue-worthy leads with their quality_assessment
+        attached; the input dicts are left untouched.
+        """
+        return [
+            {**lead, 'quality_assessment': quality}
+            for lead, quality in zip(leads, self.assess_many(leads))
+            if quality["recommendation"] == "pursue"
+        ]
+
+# Initialize business intelligence components
+business_intel = BusinessLeadIntelligence()
+workflow_integrator = SalesWorkflowIntegrator(business_intel)
+quality_optimizer = LeadQualityOptimizer(business_intel)
+
+def calculate_lead_score(lead: Dict[str, Any]) -> int:
+    """
+    Enhanced lead scoring with business context
+    """
+    rules = rules_registry.current
+    base_score = lead.get('engagement_score', 50)
+
+    base_score += rules.lead_role_points(lead.get('role', ''))
+
+    base_score += rules.lead_size_scores.get(lead.get('company_size', ''), 0)
+
+    base_score += rules.lead_funding_scores.get(lead.get('funding_stage', ''), 0)
+
+    if email_is_valid(lead):
+        base_score += 10
+
+    # Add business priority bonus (up to 20 points)
+    business_priority = lead.get('business_priority_score', 0)
+    business_bonus = int((business_priority / 100) * 20)
+    base_score += business_bonus
+
+    return min(base_score, 100)
+
+batch_scorer = BatchScorer(rules_registry)
+
+def enrich_leads(leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Enhance a batch of leads with business intelligence; run once when leads are written"""
+    rules = rules_registry.current
+    block = LeadBlock.from_leads(leads)
+    priority_scores = batch_scorer.business_priority_scores(block, rules)
+    lead_scores = batch_scorer.lead_scores(block, priority_scores, rules)
+    qualities = quality_optimizer.assess_many(leads, priority_scores)
+
+    now = time.time()
+    enhanced_leads = []
+    for lead, priority_score, lead_score, quality in zip(leads, priority_scores.tolist(), lead_scores.tolist(), qualities):
+        enhanced_lead = lead.copy()
+        # Bookkeeping (INTERNAL_FIELDS, never served): the parsed last activity, for sorting and
+        # re-assessment without date parsing, and when readiness stops counting it as recent
+        activity_epoch = parse_activity_epoch(lead.get('last_activity'))
+        until = recent_activity_until(activity_epoch) if activity_epoch is not None else None
+        enhanced_lead['last_activity_epoch'] = activity_epoch
+        enhanced_lead['recent_activity_until'] = until if until is not None and now < until else None
+        # Add business priority score
+        enhanced_lead['business_priority_score'] = priority_score
+        # Add sales readiness assessment
+        enhanced_lead['sales_readiness'] = business_intel.assess_sales_readiness(lead, now, activity_epoch)
+        # Add quality assessment
+        enhanced_lead['quality_assessment'] = quality
+        # Add lead score (depends on the business priority score)
+        enhanced_lead['score'] = lead_score
+        enhanced_leads.append(enhanced_lead)
+    return enhanced_leads
@@ -0,0 +1,526 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from caching import LRUCache
+from lead_store import LeadStore, raw_json
+from lead_table import INTERNAL_FIELDS, LeadRecord
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, and no pre-forked workers either
+    fcntl = None
+
+# When set, the app and the ingest CLI share leads through a snapshot at this path (see gunicorn.conf.py)
+SNAPSHOT_PATH = os.environ.get('LEADS_SNAPSHOT_PATH')
+
+HEADER = struct.Struct('<8sQQQ')  # magic, dataset version, lead count, version of the base it overlays
+MAGIC = b'LEADSNP2'
+TABLE_DTYPE = np.dtype([
+    ('id', '<i8'),
+    ('offset', '<u8'),
+    ('raw_length', '<u4'),
+    ('enriched_length', '<u4'),
+    ('internal_length', '<u4'),
+    ('digest', '<u8'),
+])
+
+# (id, raw JSON, public enriched JSON, internal fields JSON); an empty raw record marks a deleted lead
+Entry = Tuple[int, bytes, bytes, bytes]
+TOMBSTONE = (b'', b'', b'')
+
+# Writes go to the overlay until it holds more leads than this share of the base (and at
+# least OVERLAY_MIN_LEADS); then both are merged into a new base
+OVERLAY_MAX_FRACTION = 0.125
+OVERLAY_MIN_LEADS = 4096
+
+# Decoded leads kept per process, so hot leads are not decoded again on every read
+RECORD_CACHE_SIZE = 10_000
+
+# Writers wait this long for another process's write transaction to finish
+WRITE_LOCK_TIMEOUT_MS = 60000
+
+
+def _digest(raw: bytes, enriched: bytes, internal: bytes) -> int:
+    h = hashlib.blake2b(raw, digest_size=8)
+    h.update(enriched)
+    h.update(internal)
+    return int.from_bytes(h.digest(), 'little')
+
+
+def snapshot_entry(lead_id: int, raw: str, enriched: Mapping[str, Any]) -> Entry:
+    """A lead as stored in a snapshot
+
+    The enriched lead is split into its public fields, encoded the way API
+    responses encode them (compact, sorted keys) so they can be served as
+    is, and the INTERNAL_FIELDS bookkeeping.
+    """
+    public = {key: value for key, value in enriched.items() if key not in INTERNAL_FIELDS}
+    internal = {key: enriched[key] for key in sorted(INTERNAL_FIELDS) if key in enriched}
+    return (lead_id, raw.encode(), json.dumps(public, sort_keys=True, separators=(',', ':')).encode(),
+            json.dumps(internal).encode())
+
+
+class LeadSnapshot:
+    """Immutable, memory-mapped file of leads in store order
+
+    Layout: a header, a table with one TABLE_DTYPE row per lead, then each
+    lead's raw JSON, public enriched JSON and internal fields back to back,
+    in table order. Every process maps the same file, so the bytes live once
+    in the page cache however many workers read them; leads are decoded on
+    access.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, count, self.base_version = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a lead snapshot')
+        self.table = np.frombuffer(self._mmap, dtype=TABLE_DTYPE, count=count, offset=HEADER.size)
+        self._data = memoryview(self._mmap)[HEADER.size + self.table.nbytes:]
+        self._order = np.argsort(self.table['id'], kind='stable')
+        self._sorted_ids = self.table['id'][self._order]
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def positions(self, lead_ids: np.ndarray) -> np.ndarray:
+        """Table position of each id, or -1 where the id is not in the snapshot"""
+        lead_ids = np.asarray(lead_ids, dtype=np.int64)
+        if not len(self):
+            return np.full(len(lead_ids), -1, dtype=np.int64)
+        found = np.minimum(np.searchsorted(self._sorted_ids, lead_ids), len(self) - 1)
+        return np.where(self._sorted_ids[found] == lead_ids, self._order[found], -1)
+
+    def entry(self, position: int) -> Entry:
+        row = self.table[position]
+        start = int(row['offset'])
+        raw_end = start + int(row['raw_length'])
+        enriched_end = raw_end + int(row['enriched_length'])
+        return (int(row['id']), self._data[start:raw_end].tobytes(), self._data[raw_end:enriched_end].tobytes(),
+                self._data[enriched_end:enriched_end + int(row['internal_length'])].tobytes())
+
+    def raw(self, position: int) -> bytes:
+        row = self.table[position]
+        start = int(row['offset'])
+        return self._data[start:start + int(row['raw_length'])].tobytes()
+
+    def lead(self, position: int) -> LeadRecord:
+        _, _, enriched, internal = self.entry(position)
+        return LeadRecord(encoded=enriched, internal=json.loads(internal))
+
+    def data_range(self, start: int, stop: int) -> memoryview:
+        """Raw bytes of the entries at table positions [start, stop), which are contiguous"""
+        if start >= stop:
+            return self._data[0:0]
+        end = self.table[stop - 1]
+        return self._data[int(self.table[start]['offset']):
+                          int(end['offset']) + int(end['raw_length']) + int(end['enriched_length'])
+                          + int(end['internal_length'])]
+
+
+class SnapshotView:
+    """A base snapshot with its overlay applied: the dataset at the overlay's version
+
+    The overlay is a small snapshot of the leads written since the base was
+    published, deleted ones as tombstones, so a write rewrites the overlay
+    instead of every lead. Updated leads keep their base position and new
+    leads follow the base ones in overlay order, which preserves store
+    order. An overlay written for an older base, since merged into a new
+    one, is ignored.
+    """
+
+    def __init__(self, base: LeadSnapshot, overlay: Optional[LeadSnapshot] = None):
+        # The files this view was opened from, for SharedLeadStore.refresh()
+        self.inodes = (base.inode, overlay.inode if overlay is not None else None)
+        if overlay is not None and overlay.base_version != base.version:
+            overlay = None
+        self.base, self.overlay = base, overlay
+        self.version = overlay.version if overlay is not None else base.version
+        if overlay is None:
+            self.ids, self.digests = base.table['id'], base.table['digest']
+            self._in_overlay = self._rows = None
+            return
+
+        in_base = base.positions(overlay.table['id'])
+        updated = in_base >= 0
+        deleted = overlay.table['raw_length'] == 0
+        live = np.ones(len(base), dtype=bool)
+        live[in_base[updated & deleted]] = False
+        appended = np.flatnonzero(~updated & ~deleted)
+
+        # Base row -> view position, and overlay row -> view position (-1: deleted)
+        self._base_positions = np.where(live, np.cumsum(live) - 1, -1)
+        self._overlay_positions = np.full(len(overlay), -1, dtype=np.int64)
+        self._overlay_positions[updated & ~deleted] = self._base_positions[in_base[updated & ~deleted]]
+        self._overlay_positions[appended] = np.count_nonzero(live) + np.arange(len(appended))
+
+        in_overlay = np.zeros(len(base), dtype=bool)
+        rows = np.arange(len(base))
+        in_overlay[in_base[updated]] = True
+        rows[in_base[updated]] = np.flatnonzero(updated)
+        self._in_overlay = np.concatenate([in_overlay[live], np.ones(len(appended), dtype=bool)])
+        self._rows = np.concatenate([rows[live], appended])
+        self.ids, self.digests = self._gather('id'), self._gather('digest')
+
+    def _gather(self, column: str) -> np.ndarray:
+        """A table column for every lead in the view, in view order"""
+        values = np.empty(len(self._rows), dtype=self.base.table.dtype[column])
+        values[~self._in_overlay] = self.base.table[column][self._rows[~self._in_overlay]]
+        values[self._in_overlay] = self.overlay.table[column][self._rows[self._in_overlay]]
+        return values
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def positions(self, lead_ids: np.ndarray) -> np.ndarray:
+        """View position of each id, or -1 where the id is not in the dataset"""
+        base_positions = self.base.positions(lead_ids)
+        if self.overlay is None:
+            return base_positions
+        overlay_positions = self.overlay.positions(lead_ids)
+        positions = np.full(len(base_positions), -1, dtype=np.int64)
+        in_base, in_overlay = base_positions >= 0, overlay_positions >= 0
+        positions[in_base] = self._base_positions[base_positions[in_base]]
+        positions[in_overlay] = self._overlay_positions[overlay_positions[in_overlay]]
+        return positions
+
+    def position(self, lead_id: int) -> Optional[int]:
+        position = int(self.positions([lead_id])[0])
+        return position if position >= 0 else None
+
+    def _locate(self, position: int) -> Tuple[LeadSnapshot, int]:
+        if self._rows is None:
+            return self.base, position
+        return (self.overlay if self._in_overlay[position] else self.base), int(self._rows[position])
+
+    def entry(self, position: int) -> Entry:
+        snapshot, row = self._locate(position)
+        return snapshot.entry(row)
+
+    def raw(self, position: int) -> bytes:
+        snapshot, row = self._locate(position)
+        return snapshot.raw(row)
+
+    def lead(self, position: int) -> LeadRecord:
+        snapshot, row = self._locate(position)
+        return snapshot.lead(row)
+
+    def leads(self) -> Iterator[LeadRecord]:
+        for position in range(len(self)):
+            yield self.lead(position)
+
+
+def publish_snapshot(path: str, version: int, previous: Optional[LeadSnapshot],
+                     upserts: Sequence[Entry] = (), deletes: Iterable[int] = (),
+                     base_version: Optional[int] = None):
+    """Atomically replace the snapshot at path with previous plus upserts minus deletes
+
+    Updated leads keep their position and new leads are appended, so store
+    order is preserved. Unchanged runs of entries are copied from previous
+    as single slices. The file is written aside and renamed over the old
+    one, so readers map either the old or the new snapshot, never a partial
+    one. Overlays record the `base_version` they apply to.
+    """
+    deletes = list(deletes)
+    table = previous.table.copy() if previous is not None else np.empty(0, dtype=TABLE_DTYPE)
+    lengths = table['raw_length'].astype(np.int64) + table['enriched_length'] + table['internal_length']
+
+    latest = {lead_id: parts for lead_id, *parts in upserts}
+    for lead_id in deletes:
+        latest.pop(lead_id, None)
+    update_ids = np.fromiter(latest, dtype=np.int64, count=len(latest))
+    update_positions = previous.positions(update_ids) if previous is not None else np.full(len(update_ids), -1)
+    delete_positions = previous.positions(deletes) if previous is not None else np.empty(0, dtype=np.int64)
+
+    replaced = {int(position): latest[int(lead_id)]
+                for lead_id, position in zip(update_ids, update_positions) if position >= 0}
+    appended = [(int(lead_id), *latest[int(lead_id)])
+                for lead_id, position in zip(update_ids, update_positions) if position < 0]
+    keep = np.ones(len(table), dtype=bool)
+    keep[delete_positions[delete_positions >= 0]] = False
+
+    for position, (raw, enriched, internal) in replaced.items():
+        table['raw_length'][position] = len(raw)
+        table['enriched_length'][position] = len(enriched)
+        table['internal_length'][position] = len(internal)
+        table['digest'][position] = _digest(raw, enriched, internal)
+        lengths[position] = len(raw) + len(enriched) + len(internal)
+
+    new_rows = np.zeros(len(appended), dtype=TABLE_DTYPE)
+    new_rows['id'] = [lead_id for lead_id, _, _, _ in appended]
+    new_rows['raw_length'] = [len(raw) for _, raw, _, _ in appended]
+    new_rows['enriched_length'] = [len(enriched) for _, _, enriched, _ in appended]
+    new_rows['internal_length'] = [len(internal) for _, _, _, internal in appended]
+    new_rows['digest'] = [_digest(raw, enriched, internal) for _, raw, enriched, internal in appended]
+    new_table = np.concatenate([table[keep], new_rows])
+    new_lengths = np.concatenate([
+        lengths[keep],
+        new_rows['raw_length'].astype(np.int64) + new_rows['enriched_length'] + new_rows['internal_length'],
+    ])
+    new_table['offset'] = np.cumsum(new_lengths) - new_lengths
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, version, len(new_table), version if base_version is None else base_version))
+        f.write(new_table.tobytes())
+        # Data in table order: runs of untouched entries, then the entries written now
+        run_start = 0
+        for position in sorted(set(replaced) | set(np.flatnonzero(~keep).tolist())):
+            f.write(previous.data_range(run_start, position))
+            if position in replaced:
+                f.write(b''.join(replaced[position]))
+            run_start = position + 1
+        if previous is not None:
+            f.write(previous.data_range(run_start, len(previous)))
+        for _, *parts in appended:
+            f.write(b''.join(parts))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SharedLeadStore(LeadStore):
+    """LeadStore whose enriched leads are read from a shared, memory-mapped snapshot
+
+    Any number of processes can open the same database and snapshot. A
+    write runs in an exclusive SQLite transaction, which also serializes
+    writers across processes, and publishes the leads it changed to the
+    snapshot's overlay before committing (see SnapshotView). `refresh()`
+    maps the newest snapshot and notifies listeners of the leads whose
+    content changed, so each process's indexes follow writes made anywhere.
+
+    Leads are decoded lazily (LeadRecord), and recently read ones are kept
+    decoded in a small per-process cache.
+    """
+
+    def __init__(self, db_path: str, enrich: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+                 snapshot_path: str):
+        self.snapshot_path = snapshot_path
+        self.overlay_path = f'{snapshot_path}.overlay'
+        self.snapshot: Optional[SnapshotView] = None
+        self._records = LRUCache(RECORD_CACHE_SIZE)
+        self._jobs_lock = None
+        super().__init__(db_path, enrich)
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self._conn.rollback()
+            raise
+        self._conn.commit()
+
+    def _db_version(self) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    def _open_view(self) -> SnapshotView:
+        # Overlay first: a base merge renames the new base before any overlay is written for
+        # it, so an overlay read before its base is never newer than that base
+        try:
+            overlay = LeadSnapshot(self.overlay_path)
+        except (FileNotFoundError, ValueError):
+            overlay = None
+        return SnapshotView(LeadSnapshot(self.snapshot_path), overlay)
+
+    def _inodes(self) -> Tuple[Optional[int], Optional[int]]:
+        inodes = []
+        for path in (self.snapshot_path, self.overlay_path):
+            try:
+                inodes.append(os.stat(path).st_ino)
+            except FileNotFoundError:
+                inodes.append(None)
+        return tuple(inodes)
+
+    def _load(self):
+        """Map the snapshot, rebuilding it from the database if it is missing or stale"""
+        self._conn.execute(f'PRAGMA busy_timeout = {WRITE_LOCK_TIMEOUT_MS}')
+        with self._transaction():
+            version = self._db_version()
+            try:
+                current = self._open_view().version
+            except (OSError, ValueError):
+                current = None
+            if current != version:
+                if os.path.exists(self.overlay_path):
+                    os.remove(self.overlay_path)
+                rows = self._conn.execute("SELECT id, raw, enriched FROM leads ORDER BY id")
+                publish_snapshot(self.snapshot_path, version, None, [
+                    snapshot_entry(lead_id, raw, json.loads(enriched)) for lead_id, raw, enriched in rows
+                ])
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Map a newer snapshot if one was published; returns whether anything changed"""
+        inodes = self._inodes()
+        if inodes[0] is None or (self.snapshot is not None and inodes == self.snapshot.inodes):
+            return False
+        with self._lock:
+            old, new = self.snapshot, self._open_view()
+            if old is not None and new.inodes == old.inodes:
+                return False  # another thread mapped it first
+            self.snapshot = new
+            for old_lead, new_lead in self._changes(old, new):
+                self._notify(old_lead, new_lead)
+            self.version = new.version
+        return True
+
+    @staticmethod
+    def _changes(old: Optional[SnapshotView], new: SnapshotView) -> Iterator[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+        """(old, new) lead pairs for every lead inserted, updated or deleted between two snapshots"""
+        if old is None or not len(old):
+            for lead in new.leads():
+                yield None, lead
+            return
+        old_positions = old.positions(new.ids)
+        changed = np.flatnonzero(
+            (old_positions < 0) | (old.digests[np.maximum(old_positions, 0)] != new.digests)
+        )
+        for position in changed.tolist():
+            old_position = int(old_positions[position])
+            yield (old.lead(old_position) if old_position >= 0 else None), new.lead(position)
+        for old_position in np.flatnonzero(new.positions(old.ids) < 0).tolist():
+            yield old.lead(old_position), None
+
+    def subscribe(self, listener: Callable[[Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]):
+        with self._lock:
+            for lead in self.snapshot.leads():
+                listener(None, lead)
+            self._listeners.append(listener)
+
+    def claim_background_jobs(self) -> bool:
+        """Take the job lock next to the snapshot if no other process holds it
+
+        The lock is held until this process exits, so exactly one of the
+        processes sharing the snapshot runs the background jobs, and another
+        can claim them once it is gone.
+        """
+        if self._jobs_lock is not None or fcntl is None:
+            return True
+        lock_file = open(f'{self.snapshot_path}.jobs.lock', 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._jobs_lock = lock_file
+        return True
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    def __contains__(self, lead_id: int) -> bool:
+        return self.snapshot.position(lead_id) is not None
+
+    def _record(self, view: SnapshotView, position: int) -> LeadRecord:
+        key = (int(view.ids[position]), int(view.digests[position]))
+        return self._records.get_or_create(key, lambda: view.lead(position))
+
+    def get(self, lead_id: int) -> Optional[LeadRecord]:
+        view = self.snapshot
+        position = view.position(lead_id)
+        return self._record(view, position) if position is not None else None
+
+    def all(self) -> Iterator[LeadRecord]:
+        # A scan reuses cached records but does not fill the cache, so it holds one lead at a time
+        view = self.snapshot
+        for position in range(len(view)):
+            record = self._records.get((int(view.ids[position]), int(view.digests[position])))
+            yield record if record is not None else view.lead(position)
+
+    def changed_leads(self, leads: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        changed = []
+        for lead in leads:
+            position = self.snapshot.position(lead['id'])
+            if position is None or self.snapshot.raw(position) != raw_json(lead).encode():
+                changed.append(lead)
+        return changed
+
+    def delete_many(self, lead_ids: Iterable[int]) -> int:
+        lead_ids = set(lead_ids)
+        with self._lock:
+            with self._transaction():
+                self.refresh()
+                existing = [lead_id for lead_id in lead_ids if lead_id in self]
+                if existing:
+                    self._conn.executemany("DELETE FROM leads WHERE id = ?", [(i,) for i in existing])
+                    self._publish(deletes=existing)
+            self.refresh()
+        return len(existing)
+
+    def reenrich(self, lead_ids: Optional[Iterable[int]] = None) -> int:
+        with self._lock:
+            self.refresh()
+            if lead_ids is None:
+                positions = range(len(self.snapshot))
+            else:
+                positions = [p for p in (self.snapshot.position(i) for i in lead_ids) if p is not None]
+            leads = [json.loads(self.snapshot.raw(position)) for position in positions]
+            if leads:
+                self.upsert_enriched(leads, self.enrich(self.with_annotations(leads)))
+        return len(leads)
+
+    def _write(self, changed: List[tuple]):
+        if not changed:
+            return
+        with self._transaction():
+            # Merge into the newest snapshot, which may hold other processes' writes
+            self.refresh()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO leads (id, raw, enriched) VALUES (?, ?, ?)",
+                [(lead_id, raw, json.dumps(enriched)) for lead_id, raw, enriched in changed]
+            )
+            self._publish(upserts=[snapshot_entry(*change) for change in changed])
+        self.refresh()
+
+    def _publish(self, upserts: Sequence[Entry] = (), deletes: Iterable[int] = ()):
+        """Bump the version and publish the changes, inside the write transaction
+
+        Changes go to the overlay, which is rewritten in full; once it
+        would outgrow its share of the base, base and overlay are merged
+        into a new base instead, which leaves the old overlay stale.
+        """
+        version = self._db_version() + 1
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (version,))
+        view, deletes = self.snapshot, list(deletes)
+        pending = len(view.overlay or ()) + len(upserts) + len(deletes)
+        if pending <= max(OVERLAY_MIN_LEADS, OVERLAY_MAX_FRACTION * len(view.base)):
+            in_base = view.base.positions(deletes) >= 0
+            tombstones = [(lead_id, *TOMBSTONE) for lead_id, present in zip(deletes, in_base) if present]
+            publish_snapshot(self.overlay_path, version, view.overlay, [*upserts, *tombstones],
+                             [lead_id for lead_id, present in zip(deletes, in_base) if not present],
+                             base_version=view.base.version)
+            return
+
+        latest: Dict[int, Entry] = {}
+        deleted = set()
+        if view.overlay is not None:
+            for row in range(len(view.overlay)):
+                entry = view.overlay.entry(row)
+                if entry[1]:
+                    latest[entry[0]] = entry
+                else:
+                    deleted.add(entry[0])
+        for entry in upserts:
+            latest[entry[0]] = entry
+            deleted.discard(entry[0])
+        deleted.update(deletes)
+        publish_snapshot(self.snapshot_path, version, view.base, list(latest.values()), deleted)
+
+
+def open_lead_store(db_path: str, enrich: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]) -> LeadStore:
+    """A SharedLeadStore when LEADS_SNAPSHOT_PATH is set, otherwise a process-local LeadStore"""
+    if SNAPSHOT_PATH:
+        return SharedLeadStore(db_path, enrich, SNAPSHOT_PATH)
+    return LeadStore(db_path, enrich)
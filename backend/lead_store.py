@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from lead_table import LeadTable
+
+DEFAULT_DB_PATH = os.environ.get(
+    'LEADS_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'leads.db')
+)
+
+# Ids per query when reading raw records back from SQLite
+SQL_BATCH_SIZE = 500
+
+# Fields set by background checks (see LeadStore.annotate_many) rather than by the lead's source.
+# They are enrichment inputs kept with the enriched lead, never part of the raw record or its digest.
+ANNOTATION_FIELDS = ('email_validation',)
+
+
+def raw_digest(raw: str) -> int:
+    """64-bit fingerprint of a lead's canonical raw JSON, for change detection"""
+    return int.from_bytes(hashlib.blake2b(raw.encode(), digest_size=8).digest(), 'little')
+
+
+def raw_json(lead: Mapping[str, Any]) -> str:
+    """Canonical raw JSON of a lead, without annotation fields"""
+    return json.dumps({key: value for key, value in lead.items() if key not in ANNOTATION_FIELDS}, sort_keys=True)
+
+
+class LeadStore:
+    """Persistent lead repository that enriches leads once, when they are written
+
+    Raw and enriched records are kept in an embedded SQLite database and the
+    enriched records are held in memory in a compact LeadTable, so reads
+    never re-run scoring. Enrichment only runs again for leads whose raw
+    data actually changed (by digest), and runs over the changed leads as
+    one batch; raw records are read back from SQLite when re-enriching.
+
+    `version` is a persisted, monotonically increasing dataset version that
+    is bumped by every write, for cache validation.
+
+    Annotations (ANNOTATION_FIELDS) are kept outside the raw record: every
+    enrichment of a lead sees its current annotations, so re-enriching or
+    re-importing an unchanged lead keeps them without changing its digest.
+    """
+
+    def __init__(self, db_path: str, enrich: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]):
+        self.db_path = db_path
+        self.enrich = enrich
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leads ("
+            "id INTEGER PRIMARY KEY, raw TEXT NOT NULL, enriched TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.commit()
+        self.version = 0
+        self._leads = LeadTable()
+        self._listeners: List[Callable[[Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]] = []
+        self._load()
+
+    def _load(self):
+        """Load previously enriched leads without recomputing them"""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        self.version = row[0] if row else 0
+        rows = self._conn.execute("SELECT id, raw, enriched FROM leads ORDER BY id")
+        for lead_id, raw, enriched in rows:
+            self._leads.put(lead_id, json.loads(enriched), raw_digest(raw))
+
+    def subscribe(self, listener: Callable[[Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]):
+        """Register a listener called as listener(old, new) for every insert, update and delete
+
+        Inserts pass old=None and deletes pass new=None. Existing leads are
+        replayed as inserts so the listener starts in sync with the store.
+        Leads may be plain dicts or read-only LeadTable views.
+        """
+        with self._lock:
+            for lead in self._leads.values():
+                listener(None, lead)
+            self._listeners.append(listener)
+
+    def _notify(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        for listener in self._listeners:
+            listener(old, new)
+
+    def refresh(self) -> bool:
+        """Pick up writes made by other processes; a process-local store has none"""
+        return False
+
+    def claim_background_jobs(self) -> bool:
+        """Whether this process should run the background jobs; it is the only one on a process-local store"""
+        return True
+
+    def __len__(self) -> int:
+        return len(self._leads)
+
+    def __contains__(self, lead_id: int) -> bool:
+        return lead_id in self._leads
+
+    def get(self, lead_id: int) -> Optional[Mapping[str, Any]]:
+        """Get an enriched lead by id, as a read-only dict-like view"""
+        return self._leads.get(lead_id)
+
+    def all(self) -> Iterator[Mapping[str, Any]]:
+        """Iterate over all enriched leads as read-only dict-like views
+
+        A generator, so a full scan holds one lead at a time; take list()
+        of it only where every lead is needed at once.
+        """
+        return self._leads.values()
+
+    def upsert_many(self, leads: Iterable[Dict[str, Any]]) -> int:
+        """Insert or update leads, enriching only new or changed ones
+
+        Returns the number of leads that were (re-)enriched.
+        """
+        with self._lock:
+            changed = self.changed_leads(leads)
+            if changed:
+                self.upsert_enriched(changed, self.enrich(self.with_annotations(changed)))
+        return len(changed)
+
+    def changed_leads(self, leads: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Filter out leads whose raw data is identical to what is stored"""
+        return [
+            lead for lead in leads
+            if self._leads.digest(lead['id']) != raw_digest(raw_json(lead))
+        ]
+
+    def with_annotations(self, leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Raw leads with the annotations of their stored versions added, as enrichment input"""
+        annotated = []
+        for lead in leads:
+            stored = self.get(lead['id'])
+            annotations = {} if stored is None else {
+                key: _plain(stored[key]) for key in ANNOTATION_FIELDS if stored.get(key) is not None
+            }
+            annotated.append({**lead, **annotations} if annotations else lead)
+        return annotated
+
+    def annotate_many(self, annotations: Dict[int, Dict[str, Any]]) -> int:
+        """Set annotation fields on stored leads and re-enrich them; their raw records are untouched
+
+        Returns the number of leads written (ids not in the store are skipped).
+        """
+        with self._lock:
+            self.refresh()
+            leads = self._raw_leads([lead_id for lead_id in annotations if lead_id in self])
+            if leads:
+                inputs = [{**lead, **annotations[lead['id']]} for lead in self.with_annotations(leads)]
+                self.upsert_enriched(leads, self.enrich(inputs))
+        return len(leads)
+
+    def upsert_enriched(self, leads: List[Dict[str, Any]], enriched: List[Dict[str, Any]]):
+        """Write leads that were already enriched elsewhere (e.g. in a worker pool)"""
+        with self._lock:
+            self._write([
+                (lead['id'], raw_json(lead), enriched_lead)
+                for lead, enriched_lead in zip(leads, enriched)
+            ])
+
+    def upsert(self, lead: Dict[str, Any]) -> Mapping[str, Any]:
+        """Insert or update a single lead and return its enriched form"""
+        self.upsert_many([lead])
+        return self.get(lead['id'])
+
+    def delete_many(self, lead_ids: Iterable[int]) -> int:
+        """Delete leads by id and return how many existed"""
+        with self._lock:
+            existing = [lead_id for lead_id in set(lead_ids) if lead_id in self._leads]
+            if not existing:
+                return 0
+            self._conn.executemany("DELETE FROM leads WHERE id = ?", [(i,) for i in existing])
+            self._commit_version()
+            for lead_id in existing:
+                self._notify(self._leads.pop(lead_id), None)
+            self.version += 1
+        return len(existing)
+
+    def reenrich(self, lead_ids: Optional[Iterable[int]] = None) -> int:
+        """Re-run enrichment for the given leads (all leads when omitted)"""
+        with self._lock:
+            ids = list(self._leads) if lead_ids is None else [i for i in lead_ids if i in self._leads]
+            leads = self._raw_leads(ids)
+            if leads:
+                self.upsert_enriched(leads, self.enrich(self.with_annotations(leads)))
+        return len(leads)
+
+    def _raw_leads(self, lead_ids: List[int]) -> List[Dict[str, Any]]:
+        """Raw (pre-enrichment) records for the given ids, in the given order"""
+        raw: Dict[int, str] = {}
+        for start in range(0, len(lead_ids), SQL_BATCH_SIZE):
+            batch = lead_ids[start:start + SQL_BATCH_SIZE]
+            raw.update(self._conn.execute(
+                f"SELECT id, raw FROM leads WHERE id IN ({', '.join('?' * len(batch))})", batch
+            ))
+        return [json.loads(raw[lead_id]) for lead_id in lead_ids]
+
+    def _write(self, changed: List[tuple]):
+        if not changed:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO leads (id, raw, enriched) VALUES (?, ?, ?)",
+            [(lead_id, raw, json.dumps(enriched)) for lead_id, raw, enriched in changed]
+        )
+        self._commit_version()
+        for lead_id, raw, enriched in changed:
+            old = self._leads.get(lead_id)
+            # The row is overwritten in place, so listeners get a detached copy of the old lead
+            old = old.to_dict() if old is not None else None
+            self._leads.put(lead_id, enriched, raw_digest(raw))
+            self._notify(old, enriched)
+        # Published after listeners ran, so a reader that sees the new version sees updated indexes
+        self.version += 1
+
+    def _commit_version(self):
+        """Persist the next dataset version in the same transaction as the data change"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (self.version + 1,)
+        )
+        self._conn.commit()
+
+
+def _plain(value: Any) -> Any:
+    return value.to_dict() if hasattr(value, 'to_dict') else value
+
+
+class LazyListener:
+    """A store listener that is only built, and subscribed, when first used
+
+    Wraps `factory()`: the first attribute access creates the listener and
+    subscribes its `on_change` (replaying every lead), later ones delegate
+    to it. A worker process then only pays for the indexes behind the
+    endpoints it actually serves.
+    """
+
+    def __init__(self, store: LeadStore, factory: Callable[[], Any]):
+        self._store = store
+        self._factory = factory
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def _get(self) -> Any:
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    listener = self._factory()
+                    self._store.subscribe(listener.on_change)
+                    self._listener = listener
+        return self._listener
+
+    @property
+    def built(self) -> bool:
+        return self._listener is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
@@ -0,0 +1,645 @@
+import json
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Marks a field that is not present in a row (distinct from a stored None)
+_ABSENT = object()
+
+INITIAL_CAPACITY = 1024
+
+# Stale string bytes that trigger compaction once they also make up half of the string buffers
+COMPACT_GARBAGE_BYTES = 1 << 20
+
+
+def _grow(array: np.ndarray, capacity: int, fill: Any) -> np.ndarray:
+    grown = np.full(capacity, fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class CategoryColumn:
+    """Dictionary-encoded column: an int32 code per row into a list of distinct values
+
+    Values are interned by (type, value), so True and 1 stay distinct.
+    Code -1 means the field is absent.
+    """
+
+    def __init__(self, capacity: int = 0):
+        self.codes = np.full(capacity, -1, dtype=np.int32)
+        self.values: List[Any] = []
+        self._lookup: Dict[Tuple[type, Any], int] = {}
+
+    def grow(self, capacity: int):
+        self.codes = _grow(self.codes, capacity, -1)
+
+    def fits(self, value: Any) -> bool:
+        try:
+            hash(value)
+        except TypeError:
+            return False
+        return True
+
+    def intern(self, value: Any) -> int:
+        key = (type(value), value)
+        code = self._lookup.get(key)
+        if code is None:
+            code = self._lookup[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def set(self, row: int, value: Any):
+        self.codes[row] = self.intern(value)
+
+    def clear(self, row: int):
+        self.codes[row] = -1
+
+    def has(self, row: int) -> bool:
+        return self.codes[row] >= 0
+
+    def get(self, row: int) -> Any:
+        code = self.codes[row]
+        return self.values[code] if code >= 0 else _ABSENT
+
+    def take(self, rows: np.ndarray) -> 'CategoryColumn':
+        """Column of the given rows, dropping values no longer used"""
+        column = type(self)()
+        codes = self.codes[rows]
+        used = np.unique(codes[codes >= 0])
+        remap = np.full(len(self.values) + 1, -1, dtype=np.int32)
+        for code in used.tolist():
+            remap[code] = column.intern(self.values[code])
+        column.codes = remap[codes]
+        return column
+
+
+class TechStackColumn(CategoryColumn):
+    """Tech stacks interned as whole (ordered) combinations, each with a packed bitset
+
+    Leads share a small number of distinct stacks, so a row costs one code.
+    `bits[code]` is the uint64-packed set of the combination's techs over
+    the `techs` vocabulary, for vectorized membership tests.
+    """
+
+    def __init__(self, capacity: int = 0):
+        super().__init__(capacity)
+        self.techs: List[str] = []
+        self._tech_bits: Dict[str, int] = {}
+        self._bits = np.zeros((16, 1), dtype=np.uint64)
+
+    @property
+    def bits(self) -> np.ndarray:
+        return self._bits[:len(self.values)]
+
+    def fits(self, value: Any) -> bool:
+        return type(value) is list and all(type(tech) is str for tech in value)
+
+    def intern(self, value: Any) -> int:
+        combination = tuple(value)
+        key = (tuple, combination)
+        code = self._lookup.get(key)
+        if code is None:
+            code = self._lookup[key] = len(self.values)
+            self.values.append(combination)
+            self._add_bits(combination)
+        return code
+
+    def _add_bits(self, combination: Tuple[str, ...]):
+        code = len(self.values) - 1
+        if code == len(self._bits):
+            self._bits = np.pad(self._bits, ((0, len(self._bits)), (0, 0)))
+        for tech in combination:
+            bit = self._tech_bits.get(tech)
+            if bit is None:
+                bit = self._tech_bits[tech] = len(self.techs)
+                self.techs.append(tech)
+                if bit // 64 == self._bits.shape[1]:
+                    self._bits = np.pad(self._bits, ((0, 0), (0, 1)))
+            self._bits[code, bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+
+    def get(self, row: int) -> Any:
+        code = self.codes[row]
+        return list(self.values[code]) if code >= 0 else _ABSENT
+
+    def mask(self, tech: str, size: int) -> np.ndarray:
+        """Boolean mask over the first `size` rows: True where the stack contains tech"""
+        bit = self._tech_bits.get(tech)
+        if bit is None:
+            return np.zeros(size, dtype=bool)
+        has_tech = np.append((self.bits[:, bit // 64] >> np.uint64(bit % 64)) & np.uint64(1), np.uint64(0))
+        # Code -1 (absent) gathers the trailing zero
+        return has_tech[self.codes[:size]].astype(bool)
+
+
+class StringColumn:
+    """High-cardinality strings packed into one UTF-8 buffer with per-row offsets
+
+    Length -1 means absent and -2 means None. Rewriting a row with the
+    same text reuses its bytes; otherwise the old bytes become garbage,
+    counted in `garbage`, until the table is compacted.
+    """
+
+    def __init__(self, capacity: int = 0):
+        self.offsets = np.zeros(capacity, dtype=np.int64)
+        self.lengths = np.full(capacity, -1, dtype=np.int32)
+        self.buffer = bytearray()
+        self.garbage = 0
+
+    def grow(self, capacity: int):
+        self.offsets = _grow(self.offsets, capacity, 0)
+        self.lengths = _grow(self.lengths, capacity, -1)
+
+    def fits(self, value: Any) -> bool:
+        return value is None or type(value) is str
+
+    def set(self, row: int, value: Optional[str]):
+        if value is None:
+            self.clear(row)
+            self.lengths[row] = -2
+            return
+        data = value.encode('utf-8', 'surrogatepass')
+        offset, length = int(self.offsets[row]), int(self.lengths[row])
+        if length == len(data) and self.buffer[offset:offset + length] == data:
+            return
+        if length > 0:
+            self.garbage += length
+        self.offsets[row] = len(self.buffer)
+        self.lengths[row] = len(data)
+        self.buffer += data
+
+    def clear(self, row: int):
+        length = int(self.lengths[row])
+        if length > 0:
+            self.garbage += length
+        self.lengths[row] = -1
+
+    def has(self, row: int) -> bool:
+        return self.lengths[row] != -1
+
+    def get(self, row: int) -> Any:
+        length = int(self.lengths[row])
+        if length < 0:
+            return None if length == -2 else _ABSENT
+        offset = int(self.offsets[row])
+        return self.buffer[offset:offset + length].decode('utf-8', 'surrogatepass')
+
+    def take(self, rows: np.ndarray) -> 'StringColumn':
+        column = StringColumn(len(rows))
+        column.lengths = self.lengths[rows]
+        buffer = self.buffer
+        for new_row, row in enumerate(rows.tolist()):
+            length = int(self.lengths[row])
+            if length > 0:
+                offset = int(self.offsets[row])
+                column.offsets[new_row] = len(column.buffer)
+                column.buffer += buffer[offset:offset + length]
+        return column
+
+
+class NumberColumn:
+    """Fixed-width numeric column; `state` is 0 when absent, 1 for a number, 2 for None"""
+
+    def __init__(self, kind: type, capacity: int = 0):
+        self.kind = kind
+        self.values = np.zeros(capacity, dtype=np.int64 if kind is int else np.float64)
+        self.state = np.zeros(capacity, dtype=np.int8)
+
+    def grow(self, capacity: int):
+        self.values = _grow(self.values, capacity, 0)
+        self.state = _grow(self.state, capacity, 0)
+
+    def fits(self, value: Any) -> bool:
+        if value is None:
+            return True
+        if type(value) is not self.kind:
+            return False
+        return self.kind is not int or -2 ** 63 <= value < 2 ** 63
+
+    def set(self, row: int, value: Any):
+        if value is None:
+            self.state[row] = 2
+        else:
+            self.values[row] = value
+            self.state[row] = 1
+
+    def clear(self, row: int):
+        self.state[row] = 0
+
+    def has(self, row: int) -> bool:
+        return self.state[row] != 0
+
+    def get(self, row: int) -> Any:
+        state = self.state[row]
+        if state == 1:
+            return self.values[row].item()
+        return None if state == 2 else _ABSENT
+
+    def take(self, rows: np.ndarray) -> 'NumberColumn':
+        column = NumberColumn(self.kind)
+        column.values = self.values[rows]
+        column.state = self.state[rows]
+        return column
+
+
+class NestedColumn:
+    """A dict-valued field stored as one column per key (e.g. sales_readiness)
+
+    Only dicts whose keys are all in the schema and whose values all fit
+    their columns are stored here; anything else is kept verbatim as an
+    extra by the table.
+    """
+
+    def __init__(self, schema: Dict[str, Any], capacity: int = 0):
+        self.schema = schema
+        self.columns = {key: make_column(spec, capacity) for key, spec in schema.items()}
+        self.state = np.zeros(capacity, dtype=np.int8)
+
+    def grow(self, capacity: int):
+        self.state = _grow(self.state, capacity, 0)
+        for column in self.columns.values():
+            column.grow(capacity)
+
+    def fits(self, value: Any) -> bool:
+        if type(value) is not dict:
+            return False
+        columns = self.columns
+        return all(key in columns and columns[key].fits(item) for key, item in value.items())
+
+    def set(self, row: int, value: Dict[str, Any]):
+        self.state[row] = 1
+        for key, column in self.columns.items():
+            item = value.get(key, _ABSENT)
+            if item is _ABSENT:
+                column.clear(row)
+            else:
+                column.set(row, item)
+
+    def clear(self, row: int):
+        if self.state[row]:
+            self.state[row] = 0
+            for column in self.columns.values():
+                column.clear(row)
+
+    def has(self, row: int) -> bool:
+        return self.state[row] != 0
+
+    def get(self, row: int) -> Any:
+        return RowView(self.columns, row) if self.state[row] else _ABSENT
+
+    def string_columns(self) -> List[StringColumn]:
+        """Every StringColumn in this column and the nested ones"""
+        strings = []
+        for column in self.columns.values():
+            if isinstance(column, StringColumn):
+                strings.append(column)
+            elif isinstance(column, NestedColumn):
+                strings.extend(column.string_columns())
+        return strings
+
+    def take(self, rows: np.ndarray) -> 'NestedColumn':
+        column = NestedColumn({})
+        column.schema = self.schema
+        column.columns = {key: child.take(rows) for key, child in self.columns.items()}
+        column.state = self.state[rows]
+        return column
+
+
+def make_column(spec: Any, capacity: int = 0):
+    """Build a column from a schema entry: a dict (nested), int, float, str, 'category' or 'tech_stack'"""
+    if isinstance(spec, dict):
+        return NestedColumn(spec, capacity)
+    if spec in (int, float):
+        return NumberColumn(spec, capacity)
+    if spec is str:
+        return StringColumn(capacity)
+    if spec == 'tech_stack':
+        return TechStackColumn(capacity)
+    return CategoryColumn(capacity)
+
+
+LEAD_SCHEMA = {
+    'id': int,
+    'company': str,
+    'contact_name': str,
+    'email': str,
+    'linkedin_url': str,
+    'role': 'category',
+    'company_size': 'category',
+    'location': 'category',
+    'tech_stack': 'tech_stack',
+    'industry': 'category',
+    'funding_stage': 'category',
+    'engagement_score': int,
+    'email_valid': 'category',
+    'email_validation': {
+        'address': str,
+        'status': 'category',
+    },
+    'last_activity': 'category',
+    'last_activity_epoch': float,
+    'recent_activity_until': float,
+    'business_priority_score': float,
+    'score': int,
+    'sales_readiness': {
+        'stage': 'category',
+        'confidence': float,
+        'recommended_approach': 'category',
+        'timing_priority': 'category',
+    },
+    'quality_assessment': {
+        'overall_score': float,
+        'data_completeness': float,
+        'contact_accuracy': float,
+        'strategic_fit': float,
+        'actionability': float,
+        'recommendation': 'category',
+    },
+}
+
+
+# Enrichment bookkeeping for the server itself (see lead_intelligence.enrich_leads). Lead views
+# return these by key, but leave them out of iteration, so they never reach API payloads or exports.
+INTERNAL_FIELDS = frozenset({'last_activity_epoch', 'recent_activity_until'})
+
+
+class RowView(Mapping):
+    """Read-only dict-like view of one row, decoding fields from the columns on access
+
+    Views are live: they reflect later updates to the same row. Use
+    `to_dict()` (or `copy()`) for a detached plain dict. INTERNAL_FIELDS
+    are readable by key but not iterated.
+    """
+
+    __slots__ = ('_columns', '_row', '_extras')
+
+    def __init__(self, columns: Dict[str, Any], row: int, extras: Optional[Dict[str, Any]] = None):
+        self._columns = columns
+        self._row = row
+        self._extras = extras
+
+    def __getitem__(self, key: str) -> Any:
+        column = self._columns.get(key)
+        if column is not None:
+            value = column.get(self._row)
+            if value is not _ABSENT:
+                return value
+        if self._extras and key in self._extras:
+            return self._extras[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        row = self._row
+        for key, column in self._columns.items():
+            if column.has(row) and key not in INTERNAL_FIELDS:
+                yield key
+        if self._extras:
+            yield from (key for key in self._extras if key not in INTERNAL_FIELDS)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: value.to_dict() if isinstance(value, RowView) else value for key, value in self.items()}
+
+    copy = to_dict
+
+    def __repr__(self) -> str:
+        return f'RowView({self.to_dict()!r})'
+
+
+class LeadRecord(Mapping):
+    """Read-only lead that hides INTERNAL_FIELDS like RowView
+
+    Wraps either a decoded lead dict or a lead's public JSON encoding
+    (`encoded`) plus its internal fields; the encoding is only decoded
+    when a field is first read, so a record that is just re-served as
+    JSON (see FragmentCache) is never decoded.
+    """
+
+    __slots__ = ('_lead', 'encoded', '_internal')
+
+    def __init__(self, lead: Optional[Dict[str, Any]] = None, encoded: Optional[bytes] = None,
+                 internal: Optional[Dict[str, Any]] = None):
+        self._lead = lead
+        self.encoded = encoded
+        self._internal = internal or {}
+
+    def _fields(self) -> Dict[str, Any]:
+        if self._lead is None:
+            self._lead = json.loads(self.encoded)
+        return self._lead
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._internal:
+            return self._internal[key]
+        return self._fields()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in self._fields() if key not in INTERNAL_FIELDS)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self}
+
+    copy = to_dict
+
+    def __repr__(self) -> str:
+        return f'LeadRecord({self.to_dict()!r})'
+
+
+class _IdIndex:
+    """Lead id -> row: sorted id/row arrays plus a dict of recent changes merged in batches"""
+
+    def __init__(self, ids: Optional[np.ndarray] = None, rows: Optional[np.ndarray] = None):
+        self.ids = ids if ids is not None else np.empty(0, dtype=np.int64)
+        self.rows = rows if rows is not None else np.empty(0, dtype=np.int64)
+        self.recent: Dict[int, int] = {}
+
+    def get(self, lead_id: int) -> Optional[int]:
+        row = self.recent.get(lead_id)
+        if row is None:
+            i = int(np.searchsorted(self.ids, lead_id))
+            if i < len(self.ids) and self.ids[i] == lead_id:
+                row = int(self.rows[i])
+        return row if row is not None and row >= 0 else None
+
+    def set(self, lead_id: int, row: int):
+        self.recent[lead_id] = row
+        if len(self.recent) > max(4096, len(self.ids) // 8):
+            self._merge()
+
+    def discard(self, lead_id: int):
+        self.set(lead_id, -1)
+
+    def _merge(self):
+        recent_ids = np.fromiter(self.recent, dtype=np.int64, count=len(self.recent))
+        recent_rows = np.fromiter(self.recent.values(), dtype=np.int64, count=len(self.recent))
+        keep = ~np.isin(self.ids, recent_ids)
+        live = recent_rows >= 0
+        ids = np.concatenate([self.ids[keep], recent_ids[live]])
+        rows = np.concatenate([self.rows[keep], recent_rows[live]])
+        order = np.argsort(ids, kind='stable')
+        self.ids, self.rows = ids[order], rows[order]
+        self.recent = {}
+
+
+class _Frame:
+    """Everything a LeadTable's rows live in; compaction swaps in a new frame as a whole"""
+
+    def __init__(self, schema: Dict[str, Any], capacity: int):
+        self.root = NestedColumn(schema, capacity)
+        self.strings = self.root.string_columns()
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.digests = np.zeros(capacity, dtype=np.uint64)
+        self.extras: Dict[int, Dict[str, Any]] = {}
+        self.index = _IdIndex()
+        self.size = 0
+        self.live = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.digests)
+
+    def grow(self, capacity: int):
+        self.root.grow(capacity)
+        self.ids = _grow(self.ids, capacity, 0)
+        self.digests = _grow(self.digests, capacity, 0)
+
+    def wasteful(self) -> bool:
+        """Whether stale string bytes make compaction worth it"""
+        garbage = sum(column.garbage for column in self.strings)
+        return garbage > COMPACT_GARBAGE_BYTES and 2 * garbage > sum(len(column.buffer) for column in self.strings)
+
+
+class LeadTable:
+    """Compact in-memory lead table: one row per lead, struct-of-arrays columns
+
+    Low-cardinality fields are dictionary-encoded, tech stacks are interned
+    combinations with packed bitsets, unique strings share one buffer and
+    numbers live in numpy arrays, so a lead costs a few hundred bytes
+    instead of several KB of dicts and str objects. Fields outside
+    LEAD_SCHEMA, or values that do not fit their column, are kept per row
+    as extras, so any lead round-trips unchanged.
+
+    Rows keep insertion order (an update keeps its row, like a dict), and
+    reads return RowView objects that decode fields on access. Each row
+    also stores a 64-bit digest of the lead's source record for change
+    detection. The table compacts itself once deleted rows outnumber live
+    ones, or once updates have left more stale string bytes than live
+    ones. Writes must be serialized by the caller.
+    """
+
+    def __init__(self, schema: Dict[str, Any] = LEAD_SCHEMA):
+        self.schema = schema
+        self._frame = _Frame(schema, INITIAL_CAPACITY)
+
+    def __len__(self) -> int:
+        return self._frame.live
+
+    def __contains__(self, lead_id: int) -> bool:
+        return self._frame.index.get(lead_id) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        """Lead ids in row order"""
+        return iter(self.ids().tolist())
+
+    def _live_rows(self) -> np.ndarray:
+        frame = self._frame
+        return np.flatnonzero(frame.root.state[:frame.size])
+
+    def ids(self) -> np.ndarray:
+        frame = self._frame
+        return frame.ids[:frame.size][frame.root.state[:frame.size] != 0]
+
+    def _view(self, frame: _Frame, row: int) -> RowView:
+        return RowView(frame.root.columns, row, frame.extras.get(row))
+
+    def get(self, lead_id: int) -> Optional[RowView]:
+        frame = self._frame
+        row = frame.index.get(lead_id)
+        return self._view(frame, row) if row is not None else None
+
+    def values(self) -> Iterator[RowView]:
+        """Views of the live rows in row order, as of the call; nothing is decoded up front"""
+        frame = self._frame
+        rows = self._live_rows().tolist()
+        return (self._view(frame, row) for row in rows)
+
+    def digest(self, lead_id: int) -> Optional[int]:
+        frame = self._frame
+        row = frame.index.get(lead_id)
+        return int(frame.digests[row]) if row is not None else None
+
+    def put(self, lead_id: int, lead: Dict[str, Any], digest: int = 0):
+        """Insert or overwrite the lead stored under lead_id"""
+        frame = self._frame
+        row = frame.index.get(lead_id)
+        if row is None:
+            if frame.size == frame.capacity:
+                frame.grow(frame.capacity * 2)
+            row = frame.size
+            frame.size += 1
+            frame.live += 1
+            frame.index.set(lead_id, row)
+            frame.ids[row] = lead_id
+
+        columns = frame.root.columns
+        extras = {key: value for key, value in lead.items() if key not in columns or not columns[key].fits(value)}
+        for key, column in columns.items():
+            value = lead.get(key, _ABSENT)
+            if value is _ABSENT or key in extras:
+                column.clear(row)
+            else:
+                column.set(row, value)
+        frame.root.state[row] = 1
+        frame.digests[row] = digest
+        if extras:
+            frame.extras[row] = extras
+        else:
+            frame.extras.pop(row, None)
+        if frame.wasteful():
+            self.compact()
+
+    def pop(self, lead_id: int) -> Optional[Dict[str, Any]]:
+        """Remove a lead, returning it as a plain dict"""
+        frame = self._frame
+        row = frame.index.get(lead_id)
+        if row is None:
+            return None
+        lead = self._view(frame, row).to_dict()
+        frame.root.state[row] = 0
+        frame.extras.pop(row, None)
+        frame.index.discard(lead_id)
+        frame.live -= 1
+        if frame.size - frame.live > max(INITIAL_CAPACITY, frame.live):
+            self.compact()
+        return lead
+
+    def compact(self):
+        """Rebuild the columns without deleted rows, unused categories or stale string bytes
+
+        Views taken before compaction keep reading the old frame.
+        """
+        old = self._frame
+        rows = self._live_rows()
+        frame = _Frame(self.schema, 0)
+        frame.root = old.root.take(rows)
+        frame.strings = frame.root.string_columns()
+        frame.ids = old.ids[rows]
+        frame.digests = old.digests[rows]
+        new_row = {row: i for i, row in enumerate(rows.tolist()) if row in old.extras}
+        frame.extras = {new_row[row]: extras for row, extras in old.extras.items()}
+        order = np.argsort(frame.ids, kind='stable')
+        frame.index = _IdIndex(frame.ids[order], order.astype(np.int64))
+        frame.size = frame.live = len(rows)
+        frame.grow(max(INITIAL_CAPACITY, 2 * len(rows)))
+        self._frame = frame
+
+    def tech_mask(self, tech: str) -> np.ndarray:
+        """Boolean mask over live rows (in row order): True where the tech stack contains tech"""
+        frame = self._frame
+        mask = frame.root.columns['tech_stack'].mask(tech, frame.size)
+        return mask[frame.root.state[:frame.size] != 0]
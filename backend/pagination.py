@@ -0,0 +1,67 @@
+import base64
+import json
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(key: Tuple) -> str:
+    """Encode a sort key as an opaque, URL-safe cursor"""
+    return base64.urlsafe_b64encode(json.dumps(list(key), separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple:
+    """Decode a cursor produced by encode_cursor; raises ValueError when malformed"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as exc:
+        raise ValueError('Invalid cursor') from exc
+    if not isinstance(key, list):
+        raise ValueError('Invalid cursor')
+    return tuple(key)
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    """Bound a requested page size to 1..MAX_PAGE_SIZE"""
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def top_k_page_arrays(keys: Sequence[np.ndarray], limit: int,
+                      after: Optional[Tuple] = None) -> Tuple[np.ndarray, Optional[Tuple]]:
+    """Select one keyset page of numeric sort keys held as parallel columns
+
+    The page is the `limit` smallest rows whose key is greater than `after`.
+    Rows are ordered lexicographically by (keys[0], keys[1], ...); a
+    partition on keys[0] narrows the rows down first, so only the page's
+    candidates are sorted. Returns the row indices of the page and the key
+    to resume after, or None when this is the last page. Raises ValueError
+    for a cursor key of the wrong shape.
+    """
+    rows = np.arange(len(keys[0]))
+    if after is not None:
+        if len(after) != len(keys) or not all(
+            isinstance(bound, (int, float)) and not isinstance(bound, bool) for bound in after
+        ):
+            raise ValueError('Invalid cursor')
+        greater = np.zeros(len(rows), dtype=bool)
+        equal = np.ones(len(rows), dtype=bool)
+        for column, bound in zip(keys, after):
+            greater |= equal & (column > bound)
+            equal &= column == bound
+        rows = rows[greater]
+    if len(rows) > limit + 1:
+        # Only rows whose leading key is at most the (limit + 1)-th smallest can be on the page
+        # (or be the row after it); ties on that key are settled by the sort below
+        leading = keys[0][rows]
+        rows = rows[leading <= np.partition(leading, limit)[limit]]
+    # np.lexsort sorts by its last key first
+    rows = rows[np.lexsort([column[rows] for column in reversed(keys)])]
+    if len(rows) > limit:
+        page = rows[:limit]
+        return page, tuple(column[page[-1]].item() for column in keys)
+    return rows, None
@@ -0,0 +1,93 @@
+import json
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from lead_intelligence import workflow_integrator
+from scoring_rules import rules_registry
+
+# Leads per pool task; a batch that fits in one chunk is generated inline, without the pool
+PLAYBOOK_CHUNK_SIZE = 500
+
+
+def _json_default(obj: Any) -> Any:
+    # Store rows and their nested fields are read-only Mapping views
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def playbook_line(lead_id: int, **fields: Any) -> bytes:
+    """One NDJSON record, compact and key-sorted like the JSON endpoints"""
+    record = {'lead_id': lead_id, **fields}
+    return json.dumps(record, sort_keys=True, separators=(',', ':'), default=_json_default).encode() + b'\n'
+
+
+def playbook_lines(lead_ids: Iterable[int], get: Callable[[int], Optional[Mapping[str, Any]]]) -> bytes:
+    """NDJSON records with the sales playbook of each lead, or an error for unknown ids"""
+    lines = []
+    for lead_id in lead_ids:
+        lead = get(lead_id)
+        if lead is None:
+            lines.append(playbook_line(lead_id, error='Lead not found'))
+        else:
+            lines.append(playbook_line(lead_id, playbook=workflow_integrator.create_sales_playbook(lead)))
+    return b''.join(lines)
+
+
+def _plain(lead: Optional[Mapping[str, Any]]) -> Optional[Dict[str, Any]]:
+    # Store rows are views over this process's tables; workers get picklable copies
+    if lead is None:
+        return None
+    return lead.to_dict() if hasattr(lead, 'to_dict') else dict(lead)
+
+
+def playbook_chunk(leads: List[Tuple[int, Optional[Dict[str, Any]]]]) -> bytes:
+    """Worker entry point: NDJSON records for (lead_id, lead or None) pairs"""
+    # Long-lived workers pick up rules reloaded since they started
+    rules_registry.refresh()
+    by_id = dict(leads)
+    return playbook_lines([lead_id for lead_id, _ in leads], by_id.get)
+
+
+def _chunks(items: Iterable[int], size: int) -> Iterator[List[int]]:
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def stream_playbooks(store, lead_ids: List[int], pool: Optional[Executor] = None, workers: int = 1,
+                     chunk_size: int = PLAYBOOK_CHUNK_SIZE) -> Iterator[bytes]:
+    """Generate sales playbooks, yielding NDJSON chunks as they finish
+
+    Playbooks are CPU-bound Python, which threads cannot run in parallel, so
+    chunks go to `pool`, a process pool like the server's import pool
+    (lead_ingest.start_worker_pool). Its workers were forked before the
+    store was loaded: each chunk's leads are looked up here and sent along
+    as plain dicts. Chunks arrive in completion order, not input order;
+    every record carries its lead_id. A request keeps at most two chunks
+    per worker in flight (`workers`), so one large batch cannot queue up
+    the whole pool. Without a pool, and for batches of one chunk,
+    playbooks are generated inline.
+    """
+    if pool is None or len(lead_ids) <= chunk_size:
+        for chunk in _chunks(lead_ids, chunk_size):
+            yield playbook_lines(chunk, store.get)
+        return
+
+    pending = set()
+    try:
+        for chunk in _chunks(lead_ids, chunk_size):
+            pending.add(pool.submit(playbook_chunk, [(lead_id, _plain(store.get(lead_id))) for lead_id in chunk]))
+            if len(pending) >= 2 * max(1, workers):
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        # Also reached when the client disconnects mid-stream; the shared pool stays up
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,71 @@
+import heapq
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ReadinessScheduler:
+    """Re-assesses sales readiness exactly when a lead's activity stops being recent
+
+    Subscribe to a LeadStore: every lead whose readiness counts its activity
+    as recent gets an entry in a heap ordered by the time that stops being
+    true, the internal `recent_activity_until` recorded by enrichment.
+    `run_due()` pops the entries that have expired and re-enriches just
+    those leads, so stages stay correct without rescoring every lead or
+    parsing dates on read.
+
+    Entries are not removed when a lead changes; stale ones (deleted lead,
+    different activity date, already flipped) are skipped when popped.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[float, int]] = []
+
+    def on_change(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """LeadStore listener: schedule the lead's flip from recent to not recent"""
+        until = new.get('recent_activity_until') if new is not None else None
+        if until is None:
+            return
+        with self._lock:
+            heapq.heappush(self._heap, (until, new['id']))
+            # Updates leave stale entries behind; rebuild once they dominate the heap
+            if len(self._heap) > 2 * len(self.store) + 1024:
+                self._compact()
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if self._is_current(*entry)]
+        heapq.heapify(self._heap)
+
+    def _is_current(self, until: float, lead_id: int) -> bool:
+        lead = self.store.get(lead_id)
+        return lead is not None and lead.get('recent_activity_until') == until
+
+    @property
+    def next_due(self) -> Optional[float]:
+        """Unix time of the earliest scheduled flip, if any"""
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def run_due(self, now: Optional[float] = None) -> int:
+        """Re-enrich leads whose recent activity has expired by `now`; returns how many
+
+        Cheap when nothing is due (a peek at the heap top). If another
+        thread is already running the due entries this returns 0 at once.
+        """
+        now = time.time() if now is None else now
+        if not self._heap or self._heap[0][0] > now:
+            return 0
+        if not self._lock.acquire(blocking=False):
+            return 0
+        try:
+            due = set()
+            while self._heap and self._heap[0][0] <= now:
+                until, lead_id = heapq.heappop(self._heap)
+                if self._is_current(until, lead_id):
+                    due.add(lead_id)
+        finally:
+            self._lock.release()
+        # Outside the lock: re-enriching notifies on_change, which takes it again
+        return self.store.reenrich(sorted(due)) if due else 0
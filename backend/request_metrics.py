@@ -0,0 +1,304 @@
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from flask import has_request_context, request
+
+# Set METRICS_ENABLED=0 to turn stage timers and request metrics into no-ops
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+PAYLOAD_BUCKETS = tuple(256 * 4 ** power for power in range(10))  # 256 B .. 64 MiB
+RESULT_SIZE_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10_000, 50_000, 100_000, 500_000, 1_000_000)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Worker processes of one server share their metrics through files in this directory (set by
+# gunicorn.conf.py and serve.py); unset, every process reports only its own
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+
+# How often a process writes new metrics to METRICS_DIR
+METRICS_FLUSH_INTERVAL = 1.0
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class Counter:
+    """Monotonic counter per label combination"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def state(self) -> List[Any]:
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._values.items()]
+
+    def merge_state(self, state: List[Any]):
+        for labels, value in state:
+            self.inc(*labels, amount=value)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+
+class Histogram:
+    """Fixed-bucket histogram per label combination
+
+    Observing is a bisect plus two additions under a lock; cumulative bucket
+    counts are only computed when rendering.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label tuple: [count per bucket (last one is +Inf)..., sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def state(self) -> List[Any]:
+        with self._lock:
+            return [[list(labels), list(values)] for labels, values in self._series.items()]
+
+    def merge_state(self, state: List[Any]):
+        with self._lock:
+            for labels, values in state:
+                series = self._series.setdefault(tuple(labels), [0] * (len(self.buckets) + 1) + [0.0])
+                for index, value in enumerate(values):
+                    series[index] += value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        label_names = self.labelnames + ('le',)
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                yield f'{self.name}_bucket{_format_labels(label_names, labels + (_format_value(bound),))} {cumulative}'
+            suffix = _format_labels(self.labelnames, labels)
+            yield f'{self.name}_sum{suffix} {_format_value(values[-1])}'
+            yield f'{self.name}_count{suffix} {cumulative}'
+
+
+class _StageTimer:
+    __slots__ = ('histogram', 'stage', 'started')
+
+    def __init__(self, histogram: Histogram, stage: str):
+        self.histogram = histogram
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, current_endpoint(), self.stage)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def current_endpoint() -> str:
+    """Flask endpoint of the current request; work outside requests (e.g. the CLI) is 'background'"""
+    if has_request_context():
+        return request.endpoint or 'unmatched'
+    return 'background'
+
+
+class RequestMetrics:
+    """Request counts, latencies, payload and result-set sizes, and per-stage timings
+
+    Views time their stages with `with request_metrics.stage('filter'):`;
+    the request-level metrics are recorded by the app's request hooks.
+    Everything is kept in process memory and rendered in the Prometheus
+    text format by `render()`.
+
+    With a `directory`, each process also writes its metrics there (as
+    <pid>.json, from a thread started by its first request, every
+    METRICS_FLUSH_INTERVAL while there is something new, and whenever it
+    renders), and `render()` sums the files of
+    every process, so a scrape reports the whole server whichever worker
+    answers it. Files of exited workers are kept, so totals never go back;
+    clear the directory when the server starts (`reset_shared_metrics`).
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED, directory: Optional[str] = METRICS_DIR):
+        self.enabled = enabled
+        self.directory = directory
+        self._dirty = False
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.requests = Counter('http_requests_total', 'HTTP requests handled', ('endpoint', 'method', 'status'))
+        self.latency = Histogram(
+            'http_request_duration_seconds', 'Time from request start until the response body was produced',
+            ('endpoint', 'method'), LATENCY_BUCKETS
+        )
+        self.payload = Histogram(
+            'http_response_size_bytes', 'Response body size', ('endpoint',), PAYLOAD_BUCKETS
+        )
+        self.result_size = Histogram(
+            'lead_result_size', 'Leads matched by a request, before pagination', ('endpoint',), RESULT_SIZE_BUCKETS
+        )
+        self.stages = Histogram(
+            'lead_stage_duration_seconds', 'Time spent in one stage of a request', ('endpoint', 'stage'),
+            LATENCY_BUCKETS
+        )
+        self.metrics = (self.requests, self.latency, self.payload, self.result_size, self.stages)
+
+    def stage(self, name: str):
+        """Context manager timing one stage (load, enrich, filter, score, sort, serialize, ...)"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self.stages, name)
+
+    def timed(self, name: str, function: Callable) -> Callable:
+        """Wrap function so every call is timed as stage `name`"""
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def observe_result_size(self, count: int):
+        if self.enabled:
+            self.result_size.observe(count, current_endpoint())
+
+    def observe_request(self, endpoint: str, method: str, status: int, seconds: float, size: Optional[int]):
+        if not self.enabled:
+            return
+        self.requests.inc(endpoint, method, str(status))
+        self.latency.observe(seconds, endpoint, method)
+        if size is not None:
+            self.payload.observe(size, endpoint)
+        if self.directory:
+            self._dirty = True
+            if self._flusher is None:
+                self._start_flusher()
+
+    def observe_stream(self, chunks: Iterable[bytes], endpoint: str, method: str, status: int,
+                       started: float) -> Iterator[bytes]:
+        """Pass a streamed body through, recording the request once the last chunk is sent"""
+        size = 0
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.observe_request(endpoint, method, status, time.perf_counter() - started, size)
+
+    def _start_flusher(self):
+        with self._flusher_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+                self._flusher.start()
+                # Also keep the last interval of a worker that exits
+                atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(METRICS_FLUSH_INTERVAL)
+            if self._dirty:
+                self.flush()
+
+    def flush(self):
+        """Write this process's metrics to the shared directory"""
+        self._dirty = False
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        # Written aside and renamed, so other processes never read a partial file
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump({metric.name: metric.state() for metric in self.metrics}, f)
+        os.replace(f'{path}.tmp', path)
+
+    def _merged(self) -> 'RequestMetrics':
+        """Metrics summed over every process's file in the shared directory"""
+        self.flush()
+        merged = RequestMetrics(directory=None)
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    states = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for metric in merged.metrics:
+                metric.merge_state(states.get(metric.name, []))
+        return merged
+
+    def render(self) -> str:
+        if self.directory:
+            return self._merged().render()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+def reset_shared_metrics(directory: Optional[str] = METRICS_DIR):
+    """Remove the metrics files a previous run left behind; call before the workers start"""
+    if not directory or not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.endswith(('.json', '.tmp')):
+            os.remove(os.path.join(directory, name))
+
+
+request_metrics = RequestMetrics()
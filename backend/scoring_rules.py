@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional
+
+DEFAULT_RULES_PATH = os.environ.get(
+    'SCORING_RULES_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scoring_rules.json')
+)
+
+REQUIRED_KEYS = (
+    'industry_focus', 'target_company_sizes', 'ideal_company_sizes',
+    'priority_roles', 'decision_maker_roles', 'ideal_tech_stack',
+    'lead_role_scores', 'lead_size_scores', 'lead_funding_scores'
+)
+
+# Distinct role titles are few, so per-title match results are memoized
+ROLE_CACHE_SIZE = 65536
+
+
+class KeywordMatcher:
+    """Single precompiled pattern that finds the highest-priority keyword in a text
+
+    Equivalent to `next(k for k in keywords if k.lower() in text.lower())`:
+    a zero-width lookahead reports (possibly overlapping) matches at every
+    position, and the match with the lowest list index wins.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = tuple(keywords)
+        self._priority = {}
+        for index, keyword in enumerate(self.keywords):
+            self._priority.setdefault(keyword.lower(), index)
+        # Alternatives in priority order, so at a given position the first-listed keyword wins
+        alternatives = '|'.join(re.escape(keyword) for keyword in self._priority)
+        self._pattern = re.compile(f'(?=({alternatives}))') if alternatives else None
+
+    def first(self, text: str) -> Optional[str]:
+        if self._pattern is None:
+            return None
+        best = None
+        for match in self._pattern.finditer(text.lower()):
+            priority = self._priority[match.group(1)]
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+        return self.keywords[best] if best is not None else None
+
+
+class ScoringRules:
+    """Targeting rules compiled into frozensets, dict lookups and keyword matchers"""
+
+    def __init__(self, config: Dict[str, Any]):
+        missing = [key for key in REQUIRED_KEYS if key not in config]
+        if missing:
+            raise ValueError(f"Scoring rules missing keys: {', '.join(missing)}")
+
+        self.version = hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+        self.industry_focus = frozenset(config['industry_focus'])
+        self.target_company_sizes = frozenset(config['target_company_sizes'])
+        self.ideal_company_sizes = frozenset(config['ideal_company_sizes'])
+        self.priority_roles = tuple(config['priority_roles'])
+        self.decision_maker_roles = frozenset(config['decision_maker_roles'])
+        self.ideal_tech_stack = frozenset(config['ideal_tech_stack'])
+        self.lead_role_scores = {keyword: int(points) for keyword, points in config['lead_role_scores'].items()}
+        self.lead_size_scores = {size: int(points) for size, points in config['lead_size_scores'].items()}
+        self.lead_funding_scores = {stage: int(points) for stage, points in config['lead_funding_scores'].items()}
+
+        self._priority_role_matcher = KeywordMatcher(self.priority_roles)
+        self._lead_role_matcher = KeywordMatcher(self.lead_role_scores)
+        self.role_points = lru_cache(maxsize=ROLE_CACHE_SIZE)(self._role_points)
+        self.lead_role_points = lru_cache(maxsize=ROLE_CACHE_SIZE)(self._lead_role_points)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'ScoringRules':
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def industry_points(self, industry: str) -> int:
+        """Points for industry alignment"""
+        if industry in self.industry_focus:
+            return 30
+        elif industry:
+            return 10  # Partial credit for other tech industries
+        return 0
+
+    def company_size_points(self, company_size: str) -> int:
+        """Points for company size targeting"""
+        if company_size in self.target_company_sizes:
+            if company_size in self.ideal_company_sizes:
+                return 25  # Ideal targets
+            else:
+                return 20  # Good targets
+        elif company_size:
+            return 5
+        return 0
+
+    def _role_points(self, role: str) -> int:
+        """Points for role seniority and relevance"""
+        priority_role = self._priority_role_matcher.first(role)
+        if priority_role is None:
+            return 0
+        if priority_role in self.decision_maker_roles:
+            return 25  # Decision makers
+        return 20  # Influencers
+
+    def _lead_role_points(self, role: str) -> int:
+        """Lead score points for the first role keyword found in the role title"""
+        keyword = self._lead_role_matcher.first(role)
+        return self.lead_role_scores[keyword] if keyword is not None else 0
+
+
+class RulesRegistry:
+    """Holds the active ScoringRules and swaps them atomically on reload
+
+    A reload compiles the new rules completely before publishing them with
+    a single reference assignment, so readers see either the old or the
+    new rules, never a mix. A config that fails to load leaves the active
+    rules untouched.
+    """
+
+    def __init__(self, path: str = DEFAULT_RULES_PATH):
+        self.path = path
+        self._reload_lock = threading.Lock()
+        self._mtime = os.stat(path).st_mtime_ns
+        self._rules = ScoringRules.from_file(path)
+
+    @property
+    def current(self) -> ScoringRules:
+        return self._rules
+
+    def reload(self) -> ScoringRules:
+        with self._reload_lock:
+            self._mtime = os.stat(self.path).st_mtime_ns
+            self._rules = ScoringRules.from_file(self.path)
+            return self._rules
+
+    def refresh(self) -> bool:
+        """Reload if the rules file changed since it was last loaded (e.g. by another worker)
+
+        A file that fails to load is not retried until it changes again, and
+        the active rules stay in place.
+        """
+        try:
+            if os.stat(self.path).st_mtime_ns == self._mtime:
+                return False
+            self.reload()
+        except (OSError, ValueError):
+            return False
+        return True
+
+
+rules_registry = RulesRegistry()
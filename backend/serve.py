@@ -0,0 +1,105 @@
+"""Development server with several worker processes sharing one lead snapshot
+
+Werkzeug's server is not meant for production; there, run gunicorn with
+gunicorn.conf.py, which sets up the same shared snapshot. This script only
+needs Flask and reproduces the multi-process setup locally.
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+from lead_store import DEFAULT_DB_PATH
+
+# A worker that dies this soon after starting is treated as a startup failure, not respawned
+MIN_WORKER_UPTIME = 2.0
+
+
+def run_worker(sock: socket.socket, host: str, port: int):
+    """Serve requests from the shared listening socket until terminated"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Imported after the fork, so every worker opens its own database connection
+    from werkzeug.serving import make_server
+    from app import app
+
+    server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+    server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Serve the lead API with pre-forked worker processes (development only)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='worker processes (default: CPU count)')
+    parser.add_argument('--snapshot', default=None,
+                        help='shared lead snapshot path (default: LEADS_SNAPSHOT_PATH or next to the database)')
+    args = parser.parse_args(argv)
+
+    # Workers read leads from one memory-mapped snapshot instead of each loading its own copy
+    os.environ['LEADS_SNAPSHOT_PATH'] = (
+        args.snapshot or os.environ.get('LEADS_SNAPSHOT_PATH') or f'{DEFAULT_DB_PATH}.snapshot'
+    )
+
+    # Each worker starts its own import enrichment pool; together they get about one process per CPU
+    os.environ.setdefault('INGEST_WORKERS', str(max(1, (os.cpu_count() or 1) // max(args.workers, 1))))
+
+    # /metrics sums the workers' metrics files; start from an empty directory
+    os.environ.setdefault('METRICS_DIR', f'{DEFAULT_DB_PATH}.metrics')
+    from request_metrics import reset_shared_metrics
+    reset_shared_metrics(os.environ['METRICS_DIR'])
+
+    sock = socket.create_server((args.host, args.port), backlog=1024)
+    sock.set_inheritable(True)
+    workers: Dict[int, float] = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(sock, args.host, args.port)
+            finally:
+                os._exit(1)
+        workers[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(max(args.workers, 1)):
+        spawn()
+    print(f'Serving on http://{args.host}:{args.port} with {len(workers)} workers', file=sys.stderr)
+
+    exit_code = 0
+    while workers:
+        pid, status = os.wait()
+        started = workers.pop(pid, None)
+        if started is None or stopping:
+            continue
+        if time.monotonic() - started < MIN_WORKER_UPTIME:
+            print(f'Worker {pid} exited during startup (status {status}); shutting down', file=sys.stderr)
+            exit_code = 1
+            stop(signal.SIGTERM, None)
+        else:
+            print(f'Worker {pid} exited (status {status}); restarting', file=sys.stderr)
+            spawn()
+
+    sock.close()
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
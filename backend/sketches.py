@@ -0,0 +1,273 @@
+import base64
+import hashlib
+import math
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Count-min sketch: width 2048 x depth 4 overestimates a count by at most
+# 2 * total / 2048 with probability 1 - (1/2)^4
+CMS_WIDTH = 2048
+CMS_DEPTH = 4
+
+# Candidate keys tracked per heavy-hitter summary
+TOP_K_CAPACITY = 64
+
+# HyperLogLog with 2^14 registers: 16 KB, ~0.8% standard error
+HLL_PRECISION = 14
+
+# t-digest compression: a centroid at quantile q holds at most 4 * n * q * (1 - q) / compression values
+TDIGEST_COMPRESSION = 100
+
+
+def hash64(value: str) -> int:
+    """Stable 64-bit hash, identical in every process (unlike hash())"""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'little')
+
+
+def _encode_array(array: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode()
+
+
+def _decode_array(data: str, dtype) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=dtype).copy()
+
+
+class CountMinSketch:
+    """Approximate counts per key in fixed memory; counts can be decremented
+
+    Estimates never undercount while every key's true count stays
+    non-negative. Sketches with the same dimensions merge by adding
+    their tables.
+    """
+
+    def __init__(self, width: int = CMS_WIDTH, depth: int = CMS_DEPTH):
+        self.width = width
+        self.depth = depth
+        # Rows as Python lists: single-key updates are far cheaper than on numpy arrays
+        self.rows: List[List[int]] = [[0] * width for _ in range(depth)]
+        self.columns = lru_cache(maxsize=65536)(self._columns)
+
+    def _columns(self, key: str) -> Tuple[int, ...]:
+        # Double hashing: row i uses h1 + i * h2
+        hashed = hash64(key)
+        low, high = hashed & 0xFFFFFFFF, (hashed >> 32) | 1
+        return tuple((low + row * high) % self.width for row in range(self.depth))
+
+    def add(self, key: str, count: int = 1):
+        for row, column in zip(self.rows, self.columns(key)):
+            row[column] += count
+
+    def estimate(self, key: str) -> int:
+        return max(0, min(row[column] for row, column in zip(self.rows, self.columns(key))))
+
+    def merge(self, other: 'CountMinSketch'):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError('Cannot merge count-min sketches of different dimensions')
+        for row, other_row in zip(self.rows, other.rows):
+            for column, count in enumerate(other_row):
+                if count:
+                    row[column] += count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'width': self.width, 'depth': self.depth,
+                'table': _encode_array(np.array(self.rows, dtype=np.int64))}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CountMinSketch':
+        sketch = cls(data['width'], data['depth'])
+        sketch.rows = _decode_array(data['table'], np.int64).reshape(sketch.depth, sketch.width).tolist()
+        return sketch
+
+
+class TopK:
+    """Heavy hitters: count-min counts plus a bounded set of candidate keys
+
+    A key becomes a candidate when its estimate beats the smallest
+    candidate's. Decrements only lower estimates, so the candidates are
+    re-ranked by their current estimates when read.
+    """
+
+    def __init__(self, capacity: int = TOP_K_CAPACITY, width: int = CMS_WIDTH, depth: int = CMS_DEPTH):
+        self.capacity = capacity
+        self.sketch = CountMinSketch(width, depth)
+        # Candidate key -> estimate when last updated
+        self.candidates: Dict[str, int] = {}
+
+    def add(self, key: str, count: int = 1):
+        self.sketch.add(key, count)
+        if key in self.candidates:
+            self.candidates[key] = self.sketch.estimate(key)
+        elif count > 0:
+            estimate = self.sketch.estimate(key)
+            if len(self.candidates) < self.capacity:
+                self.candidates[key] = estimate
+            else:
+                smallest = min(self.candidates, key=self.candidates.__getitem__)
+                if estimate > self.candidates[smallest]:
+                    del self.candidates[smallest]
+                    self.candidates[key] = estimate
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        """The n most frequent keys with estimated counts, most frequent first"""
+        estimates = ((key, self.sketch.estimate(key)) for key in self.candidates)
+        ranked = sorted((item for item in estimates if item[1] > 0), key=lambda item: (-item[1], item[0]))
+        return ranked[:n]
+
+    def merge(self, other: 'TopK'):
+        self.sketch.merge(other.sketch)
+        keys = set(self.candidates) | set(other.candidates)
+        ranked = sorted(((key, self.sketch.estimate(key)) for key in keys), key=lambda item: (-item[1], item[0]))
+        self.candidates = dict(ranked[:self.capacity])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'capacity': self.capacity, 'sketch': self.sketch.to_dict(), 'candidates': sorted(self.candidates)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TopK':
+        top_k = cls(data['capacity'])
+        top_k.sketch = CountMinSketch.from_dict(data['sketch'])
+        top_k.candidates = {key: top_k.sketch.estimate(key) for key in data['candidates']}
+        return top_k
+
+
+class HyperLogLog:
+    """Approximate distinct count in 2^precision one-byte registers
+
+    Values cannot be removed. Sketches of the same precision merge by
+    taking the register-wise maximum.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str):
+        hashed = hash64(value)
+        register = hashed >> (64 - self.precision)
+        remainder = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[register]:
+            self.registers[register] = rank
+
+    def count(self) -> int:
+        registers = np.frombuffer(self.registers, dtype=np.uint8)
+        m = len(registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.exp2(-registers.astype(np.float64))))
+        zeros = int(np.count_nonzero(registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def merge(self, other: 'HyperLogLog'):
+        if other.precision != self.precision:
+            raise ValueError('Cannot merge HyperLogLogs of different precision')
+        merged = np.maximum(np.frombuffer(self.registers, dtype=np.uint8), np.frombuffer(other.registers, dtype=np.uint8))
+        self.registers = bytearray(merged.tobytes())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'precision': self.precision, 'registers': base64.b64encode(bytes(self.registers)).decode()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'HyperLogLog':
+        hll = cls(data['precision'])
+        hll.registers = bytearray(base64.b64decode(data['registers']))
+        return hll
+
+
+class TDigest:
+    """Approximate quantiles from a bounded set of weighted centroids (merging t-digest)
+
+    Values are buffered and folded into the centroids in sorted batches.
+    Centroids near the median may hold many values and those near the
+    tails few, so extreme quantiles stay accurate. Values cannot be
+    removed; digests merge by folding in each other's centroids.
+    """
+
+    def __init__(self, compression: float = TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: List[float] = []
+        self._buffer_weights: List[float] = []
+
+    def __len__(self) -> int:
+        self._compress()
+        return int(self.weights.sum())
+
+    def add(self, value: float, weight: float = 1.0):
+        self._buffer.append(value)
+        self._buffer_weights.append(weight)
+        if len(self._buffer) >= 10 * self.compression:
+            self._compress()
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        means = np.concatenate([self.means, self._buffer])
+        weights = np.concatenate([self.weights, self._buffer_weights])
+        self.min = min(self.min, float(np.min(self._buffer)))
+        self.max = max(self.max, float(np.max(self._buffer)))
+        self._buffer, self._buffer_weights = [], []
+
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order].tolist(), weights[order].tolist()
+        total = sum(weights)
+        merged_means, merged_weights = [], []
+        mean, weight, before = means[0], weights[0], 0.0
+        for next_mean, next_weight in zip(means[1:], weights[1:]):
+            quantile = (before + (weight + next_weight) / 2) / total
+            # k1-style size bound: centroids may grow with q * (1 - q)
+            if weight + next_weight <= max(1.0, 4 * total * quantile * (1 - quantile) / self.compression):
+                weight += next_weight
+                mean += (next_mean - mean) * next_weight / weight
+            else:
+                merged_means.append(mean)
+                merged_weights.append(weight)
+                before += weight
+                mean, weight = next_mean, next_weight
+        merged_means.append(mean)
+        merged_weights.append(weight)
+        self.means, self.weights = np.array(merged_means), np.array(merged_weights)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate value at quantile q (0..1), or None when empty"""
+        self._compress()
+        if not len(self.means):
+            return None
+        # Each centroid's mean sits at the middle of its weight; the exact extremes bound the ends
+        total = float(self.weights.sum())
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * total, np.concatenate([[0.0], centers, [total]]),
+                               np.concatenate([[self.min], self.means, [self.max]])))
+
+    def merge(self, other: 'TDigest'):
+        other._compress()
+        self._buffer.extend(other.means.tolist())
+        self._buffer_weights.extend(other.weights.tolist())
+        self._compress()
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+
+    def to_dict(self) -> Dict[str, Any]:
+        self._compress()
+        return {
+            'compression': self.compression,
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+            'min': self.min if self.weights.size else None,
+            'max': self.max if self.weights.size else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TDigest':
+        digest = cls(data['compression'])
+        digest.means = np.array(data['means'], dtype=np.float64)
+        digest.weights = np.array(data['weights'], dtype=np.float64)
+        if data.get('min') is not None:
+            digest.min, digest.max = data['min'], data['max']
+        return digest
@@ -0,0 +1,229 @@
+import bisect
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+# Keys per block once sorted; a block splits when it grows past twice this
+SORT_BLOCK_SIZE = 1024
+
+# Keys returned per chunk when walking the index in order
+WALK_CHUNK_SIZE = 4096
+
+_NEG_INF, _POS_INF = float('-inf'), float('inf')
+
+
+def sort_value(value: Any) -> float:
+    """A lead field as a sort value; missing and non-numeric values sort lowest"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value == value:
+        return float(value)
+    return _NEG_INF
+
+
+# Server-side sort orders for /api/leads, keyed by `sort_by`
+SORT_FIELDS: Dict[str, Callable[[Mapping[str, Any]], float]] = {
+    'score': lambda lead: sort_value(lead.get('score')),
+    'business_priority_score': lambda lead: sort_value(lead.get('business_priority_score')),
+    'engagement_score': lambda lead: sort_value(lead.get('engagement_score')),
+    'last_activity': lambda lead: sort_value(lead.get('last_activity_epoch')),
+    'overall_score': lambda lead: sort_value((lead.get('quality_assessment') or {}).get('overall_score')),
+}
+
+
+class SortedKeys:
+    """(value, lead id) keys kept in sorted order, each carrying the lead's index slot
+
+    Laid out like a sorted-container list: sorted blocks of parallel numpy
+    arrays plus a list of each block's last key. Locating a key is a
+    bisect over the block maxima and a binary search inside one block,
+    O(log n); inserting or removing one shifts a single block of at most
+    2 * SORT_BLOCK_SIZE keys.
+
+    Writes are buffered and applied by the next read: one by one, or, when
+    a large share of the keys changed (bulk loads, full rescoring), by
+    re-sorting everything once. Callers serialize access.
+    """
+
+    def __init__(self, block_size: int = SORT_BLOCK_SIZE):
+        self.block_size = block_size
+        self._values: List[np.ndarray] = []
+        self._ids: List[np.ndarray] = []
+        self._slots: List[np.ndarray] = []
+        self._maxes: List[Tuple[float, int]] = []
+        self._offsets: Optional[np.ndarray] = None
+        self._size = 0
+        # Pending writes: keys to insert by lead id, and keys of stored entries to remove
+        self._added: Dict[int, Tuple[float, int]] = {}
+        self._removed: Dict[int, float] = {}
+
+    def __len__(self) -> int:
+        self._flush()
+        return self._size
+
+    def add(self, value: float, lead_id: int, slot: int):
+        self._added[lead_id] = (value, slot)
+
+    def discard(self, value: float, lead_id: int):
+        # A key still pending insertion never reached the blocks
+        if self._added.pop(lead_id, None) is None:
+            self._removed[lead_id] = value
+
+    def _flush(self):
+        if not self._added and not self._removed:
+            return
+        if len(self._added) + len(self._removed) > self._size // 16:
+            self._rebuild()
+        else:
+            for lead_id, value in self._removed.items():
+                self._remove(value, lead_id)
+            for lead_id, (value, slot) in self._added.items():
+                self._insert(value, lead_id, slot)
+        self._added.clear()
+        self._removed.clear()
+        self._offsets = None
+
+    def _rebuild(self):
+        values, ids, slots = self._concat(self._values), self._concat(self._ids, np.int64), self._concat(self._slots, np.int64)
+        if self._removed:
+            # Drop stored keys equal to a removed (value, id); like _remove, other keys stay
+            removed_ids = np.fromiter(self._removed, dtype=np.int64, count=len(self._removed))
+            removed_values = np.fromiter(self._removed.values(), dtype=np.float64, count=len(self._removed))
+            order = np.argsort(removed_ids)
+            removed_ids, removed_values = removed_ids[order], removed_values[order]
+            position = np.minimum(np.searchsorted(removed_ids, ids), len(removed_ids) - 1)
+            keep = (removed_ids[position] != ids) | (removed_values[position] != values)
+            values, ids, slots = values[keep], ids[keep], slots[keep]
+        if self._added:
+            count = len(self._added)
+            values = np.concatenate([values, np.fromiter((key[0] for key in self._added.values()), np.float64, count)])
+            ids = np.concatenate([ids, np.fromiter(self._added, np.int64, count)])
+            slots = np.concatenate([slots, np.fromiter((key[1] for key in self._added.values()), np.int64, count)])
+        order = np.lexsort((ids, values))
+        values, ids, slots = values[order], ids[order], slots[order]
+        bounds = range(0, len(values), self.block_size)
+        self._values = [values[start:start + self.block_size].copy() for start in bounds]
+        self._ids = [ids[start:start + self.block_size].copy() for start in bounds]
+        self._slots = [slots[start:start + self.block_size].copy() for start in bounds]
+        self._maxes = [(block_values[-1].item(), block_ids[-1].item()) for block_values, block_ids in zip(self._values, self._ids)]
+        self._size = len(values)
+
+    @staticmethod
+    def _concat(blocks: List[np.ndarray], dtype=np.float64) -> np.ndarray:
+        return np.concatenate(blocks) if blocks else np.empty(0, dtype=dtype)
+
+    def _block_position(self, block: int, value: float, lead_id: float, side: str = 'left') -> int:
+        """Position in a block of the first key >= (value, lead_id), or > with side='right'"""
+        values = self._values[block]
+        low, high = np.searchsorted(values, value, 'left'), np.searchsorted(values, value, 'right')
+        return int(low + np.searchsorted(self._ids[block][low:high], lead_id, side))
+
+    def _insert(self, value: float, lead_id: int, slot: int):
+        if not self._values:
+            self._values, self._ids, self._slots = [np.array([value])], [np.array([lead_id])], [np.array([slot])]
+            self._maxes = [(value, lead_id)]
+            self._size = 1
+            return
+        block = min(bisect.bisect_left(self._maxes, (value, lead_id)), len(self._maxes) - 1)
+        position = self._block_position(block, value, lead_id)
+        self._values[block] = np.insert(self._values[block], position, value)
+        self._ids[block] = np.insert(self._ids[block], position, lead_id)
+        self._slots[block] = np.insert(self._slots[block], position, slot)
+        self._size += 1
+        self._update_max(block)
+        if len(self._ids[block]) > 2 * self.block_size:
+            half = self.block_size
+            for blocks in (self._values, self._ids, self._slots):
+                blocks[block:block + 1] = [blocks[block][:half].copy(), blocks[block][half:].copy()]
+            self._maxes.insert(block, None)
+            self._update_max(block)
+
+    def _remove(self, value: float, lead_id: int):
+        block = bisect.bisect_left(self._maxes, (value, lead_id))
+        if block == len(self._maxes):
+            return
+        position = self._block_position(block, value, lead_id)
+        # Not stored (e.g. discarded twice): leave the neighbour that sorts there alone
+        if (position == len(self._ids[block]) or self._ids[block][position] != lead_id
+                or self._values[block][position] != value):
+            return
+        for blocks in (self._values, self._ids, self._slots):
+            blocks[block] = np.delete(blocks[block], position)
+        self._size -= 1
+        if len(self._ids[block]):
+            self._update_max(block)
+        else:
+            for blocks in (self._values, self._ids, self._slots, self._maxes):
+                del blocks[block]
+
+    def _update_max(self, block: int):
+        self._maxes[block] = (self._values[block][-1].item(), self._ids[block][-1].item())
+
+    def _block_offsets(self) -> np.ndarray:
+        if self._offsets is None:
+            self._offsets = np.cumsum([0] + [len(ids) for ids in self._ids])
+        return self._offsets
+
+    def _rank(self, value: float, lead_id: float, side: str = 'left') -> int:
+        """Number of keys < (value, lead_id), or <= with side='right'"""
+        key = (value, lead_id)
+        block = bisect.bisect_left(self._maxes, key) if side == 'left' else bisect.bisect_right(self._maxes, key)
+        if block == len(self._maxes):
+            return self._size
+        return int(self._block_offsets()[block]) + self._block_position(block, value, lead_id, side)
+
+    def _slice(self, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(values, ids, slots) of the keys at sorted positions [start, stop)"""
+        offsets = self._block_offsets()
+        first = int(np.searchsorted(offsets, start, 'right')) - 1
+        parts: Tuple[List[np.ndarray], List[np.ndarray], List[np.ndarray]] = ([], [], [])
+        block = first
+        while block < len(self._ids) and offsets[block] < stop:
+            low, high = max(start - offsets[block], 0), min(stop - offsets[block], len(self._ids[block]))
+            for part, blocks in zip(parts, (self._values, self._ids, self._slots)):
+                part.append(blocks[block][low:high])
+            block += 1
+        if not parts[0]:
+            return np.empty(0), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(parts[0]), np.concatenate(parts[1]), np.concatenate(parts[2])
+
+    def walk(self, descending: bool = False,
+             after: Optional[Tuple[float, int]] = None) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Yield (values, ids, slots) chunks in value order, equal values by ascending id
+
+        With `after` (a value and lead id), start right after that key in
+        the requested order, whether or not it is still in the index.
+        """
+        self._flush()
+        if not descending:
+            yield from self._forward(0 if after is None else self._rank(after[0], after[1], 'right'), self._size)
+            return
+
+        stop = self._size
+        if after is not None:
+            value, lead_id = after
+            # The rest of the cursor's value comes first: larger ids, still ascending
+            stop = self._rank(value, _NEG_INF)
+            yield from self._forward(self._rank(value, lead_id, 'right'), self._rank(value, _POS_INF))
+        # `stop` is always the start of a run of equal values
+        while stop > 0:
+            # Walk backwards a chunk at a time; each chunk's runs are flipped into descending order
+            start = max(stop - WALK_CHUNK_SIZE, 0)
+            values, ids, slots = self._slice(start, stop)
+            lowest = values[0].item()
+            if not start or self._slice(start - 1, start)[0][0].item() != lowest:
+                order = np.lexsort((ids, -values))
+                yield values[order], ids[order], slots[order]
+                stop = start
+                continue
+            # The lowest run continues below the chunk; it is walked forward from its first key,
+            # so a long run of ties (e.g. capped scores) is read one chunk at a time too
+            tied = int(np.searchsorted(values, lowest, 'right'))
+            if tied < len(values):
+                order = tied + np.lexsort((ids[tied:], -values[tied:]))
+                yield values[order], ids[order], slots[order]
+            run_start = self._rank(lowest, _NEG_INF)
+            yield from self._forward(run_start, start + tied)
+            stop = run_start
+
+    def _forward(self, start: int, stop: int) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        for chunk_start in range(start, stop, WALK_CHUNK_SIZE):
+            yield self._slice(chunk_start, min(chunk_start + WALK_CHUNK_SIZE, stop))
@@ -0,0 +1,149 @@
+import argparse
+import json
+import random
+import sys
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Field distributions as (value, weight), modelled on the seed leads in app.py
+INDUSTRIES = (
+    ('SaaS', 22), ('FinTech', 14), ('HealthTech', 10), ('AI/ML', 10), ('Cybersecurity', 8),
+    ('EdTech', 7), ('CleanTech', 6), ('E-Commerce', 9), ('Analytics', 8), ('Cloud Infrastructure', 6)
+)
+COMPANY_SIZES = (
+    ('11-50', 18), ('51-200', 28), ('101-200', 16), ('201-500', 22), ('501-1000', 16)
+)
+FUNDING_STAGES = (('Seed', 30), ('Series A', 30), ('Series B', 25), ('Series C', 15))
+ROLES = (
+    ('CTO', 14), ('CEO', 6), ('VP Engineering', 10), ('VP Technology', 6), ('VP Product', 6),
+    ('Head of Product', 7), ('Head of AI', 3), ('Head of Engineering', 6), ('Director of Engineering', 12),
+    ('Director of Technology', 6), ('Chief Security Officer', 3), ('Engineering Manager', 12), ('Senior Engineer', 9)
+)
+LOCATIONS = (
+    ('San Francisco, CA', 16), ('New York, NY', 14), ('Austin, TX', 9), ('Boston, MA', 9), ('Seattle, WA', 9),
+    ('Chicago, IL', 7), ('Palo Alto, CA', 6), ('Los Angeles, CA', 8), ('Denver, CO', 6), ('Portland, OR', 5),
+    ('Atlanta, GA', 4), ('Miami, FL', 3), ('London, UK', 2), ('Berlin, Germany', 2)
+)
+# Tech stacks are one pick from each layer, like the seed leads' [frontend, backend, cloud, database]
+TECH_LAYERS = (
+    (('React', 50), ('Vue.js', 20), ('Angular', 15), ('Svelte', 5), (None, 10)),
+    (('Node.js', 30), ('Python', 25), ('Java', 12), ('Go', 10), ('Ruby on Rails', 8), ('PHP', 7),
+     ('Django', 5), ('TensorFlow', 3)),
+    (('AWS', 55), ('GCP', 22), ('Azure', 20), (None, 3)),
+    (('PostgreSQL', 40), ('MongoDB', 22), ('MySQL', 20), ('Redis', 13), (None, 5))
+)
+
+FIRST_NAMES = (
+    'Sarah', 'Michael', 'Emily', 'David', 'Lisa', 'Robert', 'Jennifer', 'Mark', 'Amanda', 'James',
+    'Priya', 'Wei', 'Carlos', 'Fatima', 'Olivia', 'Noah', 'Sofia', 'Liam', 'Aisha', 'Daniel',
+    'Hannah', 'Kenji', 'Maria', 'Ethan', 'Chloe', 'Omar', 'Grace', 'Lucas', 'Nina', 'Samuel'
+)
+LAST_NAMES = (
+    'Johnson', 'Chen', 'Rodriguez', 'Park', 'Thompson', 'Williams', 'Kim', 'Anderson', 'Martinez', 'Wilson',
+    'Patel', 'Nguyen', 'Garcia', 'Smith', 'Brown', 'Lee', 'Müller', 'Okafor', 'Rossi', 'Cohen',
+    'Singh', 'Tanaka', 'Silva', 'Dubois', 'Ivanova', 'Khan', 'Murphy', 'Larsen', 'Novak', 'Haddad'
+)
+COMPANY_PREFIXES = (
+    'Tech', 'Data', 'Cloud', 'Fin', 'Green', 'Health', 'Secure', 'Edu', 'Quantum', 'Bright',
+    'Nova', 'Blue', 'Apex', 'Core', 'Vector', 'Pixel', 'Neural', 'Swift', 'Open', 'Stellar'
+)
+COMPANY_SUFFIXES = (
+    'Corp', 'Flow', 'Scale', 'Works', 'Labs', 'Systems', 'Connect', 'Net', 'Logic', 'Stack',
+    'Hub', 'Wave', 'Forge', 'Path', 'Point'
+)
+COMPANY_KINDS = ('Solutions', 'Analytics', 'Platform', 'Technologies', 'Inc', None, None, None)
+EMAIL_DOMAIN_TLDS = (('com', 70), ('io', 18), ('ai', 6), ('co', 6))
+
+# Share of leads with an invalid email / no LinkedIn profile
+INVALID_EMAIL_RATE = 0.08
+MISSING_LINKEDIN_RATE = 0.12
+
+# Days since last activity follow an exponential distribution with this mean, capped
+MEAN_ACTIVITY_AGE_DAYS = 25
+MAX_ACTIVITY_AGE_DAYS = 365
+
+
+class _Weighted:
+    """Fast repeated weighted choice from a (value, weight) table"""
+
+    def __init__(self, table: Sequence[Tuple[Any, float]]):
+        self.values = [value for value, _ in table]
+        self.cum_weights = list(accumulate(weight for _, weight in table))
+
+    def pick(self, rng: random.Random) -> Any:
+        return rng.choices(self.values, cum_weights=self.cum_weights)[0]
+
+
+_industries = _Weighted(INDUSTRIES)
+_sizes = _Weighted(COMPANY_SIZES)
+_stages = _Weighted(FUNDING_STAGES)
+_roles = _Weighted(ROLES)
+_locations = _Weighted(LOCATIONS)
+_tech_layers = [_Weighted(layer) for layer in TECH_LAYERS]
+_tlds = _Weighted(EMAIL_DOMAIN_TLDS)
+
+
+def _slug(text: str) -> str:
+    return ''.join(ch for ch in text.lower() if ch.isascii() and ch.isalnum())
+
+
+def synthetic_lead(rng: random.Random, lead_id: int, as_of: date) -> Dict[str, Any]:
+    """One raw lead drawn from the field distributions"""
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    kind = rng.choice(COMPANY_KINDS)
+    company = rng.choice(COMPANY_PREFIXES) + rng.choice(COMPANY_SUFFIXES) + (f' {kind}' if kind else '')
+    domain = f'{_slug(company)}.{_tlds.pick(rng)}'
+    local = '.'.join(map(_slug, rng.choice(((first, last), (first[0], last), (first,), (last,), (first + last[0],)))))
+
+    # Invalid addresses are malformed, as scraped or mistyped ones would be
+    email_valid = rng.random() >= INVALID_EMAIL_RATE
+    email = f'{local}@{domain}' if email_valid else f'{local}.{domain}'
+    activity_age = min(int(rng.expovariate(1 / MEAN_ACTIVITY_AGE_DAYS)), MAX_ACTIVITY_AGE_DAYS)
+
+    return {
+        'id': lead_id,
+        'company': company,
+        'contact_name': f'{first} {last}',
+        'email': email,
+        'role': _roles.pick(rng),
+        'company_size': _sizes.pick(rng),
+        'location': _locations.pick(rng),
+        'tech_stack': [tech for tech in (layer.pick(rng) for layer in _tech_layers) if tech],
+        'industry': _industries.pick(rng),
+        'funding_stage': _stages.pick(rng),
+        'engagement_score': max(0, min(100, round(rng.gauss(72, 14)))),
+        'email_valid': email_valid,
+        'linkedin_url': '' if rng.random() < MISSING_LINKEDIN_RATE else f'linkedin.com/in/{_slug(first + last)}{lead_id}',
+        'last_activity': (as_of - timedelta(days=activity_age)).isoformat()
+    }
+
+
+def generate_leads(count: int, seed: int = 0, start_id: int = 1,
+                   as_of: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+    """Yield count synthetic raw leads with ids from start_id
+
+    The output is fully determined by (count, seed, start_id, as_of); as_of
+    (default: today) anchors the activity dates, so readiness stays realistic.
+    """
+    rng = random.Random(seed)
+    as_of = as_of or date.today()
+    for lead_id in range(start_id, start_id + count):
+        yield synthetic_lead(rng, lead_id, as_of)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Write synthetic leads as JSONL (see lead_ingest.py)')
+    parser.add_argument('count', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start-id', type=int, default=1)
+    parser.add_argument('--as-of', type=date.fromisoformat, default=None, help='activity reference date (default: today)')
+    args = parser.parse_args(argv)
+
+    for lead in generate_leads(args.count, args.seed, args.start_id, args.as_of):
+        sys.stdout.write(json.dumps(lead) + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,15 @@
+import os
+
+import pytest
+
+# Keep the background validator out of any test that imports the app
+os.environ.setdefault('EMAIL_VALIDATION', '0')
+
+from lead_intelligence import enrich_leads
+from lead_store import LeadStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """An empty LeadStore on a temporary database"""
+    return LeadStore(str(tmp_path / 'leads.db'), enrich_leads)
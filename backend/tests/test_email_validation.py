@@ -0,0 +1,108 @@
+import io
+import json
+
+from caching import TTLCache
+from email_validation import (
+    DISPOSABLE, INVALID_SYNTAX, MISSING, NEGATIVE_DOMAIN_CACHE_TTL, ROLE_ADDRESS, UNRESOLVABLE, VALID,
+    EmailValidator, StaticResolver, email_is_valid, local_status, normalize_address
+)
+from lead_ingest import ingest
+
+
+def make_lead(lead_id, email, **fields):
+    return {'id': lead_id, 'company': 'Acme', 'contact_name': 'Jo Smith', 'email': email, 'email_valid': True, **fields}
+
+
+def status(store, lead_id):
+    return store.get(lead_id)['email_validation']['status']
+
+
+def test_normalize_and_syntax():
+    assert normalize_address(' MAILTO:Jo@Acme.COM. ') == 'jo@acme.com'
+    assert normalize_address('jo@bücher.de') == 'jo@xn--bcher-kva.de'
+    assert local_status('') == MISSING
+    assert local_status('jo.acme.com') == INVALID_SYNTAX
+    assert local_status('jo..smith@acme.com') == INVALID_SYNTAX
+    assert local_status('jo@acme') == INVALID_SYNTAX
+    assert local_status('jo.smith+crm@acme.com') is None
+
+
+def test_disposable_and_role_addresses():
+    assert local_status('jo@mailinator.com') == DISPOSABLE
+    assert local_status('jo@eu.mailinator.com') == DISPOSABLE
+    assert local_status('sales@acme.com') == ROLE_ADDRESS
+    assert local_status('info+leads@acme.com') == ROLE_ADDRESS
+    assert local_status('salesforce@acme.com') is None
+
+
+def test_verdicts_are_annotations(store):
+    store.upsert_many([
+        make_lead(1, 'jo@acme.com'), make_lead(2, 'info@acme.com'),
+        make_lead(3, 'jo@nowhere.invalid'), make_lead(4, 'jo@yopmail.com'),
+    ])
+    validator = EmailValidator(store, resolver=StaticResolver(['acme.com']))
+    assert validator.validate_batch([1, 2, 3, 4]) == 4
+    assert [status(store, i) for i in (1, 2, 3, 4)] == [VALID, ROLE_ADDRESS, UNRESOLVABLE, DISPOSABLE]
+
+    # The imported flag is kept; scoring follows the verdict
+    assert store.get(3)['email_valid'] and not email_is_valid(store.get(3))
+    assert store.get(1)['score'] - store.get(3)['score'] >= 10
+
+    # Unchanged verdicts are not written again
+    assert validator.validate_batch([1, 2, 3, 4]) == 0
+
+
+def test_reimport_keeps_verdict_and_skips_unchanged(store):
+    lead = make_lead(1, 'jo@nowhere.invalid')
+    store.upsert_many([lead])
+    EmailValidator(store, resolver=StaticResolver([])).validate_batch([1])
+    version = store.version
+
+    report = ingest(io.StringIO(json.dumps(lead) + '\n'), 'jsonl', store)
+    assert report.unchanged == 1 and store.version == version
+
+    # A changed lead is re-enriched with its verdict; a changed email makes the verdict stale
+    store.upsert_many([{**lead, 'role': 'CTO'}])
+    assert status(store, 1) == UNRESOLVABLE and not email_is_valid(store.get(1))
+    store.upsert_many([{**lead, 'email': 'jo@acme.com'}])
+    assert email_is_valid(store.get(1))
+
+    store.reenrich()
+    assert store.get(1)['email_validation']['address'] == 'jo@nowhere.invalid'
+
+
+def test_domain_cache_hits(store):
+    store.upsert_many([make_lead(i, f'jo{i}@acme.com') for i in range(1, 6)])
+    resolver = StaticResolver(['acme.com'])
+    validator = EmailValidator(store, resolver=resolver)
+    validator.validate_batch([1, 2, 3])
+    validator.validate_batch([4, 5])
+    assert resolver.calls == 1 and validator.domains.hits == 1
+    assert all(status(store, i) == VALID for i in range(1, 6))
+
+
+def test_negative_verdicts_expire_sooner(store):
+    now = [0.0]
+    resolver = StaticResolver([])
+    validator = EmailValidator(store, resolver=resolver)
+    validator.domains = TTLCache(100, 24 * 3600, clock=lambda: now[0])
+
+    assert validator.resolve_domains(['nowhere.invalid']) == {'nowhere.invalid': False}
+    now[0] = NEGATIVE_DOMAIN_CACHE_TTL - 1
+    validator.resolve_domains(['nowhere.invalid'])
+    assert resolver.calls == 1
+    now[0] = NEGATIVE_DOMAIN_CACHE_TTL + 1
+    validator.resolve_domains(['nowhere.invalid'])
+    assert resolver.calls == 2
+
+
+def test_failed_lookup_leaves_lead_untouched(store):
+    def failing(domain):
+        raise OSError('resolver timed out')
+
+    store.upsert_many([make_lead(1, 'jo@acme.com')])
+    version = store.version
+    validator = EmailValidator(store, resolver=failing)
+    assert validator.validate_batch([1]) == 0
+    assert store.version == version and store.get(1).get('email_validation') is None
+    assert validator.lookup_errors == 1 and len(validator.domains) == 0
@@ -0,0 +1,58 @@
+import io
+import json
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+from import_jobs import DONE, FAILED, INTERRUPTED, ImportJobs
+from lead_ingest import ingest
+from synthetic_leads import generate_leads
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    return ImportJobs(str(tmp_path / 'imports'))
+
+
+def upload(leads):
+    return io.BytesIO(''.join(json.dumps(lead) + '\n' for lead in leads).encode())
+
+
+def test_import_runs_in_the_background(jobs, store):
+    seen = []
+
+    def run(stream, fmt, progress):
+        def record(report):
+            seen.append(jobs.status(job['id'])['imported'])
+            progress(report)
+        return ingest(stream, fmt, store, batch_size=10, progress=record)
+
+    job = jobs.submit(upload(generate_leads(25)), 'jsonl', run)
+    assert job['status'] in ('queued', 'running') and job['imported'] == 0
+
+    job = jobs.wait(job['id'])
+    assert job['status'] == DONE and (job['rows'], job['imported']) == (25, 25)
+    assert len(store) == 25 and seen == [0, 10, 20]
+    # The upload is spooled only until its import finishes
+    assert sorted(p.suffix for p in pathlib.Path(jobs.directory).iterdir()) == ['.json']
+
+
+def test_failed_import_is_reported(jobs):
+    def run(stream, fmt, progress):
+        raise ValueError('store is read-only')
+
+    job = jobs.wait(jobs.submit(upload([]), 'jsonl', run)['id'])
+    assert job['status'] == FAILED and job['error'] == 'store is read-only'
+
+
+def test_status_from_another_process(jobs, tmp_path):
+    assert jobs.status('0' * 32) is None and jobs.status('../etc/passwd') is None
+
+    # A job left running by a process that has exited
+    exited = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+    job_id = 'a' * 32
+    (tmp_path / 'imports' / f'{job_id}.json').write_text(json.dumps({'id': job_id, 'status': 'running',
+                                                                      'pid': int(exited.stdout)}))
+    assert ImportJobs(str(tmp_path / 'imports')).status(job_id)['status'] == INTERRUPTED
@@ -0,0 +1,122 @@
+import random
+from collections import Counter
+
+import numpy as np
+
+import lead_aggregates
+from lead_aggregates import SKETCH_REBUILD_FRACTION, LeadAggregates, LeadSketches
+from lead_intelligence import enrich_leads
+from synthetic_leads import generate_leads
+
+ROLES = ['CTO', 'VP Engineering', 'Head of Data', 'Engineer']
+SIZES = ['11-50', '51-200', '201-500', '1000+']
+
+
+def make_leads(count, seed=0):
+    rng = random.Random(seed)
+    return [{'id': lead_id, 'company': f'Company {lead_id}', 'contact_name': 'Jo Smith',
+             'email': f'jo@company{lead_id}.com', 'role': rng.choice(ROLES), 'company_size': rng.choice(SIZES),
+             'location': rng.choice(['Austin, TX', 'Boston, MA', 'Denver, CO']),
+             'tech_stack': rng.sample(['AWS', 'React', 'Python', 'Kubernetes'], 2),
+             'industry': rng.choice(['SaaS', 'Fintech', 'Healthcare']), 'funding_stage': 'Series A',
+             'engagement_score': rng.randint(0, 100), 'email_valid': rng.random() < 0.8,
+             'last_activity': f'2025-10-{rng.randint(1, 28):02d}'}
+            for lead_id in range(1, count + 1)]
+
+
+def payloads(aggregates):
+    analytics = aggregates.analytics()
+    for key in ('locations', 'industries'):
+        analytics[key] = sorted(analytics[key], key=lambda row: row['name'])
+    return analytics, aggregates.quality_report(), aggregates.industry_insights()
+
+
+def test_incremental_aggregates_match_a_recount(store):
+    aggregates = LeadAggregates()
+    store.subscribe(aggregates.on_change)
+    leads = make_leads(300)
+    store.upsert_many(leads)
+    store.upsert_many({**lead, 'industry': 'Retail', 'engagement_score': 100 - lead['engagement_score']}
+                      for lead in leads[::3])
+    store.delete_many(range(1, 301, 7))
+
+    recount = LeadAggregates()
+    for lead in store.all():
+        recount.on_change(None, lead)
+    assert aggregates.total == len(store)
+    assert payloads(aggregates) == payloads(recount)
+
+
+def test_sketches_track_exact_counts(store):
+    store.upsert_many(generate_leads(2000))
+    sketches = LeadSketches(store)
+    store.subscribe(sketches.on_change)
+    store.delete_many(range(1, 101))
+
+    leads = list(store.all())
+    analytics = sketches.analytics(top=5)
+    industries = Counter(lead['industry'] for lead in leads)
+    assert [(row['name'], row['count']) for row in analytics['industries']] == industries.most_common(5)
+    locations = len({lead['location'] for lead in leads})
+    assert abs(analytics['distinct']['locations'] - locations) <= 0.05 * locations
+
+    scores = np.array([lead['score'] for lead in leads])
+    assert abs(sketches.percentiles()['score']['p50'] - np.percentile(scores, 50)) <= 2
+
+
+def test_retractions_are_rebuilt_in_the_background(store):
+    store.upsert_many(generate_leads(500))
+    sketches = LeadSketches(store)
+    store.subscribe(sketches.on_change)
+    store.upsert_many([{**lead, 'company': f'{lead["company"]} {lead["id"]}'} for lead in generate_leads(500)])
+    sketches.join()
+    # Retractions notified after the last rebuild started stay below the threshold
+    assert sketches.generation >= 1 and sketches.retracted <= SKETCH_REBUILD_FRACTION * 500
+    assert abs(sketches.analytics()['distinct']['companies'] - 500) <= 25 + sketches.retracted
+
+
+def test_rebuild_folds_in_writes_made_while_it_reads(store, monkeypatch):
+    leads = list(generate_leads(200))
+    store.upsert_many(leads)
+    sketches = LeadSketches(store)
+    store.subscribe(sketches.on_change)
+    scan = store.all
+
+    def busy_scan():
+        # A write lands for every lead the rebuild reads
+        for lead in scan():
+            store.upsert({**leads[lead['id'] - 1], 'id': lead['id'] + 1000, 'company': f'New {lead["id"]}'})
+            yield lead
+
+    monkeypatch.setattr(store, 'all', busy_scan)
+    # Keep the writes' own retractions from starting another rebuild after this one
+    monkeypatch.setattr(lead_aggregates, 'SKETCH_REBUILD_FRACTION', 1.0)
+    sketches._rebuild()
+    assert sketches.generation == 1 and sketches.retracted == 200
+    assert abs(sketches.analytics()['distinct']['companies'] - len({lead['company'] for lead in scan()})) <= 20
+
+
+def test_disjoint_shards_merge(store):
+    leads = enrich_leads(list(generate_leads(1000)))
+    shards = [LeadSketches(), LeadSketches()]
+    for lead in leads:
+        shards[lead['id'] % 2].on_change(None, lead)
+    whole = LeadSketches()
+    for lead in leads:
+        whole.on_change(None, lead)
+
+    merged = LeadSketches.from_dict(shards[0].to_dict())
+    merged.merge(LeadSketches.from_dict(shards[1].to_dict()))
+    assert merged.total == whole.total == 1000
+    assert merged.analytics() == whole.analytics()
+
+
+def test_aggregates_without_group_counts(store):
+    store.upsert_many(generate_leads(50))
+    exact, slim = LeadAggregates(), LeadAggregates(group_counts=False)
+    store.subscribe(exact.on_change)
+    store.subscribe(slim.on_change)
+    analytics = exact.analytics()
+    assert slim.analytics() == {key: value for key, value in analytics.items()
+                                if key not in ('top_technologies', 'locations', 'industries')}
+    assert not slim.location_counts and slim.industry_insights() == exact.industry_insights()
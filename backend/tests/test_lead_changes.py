@@ -0,0 +1,43 @@
+from lead_changes import ChangeLog
+from synthetic_leads import generate_leads
+
+
+def test_changes_since_a_sequence_number(store):
+    leads = list(generate_leads(10))
+    store.upsert_many(leads[:5])
+    log = ChangeLog(store)
+    log.start()
+    start = store.version
+    # Leads loaded before the log started are only reachable through a resync
+    assert log.changes(None) == (start, True, [], [])
+
+    store.upsert_many(leads[5:])
+    middle = store.version
+    store.upsert({**leads[0], 'company': 'Renamed'})
+    store.upsert({**leads[0], 'company': 'Renamed again'})
+    store.delete_many([7])
+
+    changes = log.changes(start)
+    assert changes.seq == store.version and not changes.resync
+    assert [lead['id'] for lead in changes.upserts] == [1, 6, 8, 9, 10]
+    assert changes.deletes == [7]
+    # A lead changed several times appears once, as it is now
+    assert changes.upserts[0]['company'] == 'Renamed again'
+
+    changes = log.changes(middle)
+    assert [lead['id'] for lead in changes.upserts] == [1] and changes.deletes == [7]
+    assert log.changes(store.version) == (store.version, False, [], [])
+
+
+def test_out_of_range_sequence_numbers_resync(store):
+    store.upsert_many(generate_leads(3))
+    log = ChangeLog(store, maxsize=2)
+    log.start()
+    start = store.version
+    for name in ('A', 'B', 'C'):
+        store.upsert({**next(iter(generate_leads(1))), 'company': name})
+    # The first update was compacted out of the log
+    assert log.changes(start).resync
+    assert not log.changes(store.version - 2).resync
+    # A sequence number ahead of the store, e.g. from before a database reset
+    assert log.changes(store.version + 1) == (store.version, True, [], [])
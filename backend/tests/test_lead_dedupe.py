@@ -0,0 +1,109 @@
+import lead_dedupe
+from email_validation import EmailValidator
+from lead_dedupe import (
+    dedupe, find_duplicates, merge_leads, name_words, names_compatible, normalize_company, normalize_email
+)
+
+
+def make_lead(lead_id, **fields):
+    return {'id': lead_id, 'company': 'Acme', 'contact_name': 'Jo Smith', 'email': f'jo{lead_id}@acme.com', **fields}
+
+
+def test_normalizers():
+    assert normalize_email(' Jo.Smith+crm@GoogleMail.com ') == 'josmith@gmail.com'
+    assert normalize_email('not-an-email') == ''
+    assert normalize_company('Acme, Inc.') == normalize_company('the ACME corp') == 'acme'
+
+
+def test_find_duplicates_by_email_and_similar_name():
+    leads = [
+        make_lead(1, email='jo@acme.com'),
+        make_lead(2, email='JO@acme.com', contact_name='Someone Else'),
+        make_lead(3, contact_name='Smith Jo'),
+        make_lead(4, company='Globex', contact_name='Hank Scorpio', email='hank@globex.com'),
+    ]
+    groups = sorted(sorted(group) for group in find_duplicates(leads))
+    assert groups == [[0, 1, 2]]
+
+
+def test_same_surname_colleagues_stay_apart():
+    leads = [
+        make_lead(1, contact_name='Lisa Anderson', email='lisa@acme.com'),
+        make_lead(2, contact_name='David Anderson', email='david@acme.com'),
+        make_lead(3, contact_name='Chloe Johnson', email='chloe@acme.com'),
+        make_lead(4, contact_name='Wei Johnson', email='wei@acme.com'),
+        make_lead(5, contact_name='Anderson', email='anderson@acme.com'),
+    ]
+    assert find_duplicates(leads) == []
+
+
+def test_name_matches_do_not_chain(monkeypatch):
+    # Even with every pair a MinHash candidate, "Dan" joins "Daniel" or "Dana" but never both
+    monkeypatch.setattr(lead_dedupe, '_similar_pairs', lambda *args: [(0, 1), (0, 2), (1, 2)])
+    leads = [
+        make_lead(1, contact_name='Dan Patel', email='dan@acme.com'),
+        make_lead(2, contact_name='Daniel Patel', email='daniel@acme.com'),
+        make_lead(3, contact_name='Dana Patel', email='dana@acme.com'),
+    ]
+    assert find_duplicates(leads) == [[0, 1]]
+
+
+def test_names_compatible():
+    def compatible(a, b):
+        return names_compatible(name_words(a), name_words(b))
+    assert compatible('Jo Smith', 'Smith Jo')
+    assert compatible('J. Smith', 'Jo Smith')
+    assert compatible('Chris Anderson', 'Christopher Anderson')
+    assert compatible('Jon Andersen', 'John Anderson')
+    assert not compatible('Lisa Anderson', 'David Anderson')
+    assert not compatible('Chloe Patel', 'Grace Patel')
+    assert not compatible('Unknown', 'Unknown')
+
+
+def test_unrelated_leads_at_free_mail_domains_stay_apart():
+    leads = [
+        make_lead(1, company='Acme', email='jo@gmail.com'),
+        make_lead(2, company='Globex', email='jo.smith@gmail.com'),
+    ]
+    assert find_duplicates(leads) == []
+
+
+def test_merge_keeps_best_record_and_fills_gaps():
+    merged = merge_leads([
+        {**make_lead(1, tech_stack=['AWS'], engagement_score=40, last_activity='2025-10-01'), 'score': 90},
+        {**make_lead(2, role='CTO', tech_stack=['React', 'AWS'], engagement_score=70,
+                     last_activity='2025-10-05'), 'score': 60},
+    ])
+    assert merged['id'] == 1
+    assert merged['role'] == 'CTO'
+    assert merged['tech_stack'] == ['AWS', 'React']
+    assert merged['engagement_score'] == 70
+    assert merged['last_activity'] == '2025-10-05'
+    assert 'score' not in merged
+
+
+def test_dedupe_merges_store(store):
+    store.upsert_many([make_lead(1, email='jo@acme.com'), make_lead(2, email='jo@acme.com', role='CTO')])
+    report = dedupe(store)
+    assert report.duplicate_groups == 1 and report.removed == 1
+    assert len(store) == 1
+
+
+def test_dedupe_dry_run_writes_nothing(store):
+    store.upsert_many([make_lead(1, email='jo@acme.com'), make_lead(2, email='jo@acme.com')])
+    version = store.version
+    report = dedupe(store, dry_run=True)
+    assert report.groups == [[1, 2]] or report.groups == [[2, 1]]
+    assert len(store) == 2 and store.version == version
+
+
+def test_dedupe_after_email_validation(store):
+    # Validated leads carry a nested email_validation mapping that must be copied, not the stored view
+    store.upsert_many([make_lead(1, email='jo@acme.com'), make_lead(2, email='jo@acme.com', tech_stack=['AWS'])])
+    EmailValidator(store).validate_batch([1, 2])
+    assert store.get(1)['email_validation']['status'] == 'valid'
+
+    report = dedupe(store)
+    assert report.removed == 1
+    (survivor,) = store.all()
+    assert survivor['email_validation'].to_dict() == {'address': 'jo@acme.com', 'status': 'valid'}
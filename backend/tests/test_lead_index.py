@@ -0,0 +1,118 @@
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from lead_index import Bitmap, LeadIndex, slots_from_bitmap
+from synthetic_leads import generate_leads
+
+LOCATIONS = ['Chicago, IL', 'Austin, TX', 'Dallas, TX', 'Boston, MA', 'San Francisco, CA']
+ROLES = ['CTO', 'VP Engineering', 'VP Sales', 'Head of Data']
+SIZES = ['1-10', '11-50', '51-200', '201-500']
+TECH = ['AWS', 'React', 'Python', 'Salesforce', 'Kubernetes']
+
+
+def make_leads(count, seed=0):
+    rng = random.Random(seed)
+    return [{'id': lead_id, 'location': rng.choice(LOCATIONS), 'role': rng.choice(ROLES),
+             'industry': rng.choice(['SaaS', 'Fintech', 'Healthcare']), 'company_size': rng.choice(SIZES),
+             'tech_stack': rng.sample(TECH, rng.randint(0, 3))}
+            for lead_id in range(1, count + 1)]
+
+
+def matches(lead, field, value):
+    if field == 'tech_stack':
+        return value.lower() in (tech.lower() for tech in lead['tech_stack'])
+    if field == 'company_size':
+        return lead[field] == value
+    return value.lower() in lead[field].lower()
+
+
+def build(leads):
+    index = LeadIndex()
+    for lead in leads:
+        index.on_change(None, lead)
+    return index
+
+
+def test_filters_match_a_scan():
+    leads = make_leads(500)
+    index = build(leads)
+    for filters in ({'location': 'tx'}, {'location': ', T'}, {'role': 'vp', 'tech_stack': 'aws'},
+                    {'company_size': '11-50', 'industry': 'tech'}, {'location': 'Nowhere'}, {}):
+        expected = [lead['id'] for lead in leads if all(matches(lead, f, v) for f, v in filters.items())]
+        assert index.filter(**filters) == expected
+
+
+def test_updates_and_deletes_move_postings():
+    leads = make_leads(50)
+    index = build(leads)
+    moved = {**leads[0], 'location': 'Town 1, TX'}
+    index.on_change(leads[0], moved)
+    index.on_change(leads[1], None)
+    assert index.filter(location='town') == [1]
+    assert 2 not in index.filter()
+    # A value whose last lead left is dropped from the trigram index too
+    index.on_change(moved, leads[0])
+    assert index.filter(location='town') == [] and 'town 1, tx' not in index.fields['location'].postings
+
+
+@pytest.fixture
+def indexed(store):
+    # Every tenth lead in a town of its own: a high-cardinality field with sparse postings
+    store.upsert_many({**lead, 'location': f'Town {lead["id"]}, TX'} if lead['id'] % 10 == 0 else lead
+                      for lead in generate_leads(3000))
+    index = LeadIndex()
+    store.subscribe(index.on_change)
+    return store, index
+
+
+def test_substring_match_covers_sparse_and_dense_postings(indexed):
+    store, index = indexed
+    for needle in ('chicago', 'town 12', ', tx', 'o', 'vp'):
+        field = 'role' if needle == 'vp' else 'location'
+        expected = [lead['id'] for lead in store.all() if needle in lead[field].lower()]
+        assert index.filter(**{field: needle}) == expected
+
+
+def test_facet_counts_match_filtered_leads(indexed):
+    store, index = indexed
+    total, facets = index.facets(['location', 'tech_stack', 'industry'], min_score=60, role='vp')
+    matching = [lead for lead in store.all() if lead['score'] >= 60 and 'vp' in lead['role'].lower()]
+    assert total == len(matching)
+    for field in ('location', 'industry'):
+        # Values with no matching lead are listed with a zero count
+        assert {value: count for value, count in facets[field] if count} == Counter(lead[field] for lead in matching)
+    assert dict(facets['tech_stack']) == Counter(tech for lead in matching for tech in lead['tech_stack'])
+
+    # A field's own filter does not narrow its counts
+    _, facets = index.facets(['role'], role='vp')
+    assert dict(facets['role']) == Counter(lead['role'] for lead in store.all())
+
+
+def test_sparse_postings_keep_no_dense_bitmap(indexed):
+    _, index = indexed
+    index.facets(['location'], role='vp')
+    index.filter(location='c')
+    postings = index.fields['location'].postings.values()
+    assert any(not posting.dense for posting in postings)
+    assert all(posting._bitmap is None for posting in postings if not posting.dense)
+
+
+def test_bitmap_matches_a_set_under_out_of_order_writes():
+    rng = np.random.default_rng(7)
+    bitmap, expected = Bitmap(), set()
+    for step in range(20_000):
+        slot = int(rng.integers(0, 5000))
+        if slot in expected:
+            bitmap.discard(slot)
+            expected.discard(slot)
+        else:
+            bitmap.add(slot)
+            expected.add(slot)
+        assert len(bitmap) == len(expected)
+        if step % 997 == 0:
+            assert bitmap.to_array().tolist() == sorted(expected)
+            assert slots_from_bitmap(bitmap.to_int()).tolist() == sorted(expected)
+    assert bitmap.to_array().tolist() == sorted(expected)
@@ -0,0 +1,58 @@
+import io
+import json
+
+import pytest
+
+from lead_ingest import ingest, raw_lead, start_worker_pool
+from lead_intelligence import enrich_leads
+from lead_store import LeadStore
+from synthetic_leads import generate_leads
+
+
+def jsonl(leads):
+    return io.StringIO(''.join(json.dumps(lead) + '\n' for lead in leads))
+
+
+def test_csv_import_reports_row_errors(store):
+    stream = io.StringIO('id,company,tech_stack,engagement_score\n1,Acme,"AWS, React",50\n,NoId,,\n2,Globex,,x\n')
+    report = ingest(stream, 'csv', store)
+    assert (report.rows, report.imported, report.error_count) == (3, 1, 2)
+    assert store.get(1)['tech_stack'] == ['AWS', 'React']
+
+
+def test_unchanged_leads_are_skipped(store):
+    leads = list(generate_leads(20))
+    assert ingest(jsonl(leads), 'jsonl', store).imported == 20
+    report = ingest(jsonl(leads), 'jsonl', store)
+    assert (report.imported, report.unchanged) == (0, 20)
+
+
+def test_exported_leads_reimport_unchanged(store):
+    store.upsert_many(list(generate_leads(5)))
+    report = ingest(jsonl(raw_lead(lead) for lead in store.all()), 'jsonl', store)
+    assert report.unchanged == 5
+
+
+def test_worker_pool_matches_inline_enrichment(store, tmp_path):
+    leads = list(generate_leads(250))
+    assert ingest(jsonl(leads), 'jsonl', store, workers=2, batch_size=40).imported == 250
+    inline = LeadStore(str(tmp_path / 'inline.db'), enrich_leads)
+    ingest(jsonl(leads), 'jsonl', inline)
+    assert [lead['score'] for lead in store.all()] == [lead['score'] for lead in inline.all()]
+
+
+@pytest.fixture(scope='module')
+def worker_pool():
+    pool = start_worker_pool(2)
+    yield pool
+    pool.shutdown()
+
+
+def test_shared_pool_is_reused_across_imports(store, worker_pool):
+    leads = list(generate_leads(250))
+    for _ in range(2):
+        report = ingest(jsonl(leads), 'jsonl', store, workers=2, batch_size=40, pool=worker_pool)
+        leads = [{**lead, 'engagement_score': 1} for lead in leads]
+        assert report.imported == 250
+    assert worker_pool.submit(int).result() == 0
+    assert {lead['engagement_score'] for lead in store.all()} == {1}
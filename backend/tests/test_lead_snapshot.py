@@ -0,0 +1,134 @@
+import json
+import os
+
+import pytest
+
+import lead_snapshot
+from background_jobs import BackgroundJobs
+from json_fragments import FragmentCache
+from lead_intelligence import enrich_leads
+from lead_snapshot import SharedLeadStore
+from lead_store import LazyListener
+from readiness_scheduler import ReadinessScheduler
+from synthetic_leads import generate_leads
+
+
+@pytest.fixture
+def open_shared(tmp_path):
+    """Opens SharedLeadStores on one database and snapshot, like worker processes do"""
+    def open_store():
+        return SharedLeadStore(str(tmp_path / 'leads.db'), enrich_leads, str(tmp_path / 'leads.snapshot'))
+    return open_store
+
+
+def contents(store):
+    return [dict(lead) for lead in store.all()]
+
+
+def test_writes_reach_other_processes(open_shared):
+    writer, reader = open_shared(), open_shared()
+    seen = []
+    reader.subscribe(lambda old, new: seen.append((old and old['id'], new and new['id'])))
+    writer.upsert_many(generate_leads(3))
+    assert reader.refresh()
+    assert seen == [(None, 1), (None, 2), (None, 3)]
+    assert not reader.refresh()
+
+    writer.upsert({**next(iter(generate_leads(1))), 'company': 'Renamed'})
+    writer.delete_many([2])
+    assert reader.refresh()
+    assert seen[3:] == [(1, 1), (2, None)]
+    assert reader.get(1)['company'] == 'Renamed' and 2 not in reader
+    assert contents(reader) == contents(writer)
+
+
+def test_annotations_stay_out_of_the_raw_record(open_shared):
+    writer, reader = open_shared(), open_shared()
+    lead = next(iter(generate_leads(1)))
+    writer.upsert_many([lead])
+    assert writer.annotate_many({lead['id']: {'email_validation': {'address': 'x@y.com', 'status': 'valid'}}}) == 1
+    reader.refresh()
+    assert reader.get(lead['id'])['email_validation']['status'] == 'valid'
+    assert reader.changed_leads([lead]) == []
+    reader.reenrich()
+    assert writer.get(lead['id'])['email_validation']['status'] == 'valid'
+
+
+def test_overlay_merges_into_base(open_shared, store, monkeypatch):
+    monkeypatch.setattr(lead_snapshot, 'OVERLAY_MIN_LEADS', 8)
+    shared = open_shared()
+    leads = list(generate_leads(40))
+    for target in (shared, store):
+        target.upsert_many(leads[:30])
+    base_version = shared.snapshot.base.version
+
+    # Small writes only rewrite the overlay: updates, a delete, a re-insert, new leads
+    for target in (shared, store):
+        target.upsert({**leads[4], 'company': 'Updated'})
+        target.delete_many([7, 31])
+        target.upsert_many([leads[7], leads[30]])
+    assert shared.snapshot.base.version == base_version
+    assert os.path.exists(shared.overlay_path)
+    assert contents(shared) == contents(store)
+
+    # Outgrowing the overlay merges everything into a new base; the next write starts a new overlay
+    for target in (shared, store):
+        target.upsert_many(leads[31:])
+    assert shared.snapshot.overlay is None and shared.snapshot.base.version > base_version
+    for target in (shared, store):
+        target.delete_many([1, 2])
+    assert len(shared.snapshot.overlay) == 2
+    assert contents(shared) == contents(store)
+    assert contents(open_shared()) == contents(store)
+
+
+def test_reopened_store_keeps_store_order(open_shared, store):
+    leads = list(generate_leads(5))
+    for target in (open_shared(), store):
+        target.upsert_many(leads[2:] + leads[:2])
+        target.delete_many([4])
+    assert [lead['id'] for lead in open_shared().all()] == [lead['id'] for lead in store.all()] == [3, 5, 1, 2]
+
+
+def test_records_carry_their_response_encoding(open_shared):
+    shared = open_shared()
+    shared.upsert_many(generate_leads(2))
+    fragments = FragmentCache(lambda obj: json.dumps(obj, sort_keys=True, separators=(',', ':')))
+    lead = shared.get(1)
+    assert fragments.fragment(lead) == lead.encoded
+    assert json.loads(lead.encoded) == dict(lead)
+    assert lead.encoded == fragments.dumps(dict(lead)).encode()
+
+
+def test_one_process_claims_background_jobs(open_shared):
+    owner, other = open_shared(), open_shared()
+    owner_jobs = BackgroundJobs(owner, ReadinessScheduler(owner), interval=60)
+    other_jobs = BackgroundJobs(other, ReadinessScheduler(other), interval=60, claim_interval=0)
+    assert owner_jobs.start() and owner_jobs.running
+    assert not other_jobs.start()
+    other_jobs.maybe_claim()
+    assert not other_jobs.running
+
+    # The lock is released when the owner exits
+    owner._jobs_lock.close()
+    other_jobs.maybe_claim()
+    assert other_jobs.running
+
+
+def test_lazy_listener_subscribes_on_first_use(store):
+    store.upsert_many(generate_leads(3))
+    built = []
+
+    class Counter:
+        def __init__(self):
+            self.count = 0
+            built.append(self)
+
+        def on_change(self, old, new):
+            self.count += (new is not None) - (old is not None)
+
+    counter = LazyListener(store, Counter)
+    assert not built
+    assert counter.count == 3
+    store.delete_many([1])
+    assert counter.count == 2 and len(built) == 1
@@ -0,0 +1,72 @@
+import numpy as np
+
+import lead_table
+from lead_intelligence import enrich_leads
+from lead_table import INTERNAL_FIELDS, LeadTable
+from synthetic_leads import generate_leads
+
+
+def test_leads_round_trip():
+    table = LeadTable()
+    leads = enrich_leads(list(generate_leads(50)))
+    odd = [
+        # Values that do not fit their columns, fields outside the schema, None and missing fields
+        {'id': 1001, 'company': None, 'score': '87', 'tech_stack': 'React', 'notes': {'source': 'fair'}},
+        {'id': 1002, 'email_validation': {'address': 'a@b.co', 'status': 'valid', 'checked': True}},
+        {'id': 1003, 'company': 'Ünïcode ✓ \ud800', 'engagement_score': 2 ** 70, 'sales_readiness': None},
+    ]
+    for lead in leads + odd:
+        table.put(lead['id'], lead)
+    for lead in leads + odd:
+        view = table.get(lead['id'])
+        # Internal fields are read by key but left out of iteration
+        assert view.to_dict() == {key: value for key, value in lead.items() if key not in INTERNAL_FIELDS}
+        assert all(view[key] == lead[key] for key in INTERNAL_FIELDS & lead.keys())
+    assert list(table) == [lead['id'] for lead in leads + odd]
+
+    updated = {**leads[3], 'company': 'Renamed', 'email_validation': {'address': 'x@y.co', 'status': 'disposable'}}
+    table.put(updated['id'], updated)
+    assert table.pop(leads[5]['id'])['company'] == leads[5]['company']
+    assert table.get(updated['id'])['email_validation'] == updated['email_validation']
+    assert table.get(updated['id'])['company'] == 'Renamed'
+    assert leads[5]['id'] not in table and len(table) == len(leads) + len(odd) - 1
+
+
+def test_compact_keeps_live_leads_in_order():
+    table = LeadTable()
+    leads = list(generate_leads(100))
+    for lead in leads:
+        table.put(lead['id'], lead)
+    for lead_id in range(1, 101, 2):
+        table.pop(lead_id)
+    table.compact()
+    assert np.array_equal(table.ids(), np.arange(2, 101, 2))
+    assert table.get(42).to_dict() == leads[41] and table.get(41) is None
+
+
+def test_string_updates_compact_the_table(monkeypatch):
+    monkeypatch.setattr(lead_table, 'COMPACT_GARBAGE_BYTES', 10_000)
+    table = LeadTable()
+    for lead_id in range(100):
+        table.put(lead_id, {'id': lead_id, 'company': f'Company {lead_id}'})
+    frame = table._frame
+
+    for version in range(1, 100):
+        for lead_id in range(100):
+            table.put(lead_id, {'id': lead_id, 'company': f'Company {lead_id} v{version}'})
+    # Updates alone, without any delete, swapped in a compacted frame with bounded buffers
+    assert table._frame is not frame
+    company = table._frame.root.columns['company']
+    assert company.garbage <= max(lead_table.COMPACT_GARBAGE_BYTES, len(company.buffer) - company.garbage)
+    assert [table.get(lead_id)['company'] for lead_id in range(100)] == [f'Company {i} v99' for i in range(100)]
+    assert np.array_equal(table.ids(), np.arange(100))
+
+
+def test_cleared_strings_count_as_garbage():
+    table = LeadTable()
+    table.put(1, {'id': 1, 'company': 'Acme', 'email_validation': {'address': 'a@acme.io', 'status': 'valid'}})
+    table.put(1, {'id': 1, 'company': None})
+    assert sum(column.garbage for column in table._frame.strings) == len('Acme') + len('a@acme.io')
+    table.compact()
+    assert sum(column.garbage for column in table._frame.strings) == 0
+    assert table.get(1).to_dict() == {'id': 1, 'company': None}
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from pagination import MAX_PAGE_SIZE, clamp_page_size, decode_cursor, encode_cursor, top_k_page_arrays
+
+
+def pages(keys, limit):
+    after, rows = None, []
+    while True:
+        page, after = top_k_page_arrays(keys, limit, after)
+        rows.extend(page.tolist())
+        if after is None:
+            return rows
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor((-87.5, 42))) == (-87.5, 42)
+    for cursor in ('not a cursor', 'e30'):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+
+def test_page_size_is_clamped():
+    assert clamp_page_size(0) == 1 and clamp_page_size(10 ** 6) == MAX_PAGE_SIZE
+
+
+@pytest.mark.parametrize('limit', [1, 7, 50, 1000])
+def test_pages_follow_full_sort(limit):
+    rng = np.random.default_rng(limit)
+    # Few distinct leading values: long tie runs cross page boundaries
+    keys = [-rng.integers(0, 5, 500).astype(float), -rng.integers(0, 100, 500).astype(float), rng.permutation(500)]
+    expected = np.lexsort(list(reversed(keys))).tolist()
+    assert pages(keys, limit) == expected
+
+
+def test_malformed_cursor():
+    with pytest.raises(ValueError):
+        top_k_page_arrays([np.zeros(3), np.arange(3)], 2, (1.0,))
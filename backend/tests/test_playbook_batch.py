@@ -0,0 +1,52 @@
+import json
+import threading
+
+import pytest
+
+from lead_ingest import start_worker_pool
+from playbook_batch import stream_playbooks
+from synthetic_leads import generate_leads
+
+
+@pytest.fixture(scope='module')
+def worker_pool():
+    pool = start_worker_pool(2)
+    yield pool
+    pool.shutdown()
+
+
+def records(chunks):
+    return [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+
+
+def test_every_lead_streamed_once_with_errors_for_unknown_ids(store, worker_pool):
+    store.upsert_many(list(generate_leads(60)))
+    lead_ids = list(range(1, 61)) + [999]
+    result = records(stream_playbooks(store, lead_ids, pool=worker_pool, workers=2, chunk_size=7))
+    assert sorted(record['lead_id'] for record in result) == sorted(lead_ids)
+    assert [record for record in result if 'error' in record] == [{'lead_id': 999, 'error': 'Lead not found'}]
+    assert all('playbook' in record for record in result if record['lead_id'] != 999)
+
+
+def test_pool_matches_inline(store, worker_pool):
+    store.upsert_many(list(generate_leads(30)))
+    lead_ids = list(range(1, 31))
+    inline = records(stream_playbooks(store, lead_ids, chunk_size=7))
+    pooled = records(stream_playbooks(store, lead_ids, pool=worker_pool, workers=2, chunk_size=7))
+    assert sorted(pooled, key=lambda record: record['lead_id']) == inline
+
+
+def test_small_batches_run_inline(store, worker_pool):
+    store.upsert_many(list(generate_leads(3)))
+    threads = threading.active_count()
+    result = records(stream_playbooks(store, [1, 2, 3], pool=worker_pool))
+    assert [record['lead_id'] for record in result] == [1, 2, 3]
+    assert threading.active_count() == threads
+
+
+def test_abandoned_stream_leaves_pool_usable(store, worker_pool):
+    store.upsert_many(list(generate_leads(40)))
+    stream = stream_playbooks(store, list(range(1, 41)), pool=worker_pool, workers=1, chunk_size=5)
+    next(stream)
+    stream.close()
+    assert len(records(stream_playbooks(store, list(range(1, 41)), pool=worker_pool, chunk_size=5))) == 40
@@ -0,0 +1,67 @@
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from lead_ingest import raw_lead
+from lead_snapshot import SharedLeadStore
+from lead_intelligence import enrich_leads
+from readiness_scheduler import ReadinessScheduler
+
+
+def active_lead(lead_id, days_ago):
+    return {
+        'id': lead_id, 'company': 'Acme', 'email': 'jo@acme.com', 'role': 'CTO', 'industry': 'SaaS',
+        'engagement_score': 90, 'email_valid': True,
+        'last_activity': (datetime.now() - timedelta(days=days_ago)).isoformat(timespec='seconds')
+    }
+
+
+def test_bookkeeping_fields_stay_out_of_payloads(store):
+    store.upsert_many([active_lead(1, 2)])
+    lead = store.get(1)
+    assert lead['recent_activity_until'] > time.time()
+    assert lead['last_activity_epoch'] is not None
+    assert 'recent_activity_until' not in dict(lead) and 'last_activity_epoch' not in lead.to_dict()
+    assert 'recent_activity' not in json.loads(json.dumps(lead.to_dict()))['sales_readiness']
+    assert set(raw_lead(lead)) == set(active_lead(1, 2))
+
+
+def test_shared_store_hides_bookkeeping_fields(tmp_path):
+    store = SharedLeadStore(str(tmp_path / 'leads.db'), enrich_leads, str(tmp_path / 'leads.snapshot'))
+    store.upsert_many([active_lead(1, 2)])
+    lead = store.get(1)
+    assert lead['recent_activity_until'] is not None
+    assert 'recent_activity_until' not in dict(lead)
+
+
+def test_readiness_flips_when_activity_expires(store, monkeypatch):
+    store.upsert_many([active_lead(1, 2), active_lead(2, 60)])
+    scheduler = ReadinessScheduler(store)
+    store.subscribe(scheduler.on_change)
+    assert store.get(2)['recent_activity_until'] is None
+    until = store.get(1)['recent_activity_until']
+    assert scheduler.next_due == until
+    confidence = store.get(1)['sales_readiness']['confidence']
+
+    assert scheduler.run_due(until - 1) == 0
+    monkeypatch.setattr(time, 'time', lambda: until + 1)
+    assert scheduler.run_due() == 1
+    assert store.get(1)['recent_activity_until'] is None
+    assert store.get(1)['sales_readiness']['confidence'] < confidence
+    assert scheduler.next_due is None
+
+
+def test_stale_entries_are_skipped(store):
+    store.upsert_many([active_lead(1, 2)])
+    scheduler = ReadinessScheduler(store)
+    store.subscribe(scheduler.on_change)
+    until = store.get(1)['recent_activity_until']
+    store.upsert_many([active_lead(1, 100)])
+    store.delete_many([1])
+    assert scheduler.run_due(until + 1) == 0
+
+
+def test_timezone_aware_activity_counts_as_recent(store):
+    lead = {**active_lead(1, 0), 'last_activity': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}
+    store.upsert_many([lead])
+    assert store.get(1)['recent_activity_until'] is not None
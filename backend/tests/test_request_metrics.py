@@ -0,0 +1,82 @@
+import multiprocessing
+
+from request_metrics import Histogram, RequestMetrics, reset_shared_metrics
+
+
+def record(directory, seconds):
+    metrics = RequestMetrics(directory=directory)
+    metrics.observe_request('get_leads', 'GET', 200, seconds, 1000)
+    # What the flusher thread does once a second, and on exit
+    metrics.flush()
+
+
+def sample(text, prefix):
+    return next(line.rsplit(' ', 1)[1] for line in text.splitlines() if line.startswith(prefix))
+
+
+def test_requests_render_as_prometheus_text():
+    metrics = RequestMetrics(enabled=True, directory=None)
+    metrics.observe_request('get_leads', 'GET', 200, 0.01, 1000)
+    metrics.observe_request('get_leads', 'GET', 200, 0.02, None)
+    text = metrics.render()
+    assert '# TYPE http_requests_total counter' in text
+    assert sample(text, 'http_requests_total{endpoint="get_leads",method="GET",status="200"}') == '2'
+    assert sample(text, 'http_request_duration_seconds_count{') == '2'
+    assert sample(text, 'http_response_size_bytes_count{') == '1'
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('latency', 'help', ['endpoint'], buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, 'x')
+    assert list(histogram.samples()) == [
+        'latency_bucket{endpoint="x",le="0.1"} 2',
+        'latency_bucket{endpoint="x",le="1"} 3',
+        'latency_bucket{endpoint="x",le="+Inf"} 4',
+        'latency_sum{endpoint="x"} 3.65',
+        'latency_count{endpoint="x"} 4',
+    ]
+
+
+def test_streamed_responses_are_recorded_when_sent():
+    metrics = RequestMetrics(enabled=True, directory=None)
+    stream = metrics.observe_stream(iter([b'ab', b'cde']), 'export_leads', 'GET', 200, 0.0)
+    assert 'http_requests_total{' not in metrics.render()
+    assert b''.join(stream) == b'abcde'
+    assert float(sample(metrics.render(), 'http_response_size_bytes_sum{')) == 5
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = RequestMetrics(enabled=False, directory=None)
+    metrics.observe_request('get_leads', 'GET', 200, 0.01, 1000)
+    with metrics.stage('filter'):
+        pass
+    assert 'http_requests_total{' not in metrics.render()
+
+
+def test_process_metrics_render_alone():
+    metrics = RequestMetrics(directory=None)
+    metrics.observe_request('get_leads', 'GET', 200, 0.01, 1000)
+    assert sample(metrics.render(), 'http_requests_total{') == '1'
+
+
+def test_scrape_sums_every_worker(tmp_path):
+    directory = str(tmp_path / 'metrics')
+    metrics = RequestMetrics(directory=directory)
+    metrics.observe_request('get_leads', 'GET', 200, 0.01, 1000)
+
+    # Other worker processes, one of which has exited
+    context = multiprocessing.get_context('fork')
+    for seconds in (0.02, 0.03):
+        worker = context.Process(target=record, args=(directory, seconds))
+        worker.start()
+        worker.join()
+
+    text = metrics.render()
+    assert sample(text, 'http_requests_total{endpoint="get_leads"') == '3'
+    assert sample(text, 'http_request_duration_seconds_count{') == '3'
+    assert abs(float(sample(text, 'http_request_duration_seconds_sum{')) - 0.06) < 1e-9
+
+    # A restarted server starts from zero
+    reset_shared_metrics(directory)
+    assert 'http_requests_total{' not in RequestMetrics(directory=directory).render()
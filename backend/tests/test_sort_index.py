@@ -0,0 +1,97 @@
+import random
+
+import numpy as np
+import pytest
+
+import sort_index
+from sort_index import SortedKeys, sort_value
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Small chunks and blocks so every boundary case is hit with a few hundred keys
+    monkeypatch.setattr(sort_index, 'WALK_CHUNK_SIZE', 7)
+
+
+def walked(keys, descending=False, after=None):
+    chunks = list(keys.walk(descending, after))
+    assert all(len(ids) for _, ids, _ in chunks)
+    return [(value, lead_id) for values, ids, _ in chunks for value, lead_id in zip(values.tolist(), ids.tolist())]
+
+
+def expected(entries, descending=False, after=None):
+    order = sorted(entries, key=lambda key: (-key[0], key[1]) if descending else key)
+    if after is not None:
+        rank = (lambda key: (-key[0], key[1])) if descending else (lambda key: key)
+        order = [key for key in order if rank(key) > rank(after)]
+    return order
+
+
+def test_sort_value():
+    assert sort_value(3) == 3.0
+    assert sort_value(None) == sort_value('x') == sort_value(True) == sort_value(float('nan')) == float('-inf')
+
+
+def test_walk_matches_sorted_order_through_writes():
+    rng = random.Random(7)
+    keys, entries = SortedKeys(block_size=4), {}
+    for step in range(600):
+        lead_id = rng.randrange(200)
+        if lead_id in entries and rng.random() < 0.4:
+            keys.discard(entries.pop(lead_id), lead_id)
+        else:
+            if lead_id in entries:
+                keys.discard(entries[lead_id], lead_id)
+            # Few distinct values: long runs of ties
+            entries[lead_id] = float(rng.choice([rng.randrange(5), 100, float('-inf')]))
+            keys.add(entries[lead_id], lead_id, lead_id)
+        if step % 37 == 0:
+            pairs = [(value, lead_id) for lead_id, value in entries.items()]
+            assert len(keys) == len(pairs)
+            for descending in (False, True):
+                assert walked(keys, descending) == expected(pairs, descending)
+                after = rng.choice(pairs)
+                assert walked(keys, descending, after) == expected(pairs, descending, after)
+
+
+def test_cursor_key_need_not_be_stored():
+    keys = SortedKeys(block_size=4)
+    pairs = [(float(lead_id % 3), lead_id) for lead_id in range(30)]
+    for value, lead_id in pairs:
+        keys.add(value, lead_id, lead_id)
+    for after in [(1.0, 5), (1.5, 0), (-1.0, 0), (9.0, 99)]:
+        for descending in (False, True):
+            assert walked(keys, descending, after) == expected(pairs, descending, after)
+
+
+def test_descending_page_in_long_tie_run_reads_one_chunk():
+    keys = SortedKeys(block_size=16)
+    for lead_id in range(5000):
+        keys.add(100.0, lead_id, lead_id)
+    keys.add(50.0, 9999, 9999)
+    first = next(keys.walk(descending=True))
+    assert first[1].tolist() == list(range(7))
+    resumed = next(keys.walk(descending=True, after=(100.0, 6)))
+    assert resumed[1].tolist() == list(range(7, 14))
+
+
+def test_discard_of_missing_key_keeps_neighbours():
+    keys = SortedKeys(block_size=4)
+    for lead_id in range(40):
+        keys.add(float(lead_id // 4), lead_id, lead_id)
+    len(keys)
+    keys.discard(2.0, 9)
+    keys.discard(2.0, 9)  # already removed
+    keys.discard(2.0, 3)  # stored under another value
+    keys.discard(99.0, 1)  # beyond every key
+    len(keys)
+    ids = [lead_id for _, lead_id in walked(keys)]
+    assert ids == [lead_id for lead_id in range(40) if lead_id != 9]
+
+
+def test_bulk_changes_rebuild():
+    keys = SortedKeys(block_size=4)
+    values = np.random.default_rng(1).integers(0, 10, 500)
+    for lead_id, value in enumerate(values.tolist()):
+        keys.add(float(value), lead_id, lead_id)
+    assert walked(keys) == sorted((float(value), lead_id) for lead_id, value in enumerate(values.tolist()))
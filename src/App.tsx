@@ -1,12 +1,44 @@
-import { useState, useEffect, useCallback } from "react";
+import { useState, useEffect, useCallback, useRef } from "react";
 import { Download, Zap, CheckSquare, Square } from "lucide-react";
 import { LeadCard } from "./components/LeadCard";
 import { FilterBar } from "./components/FilterBar";
 import { AnalyticsDashboard } from "./components/AnalyticsDashboard";
 import { api } from "./services/api";
-import { Lead, FilterOptions, Analytics } from "./types/lead";
+import { Lead, FilterOptions, Analytics, LeadChanges, LeadFacets } from "./types/lead";
 import isEqual from "lodash.isequal";
 
+// How often the lead list asks the server for changes since its last sequence number
+const CHANGES_POLL_INTERVAL_MS = 5000;
+
+const includesIgnoringCase = (value: string | undefined, part: string) =>
+  (value ?? "").toLowerCase().includes(part.toLowerCase());
+
+// Client-side copy of the /api/leads filters, for leads that arrive as changes
+function matchesFilters(lead: Lead, filters: Record<string, any>): boolean {
+  if (filters.tech_stack && !lead.tech_stack.some((tech) => tech.toLowerCase() === filters.tech_stack.toLowerCase()))
+    return false;
+  if (filters.company_size && lead.company_size !== filters.company_size) return false;
+  if (filters.location && !includesIgnoringCase(lead.location, filters.location)) return false;
+  if (filters.role && !includesIgnoringCase(lead.role, filters.role)) return false;
+  if (filters.industry && !includesIgnoringCase(lead.industry, filters.industry)) return false;
+  if (filters.min_score && (lead.score ?? 0) < filters.min_score) return false;
+  return true;
+}
+
+// The search text only applies to /api/leads/search; lists and facets take the other filters
+const withoutQuery = (filters: Record<string, any>) =>
+  Object.fromEntries(Object.entries(filters).filter(([key]) => key !== "q"));
+
+// The default /api/leads order: score descending, equal scores by id
+const byScore = (a: Lead, b: Lead) => (b.score ?? 0) - (a.score ?? 0) || a.id - b.id;
+
+function mergeChanges(leads: Lead[], changes: LeadChanges, filters: Record<string, any>): Lead[] {
+  const changed = new Set([...changes.deletes, ...changes.upserts.map((lead) => lead.id)]);
+  const merged = leads.filter((lead) => !changed.has(lead.id));
+  merged.push(...changes.upserts.filter((lead) => matchesFilters(lead, filters)));
+  return merged.sort(byScore);
+}
+
 function App() {
   const [leads, setLeads] = useState<Lead[]>([]);
   const [analytics, setAnalytics] = useState<Analytics | null>(null);
@@ -17,10 +49,13 @@ function App() {
     roles: [],
     industries: [],
   });
+  const [facets, setFacets] = useState<LeadFacets | null>(null);
   const [selectedLeads, setSelectedLeads] = useState<Set<number>>(new Set());
   const [loading, setLoading] = useState(true);
   const [exporting, setExporting] = useState(false);
   const [filters, setFilters] = useState<Record<string, any>>({});
+  // Sequence number the current lead list is up to date with (null until the first load)
+  const seqRef = useRef<number | null>(null);
 
   // Load analytics & filter options once
   useEffect(() => {
@@ -40,14 +75,27 @@ function App() {
     loadInitialData();
   }, []);
 
+  // Load the full list (on filter changes and when the change log asks for a resync)
+  const loadLeads = useCallback(async (filters: Record<string, any>) => {
+    // Take the sequence number first: changes made while the list loads are fetched again, not lost
+    const { seq } = await api.getLeadChanges();
+    const listFilters = withoutQuery(filters);
+    const [data, facetCounts] = await Promise.all([
+      filters.q ? api.searchLeads(filters.q, listFilters) : api.getLeads(listFilters),
+      api.getFacets(listFilters),
+    ]);
+    seqRef.current = seq;
+    setLeads(data.leads);
+    setFacets(facetCounts);
+  }, []);
+
   // Load leads whenever filters change (debounced)
   useEffect(() => {
     let timeout: NodeJS.Timeout;
     const fetchLeads = async () => {
       setLoading(true);
       try {
-        const data = await api.getLeads(filters);
-        setLeads(data.leads);
+        await loadLeads(filters);
       } catch (error) {
         console.error("Error loading leads:", error);
       } finally {
@@ -55,10 +103,44 @@ function App() {
       }
     };
 
+    seqRef.current = null;
     timeout = setTimeout(fetchLeads, 300); // 300ms debounce
 
     return () => clearTimeout(timeout);
-  }, [filters]);
+  }, [filters, loadLeads]);
+
+  // Keep the list current by merging the changes since the last load instead of reloading it
+  useEffect(() => {
+    let cancelled = false;
+    const pollChanges = async () => {
+      const since = seqRef.current;
+      if (since === null) return;
+      try {
+        const changes = await api.getLeadChanges(since);
+        if (cancelled || seqRef.current !== since) return;
+        const changed = changes.upserts.length > 0 || changes.deletes.length > 0;
+        if (changes.resync || (changed && filters.q)) {
+          // Search results are ranked by the server, so a search reloads instead of merging
+          await loadLeads(filters);
+        } else if (changed) {
+          seqRef.current = changes.seq;
+          setLeads((prev) => mergeChanges(prev, changes, filters));
+          setFacets(await api.getFacets(withoutQuery(filters)));
+        } else {
+          seqRef.current = changes.seq;
+        }
+        if (changed) setAnalytics(await api.getAnalytics());
+      } catch (error) {
+        console.error("Error polling lead changes:", error);
+      }
+    };
+
+    const interval = setInterval(pollChanges, CHANGES_POLL_INTERVAL_MS);
+    return () => {
+      cancelled = true;
+      clearInterval(interval);
+    };
+  }, [filters, loadLeads]);
 
   // Only update filters if values actually changed
   const handleFilterChange = useCallback((newFilters: Record<string, any>) => {
@@ -142,6 +224,7 @@ function App() {
         <FilterBar
           onFilterChange={handleFilterChange}
           filterOptions={filterOptions}
+          facets={facets}
         />
 
         <div className="bg-white rounded-lg shadow-sm border border-gray-200 p-6 mb-4 flex items-center justify-between">
@@ -1,13 +1,18 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useMemo } from 'react';
 import { Search, X, TrendingUp } from 'lucide-react';
-import { FilterOptions } from '../types/lead';
+import { FilterOptions, LeadFacets } from '../types/lead';
 
 interface FilterBarProps {
   onFilterChange: (filters: any) => void;
   filterOptions: FilterOptions;
+  // Live counts for the current selection; options show no count until they arrive
+  facets?: LeadFacets | null;
 }
 
-export function FilterBar({ onFilterChange, filterOptions }: FilterBarProps) {
+type FacetName = keyof LeadFacets['facets'];
+
+export function FilterBar({ onFilterChange, filterOptions, facets }: FilterBarProps) {
+  const [query, setQuery] = useState('');
   const [techStack, setTechStack] = useState('');
   const [location, setLocation] = useState('');
   const [companySize, setCompanySize] = useState('');
@@ -17,6 +22,7 @@ export function FilterBar({ onFilterChange, filterOptions }: FilterBarProps) {
 
   useEffect(() => {
     const filters = {
+      q: query.trim() || undefined,
       tech_stack: techStack,
       location,
       company_size: companySize,
@@ -25,9 +31,10 @@ export function FilterBar({ onFilterChange, filterOptions }: FilterBarProps) {
       min_score: minScore ? parseInt(minScore) : undefined,
     };
     onFilterChange(filters);
-  }, [techStack, location, companySize, role, industry, minScore, onFilterChange]);
+  }, [query, techStack, location, companySize, role, industry, minScore, onFilterChange]);
 
   const clearFilters = () => {
+    setQuery('');
     setTechStack('');
     setLocation('');
     setCompanySize('');
@@ -36,7 +43,23 @@ export function FilterBar({ onFilterChange, filterOptions }: FilterBarProps) {
     setMinScore('');
   };
 
-  const hasActiveFilters = techStack || location || companySize || role || industry || minScore;
+  const hasActiveFilters = query || techStack || location || companySize || role || industry || minScore;
+
+  const counts = useMemo(() => {
+    const byFacet = new Map<FacetName, Map<string, number>>();
+    if (facets) {
+      (Object.keys(facets.facets) as FacetName[]).forEach((name) => {
+        byFacet.set(name, new Map(facets.facets[name].map(({ value, count }) => [value, count])));
+      });
+    }
+    return byFacet;
+  }, [facets]);
+
+  // "React (42)": how many leads selecting this value would return with the other filters applied
+  const optionLabel = (facet: FacetName, value: string) => {
+    const facetCounts = counts.get(facet);
+    return facetCounts ? `${value} (${facetCounts.get(value) ?? 0})` : value;
+  };
 
   return (
     <div className="bg-white rounded-lg shadow-sm border border-gray-200 p-6 mb-6">
@@ -56,6 +79,14 @@ export function FilterBar({ onFilterChange, filterOptions }: FilterBarProps) {
         )}
       </div>
 
+      <input
+        type="search"
+        value={query}
+        onChange={(e) => setQuery(e.target.value)}
+        placeholder="Search company, contact, role, industry or location"
+        className="w-full px-3 py-2 mb-4 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500 focus:border-transparent"
+      />
+
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-4">
         <div>
           <label className="block text-sm font-medium text-gray-700 mb-1">
@@ -69,7 +100,7 @@ export function FilterBar({ onFilterChange, filterOptions }: FilterBarProps) {
             <option value="">All Technologies</option>
             {filterOptions.tech_stacks.map((tech) => (
               <option key={tech} value={tech}>
-                {tech}
+                {optionLabel('tech_stacks', tech)}
               </option>
             ))}
           </select>
@@ -87,7 +118,7 @@ export function FilterBar({ onFilterChange, filterOptions }: FilterBarProps) {
             <option value="">All Locations</option>
             {filterOptions.locations.map((loc) => (
               <option key={loc} value={loc}>
-                {loc}
+                {optionLabel('locations', loc)}
               </option>
             ))}
           </select>
@@ -105,7 +136,7 @@ export function FilterBar({ onFilterChange, filterOptions }: FilterBarProps) {
             <option value="">All Sizes</option>
             {filterOptions.company_sizes.map((size) => (
               <option key={size} value={size}>
-                {size}
+                {optionLabel('company_sizes', size)}
               </option>
             ))}
           </select>
@@ -123,7 +154,7 @@ export function FilterBar({ onFilterChange, filterOptions }: FilterBarProps) {
             <option value="">All Roles</option>
             {filterOptions.roles.map((r) => (
               <option key={r} value={r}>
-                {r}
+                {optionLabel('roles', r)}
               </option>
             ))}
           </select>
@@ -141,7 +172,7 @@ export function FilterBar({ onFilterChange, filterOptions }: FilterBarProps) {
             <option value="">All Industries</option>
             {filterOptions.industries.map((ind) => (
               <option key={ind} value={ind}>
-                {ind}
+                {optionLabel('industries', ind)}
               </option>
             ))}
           </select>
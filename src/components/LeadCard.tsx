@@ -67,7 +67,9 @@ export function LeadCard({ lead, isSelected, onToggleSelect }: LeadCardProps) {
             >
               {lead.email}
             </a>
-            {lead.email_valid && (
+            {(lead.email_validation?.address === lead.email.trim().toLowerCase()
+              ? lead.email_validation.status === 'valid'
+              : lead.email_valid) && (
               <CheckCircle2 className="w-4 h-4 text-green-500" />
             )}
           </div>
@@ -1,4 +1,4 @@
-import { Lead, FilterOptions, Analytics } from '../types/lead';
+import { Lead, FilterOptions, LeadFacets, LeadChanges, Analytics } from '../types/lead';
 
 const API_BASE_URL = 'http://localhost:5000/api';
 
@@ -10,7 +10,11 @@ export const api = {
     role?: string;
     industry?: string;
     min_score?: number;
-  }): Promise<{ leads: Lead[]; total: number }> {
+    sort_by?: 'score' | 'business_priority_score' | 'engagement_score' | 'last_activity' | 'overall_score';
+    order?: 'asc' | 'desc';
+    limit?: number;
+    cursor?: string;
+  }): Promise<{ leads: Lead[]; total: number; next_cursor?: string | null }> {
     const params = new URLSearchParams();
 
     if (filters) {
@@ -26,6 +30,32 @@ export const api = {
     return response.json();
   },
 
+  async searchLeads(query: string, filters?: {
+    tech_stack?: string;
+    location?: string;
+    company_size?: string;
+    role?: string;
+    industry?: string;
+    min_score?: number;
+    sort?: 'relevance' | 'score';
+    limit?: number;
+    cursor?: string;
+  }): Promise<{ leads: (Lead & { search_relevance: number })[]; total: number; next_cursor: string | null }> {
+    const params = new URLSearchParams({ q: query });
+
+    if (filters) {
+      Object.entries(filters).forEach(([key, value]) => {
+        if (value !== undefined && value !== null && value !== '') {
+          params.append(key, value.toString());
+        }
+      });
+    }
+
+    const response = await fetch(`${API_BASE_URL}/leads/search?${params}`);
+    if (!response.ok) throw new Error('Failed to search leads');
+    return response.json();
+  },
+
   async getAnalytics(): Promise<Analytics> {
     const response = await fetch(`${API_BASE_URL}/analytics`);
     if (!response.ok) throw new Error('Failed to fetch analytics');
@@ -44,9 +74,41 @@ export const api = {
     return response.blob();
   },
 
+  async getLeadChanges(since?: number): Promise<LeadChanges> {
+    const params = new URLSearchParams();
+    if (since !== undefined) params.append('since', since.toString());
+
+    const response = await fetch(`${API_BASE_URL}/leads/changes?${params}`);
+    if (!response.ok) throw new Error('Failed to fetch lead changes');
+    return response.json();
+  },
+
   async getFilterOptions(): Promise<FilterOptions> {
     const response = await fetch(`${API_BASE_URL}/filters/options`);
     if (!response.ok) throw new Error('Failed to fetch filter options');
     return response.json();
   },
+
+  async getFacets(filters?: {
+    tech_stack?: string;
+    location?: string;
+    company_size?: string;
+    role?: string;
+    industry?: string;
+    min_score?: number;
+  }): Promise<LeadFacets> {
+    const params = new URLSearchParams();
+
+    if (filters) {
+      Object.entries(filters).forEach(([key, value]) => {
+        if (value !== undefined && value !== null && value !== '') {
+          params.append(key, value.toString());
+        }
+      });
+    }
+
+    const response = await fetch(`${API_BASE_URL}/leads/facets?${params}`);
+    if (!response.ok) throw new Error('Failed to fetch facets');
+    return response.json();
+  },
 };
@@ -11,6 +11,10 @@ export interface Lead {
   funding_stage: string;
   engagement_score: number;
   email_valid: boolean;
+  email_validation?: {
+    address: string;
+    status: 'valid' | 'missing' | 'invalid_syntax' | 'disposable' | 'role_address' | 'unresolvable';
+  };
   linkedin_url: string;
   last_activity: string;
   score?: number;
@@ -24,6 +28,30 @@ export interface FilterOptions {
   industries: string[];
 }
 
+export interface LeadChanges {
+  seq: number;
+  resync: boolean;
+  upserts: Lead[];
+  deletes: number[];
+}
+
+export interface FacetValue {
+  value: string;
+  count: number;
+}
+
+export interface LeadFacets {
+  total: number;
+  facets: {
+    tech_stacks: FacetValue[];
+    locations: FacetValue[];
+    company_sizes: FacetValue[];
+    roles: FacetValue[];
+    industries: FacetValue[];
+    recommendations: FacetValue[];
+  };
+}
+
 export interface Analytics {
   total_leads: number;
   valid_emails: number;